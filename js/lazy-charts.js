@@ -0,0 +1,74 @@
+// Lazy Chart Loading for the poll results page
+// Each .lazy-chart placeholder holds the chart URL in data-src and is sized
+// with --chart-height. The chart iframe is only created when the placeholder
+// scrolls near the viewport, and removed again once it is far off-screen so
+// the browser can free the Plotly instance.
+//
+// .static-chart placeholders already show the chart as inline SVG. They get an
+// "Interactive chart" button instead, and the Plotly iframe only loads when it
+// is clicked.
+
+(function () {
+    const LOAD_MARGIN = '600px 0px';     // start loading a little before it is visible
+    const UNLOAD_MARGIN = '2500px 0px';  // tear down charts this far away
+
+    function loadChart(placeholder) {
+        if (placeholder.querySelector('iframe')) return;
+
+        const iframe = document.createElement('iframe');
+        iframe.src = placeholder.dataset.src;
+        iframe.title = placeholder.dataset.title || 'Poll results chart';
+        placeholder.appendChild(iframe);
+        placeholder.classList.add('loaded');
+    }
+
+    function unloadChart(placeholder) {
+        const iframe = placeholder.querySelector('iframe');
+        if (!iframe) return;
+
+        iframe.remove();
+        placeholder.classList.remove('loaded');
+    }
+
+    function addInteractiveButton(placeholder) {
+        const button = document.createElement('button');
+        button.type = 'button';
+        button.className = 'chart-interactive';
+        button.textContent = 'Interactive chart';
+        button.addEventListener('click', () => loadChart(placeholder));
+        placeholder.appendChild(button);
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        const placeholders = document.querySelectorAll('.lazy-chart:not(.static-chart)');
+        const staticCharts = document.querySelectorAll('.static-chart');
+
+        staticCharts.forEach(addInteractiveButton);
+
+        // Old browsers: load everything, like the page used to
+        if (!('IntersectionObserver' in window)) {
+            placeholders.forEach(loadChart);
+            return;
+        }
+
+        const loader = new IntersectionObserver(function (entries) {
+            entries.forEach(entry => {
+                if (entry.isIntersecting) loadChart(entry.target);
+            });
+        }, { rootMargin: LOAD_MARGIN });
+
+        // Charts in hidden tabs never intersect, so switching tabs also frees them
+        const unloader = new IntersectionObserver(function (entries) {
+            entries.forEach(entry => {
+                if (!entry.isIntersecting) unloadChart(entry.target);
+            });
+        }, { rootMargin: UNLOAD_MARGIN });
+
+        placeholders.forEach(placeholder => {
+            loader.observe(placeholder);
+            unloader.observe(placeholder);
+        });
+        // Interactive versions of static charts go back to the SVG once far away
+        staticCharts.forEach(placeholder => unloader.observe(placeholder));
+    });
+})();
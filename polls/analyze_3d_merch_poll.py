@@ -5,21 +5,32 @@ Analyzes CSV data exported from Google Sheets 3D merchandise poll responses
 """
 
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 from pathlib import Path
 import sys
 
-# Set style for plots
-sns.set_style("whitegrid")
-plt.rcParams['figure.figsize'] = (12, 6)
+from poll_bootstrap import RESAMPLES, bootstrap_intervals, interval_columns
+from poll_counts import format_timestamp
+from poll_loader import load_poll_results, stream_poll_results
+from poll_schema import load_schema
 
-def load_data(csv_file):
-    """Load poll data from CSV file"""
+# Column kinds come from polls/*-headers.csv + poll_schema.py
+SCHEMA = load_schema('3d_merch')
+MULTISELECT_COLS = SCHEMA.multiselect
+SINGLESELECT_COLS = SCHEMA.singleselect
+
+def load_data(csv_file, stream=False):
+    """Load poll data from CSV file and count every question once
+
+    With stream=True the CSV is read in blocks and only the counts are kept,
+    so memory stays bounded for very large exports.
+    """
     try:
-        df = pd.read_csv(csv_file)
-        print(f"✓ Loaded {len(df)} responses")
-        return df
+        if stream:
+            results = stream_poll_results('3d_merch', csv_file)
+        else:
+            results = load_poll_results('3d_merch', csv_file)
+        print(f"✓ Loaded {results.total} responses")
+        return results
     except FileNotFoundError:
         print(f"Error: File '{csv_file}' not found")
         sys.exit(1)
@@ -27,38 +38,23 @@ def load_data(csv_file):
         print(f"Error loading file: {e}")
         sys.exit(1)
 
-def split_multiselect(df, column):
-    """Split comma-separated values into individual items and count them"""
-    if column not in df.columns:
-        return pd.Series()
-
-    # Split comma-separated values and flatten
-    all_items = []
-    for value in df[column].dropna():
-        items = [item.strip() for item in str(value).split(',')]
-        all_items.extend(items)
-
-    # Count occurrences
-    counts = pd.Series(all_items).value_counts()
-    return counts
-
-def print_summary(df):
+def print_summary(results):
     """Print summary statistics"""
     print("\n" + "="*60)
     print("3D MERCHANDISE POLL SUMMARY")
     print("="*60)
-    print(f"Total Responses: {len(df)}")
-    if 'Timestamp' in df.columns:
-        print(f"Date Range: {df['Timestamp'].min()} to {df['Timestamp'].max()}")
+    print(f"Total Responses: {results.total}")
+    if results.date_range is not None:
+        print(f"Date Range: {format_timestamp(results.date_range[0])} to {format_timestamp(results.date_range[1])}")
     print("\n")
 
-def analyze_multiselect_column(df, column, title):
+def analyze_multiselect_column(results, column, title):
     """Analyze and display results for multi-select questions"""
     print(f"\n{title}")
     print("-" * 60)
 
-    counts = split_multiselect(df, column)
-    total = len(df)
+    counts = results.get(column)
+    total = results.total
 
     if len(counts) == 0:
         print("  (No data)")
@@ -71,17 +67,17 @@ def analyze_multiselect_column(df, column, title):
 
     return counts
 
-def analyze_singleselect_column(df, column, title):
+def analyze_singleselect_column(results, column, title):
     """Analyze and display results for single-select questions"""
     print(f"\n{title}")
     print("-" * 60)
 
-    if column not in df.columns:
+    if not results.has(column):
         print("  (No data)")
         return None
 
-    counts = df[column].value_counts()
-    total = len(df)
+    counts = results.get(column)
+    total = results.total
 
     for item, count in counts.items():
         percentage = (count / total) * 100
@@ -90,266 +86,260 @@ def analyze_singleselect_column(df, column, title):
 
     return counts
 
-def create_visualizations(df, output_dir="analysis_charts_3d_merch"):
+def create_visualizations(results, output_dir="analysis_charts_3d_merch"):
     """Create visualization charts"""
+    # matplotlib and seaborn are only imported when charts are drawn
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    from chart_renderer import chart_figure, save_chart
+
+    # Set style for plots
+    sns.set_style("whitegrid")
+    plt.rcParams['figure.figsize'] = (12, 6)
+
     Path(output_dir).mkdir(exist_ok=True)
     print(f"\n\nGenerating charts in '{output_dir}/' folder...")
 
     # 1. Purchase Interest
-    if 'Purchase Interest' in df.columns:
-        plt.figure(figsize=(8, 6))
-        interest = df['Purchase Interest'].value_counts()
+    if results.has('Purchase Interest'):
+        fig, ax = chart_figure((8, 6))
+        interest = results.get('Purchase Interest')
         colors = ['#2ecc71', '#f39c12', '#e74c3c']
-        interest.plot(kind='pie', autopct='%1.1f%%', colors=colors, startangle=90)
-        plt.title('Purchase Interest Level', fontsize=14, fontweight='bold')
-        plt.ylabel('')
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/purchase_interest.png', dpi=300, bbox_inches='tight')
-        print("  ✓ purchase_interest.png")
-        plt.close()
+        interest.plot(kind='pie', autopct='%1.1f%%', colors=colors, startangle=90, ax=ax)
+        ax.set_title('Purchase Interest Level', fontsize=14, fontweight='bold')
+        ax.set_ylabel('')
+        saved = save_chart(fig, f'{output_dir}/purchase_interest.png')
+        print(f"  ✓ {saved.name}")
 
     # 2. All Product Types Combined
-    plt.figure(figsize=(12, 8))
-    keychain = split_multiselect(df, 'Keychain Products')
-    decorative = split_multiselect(df, 'Decorative Products')
-    functional = split_multiselect(df, 'Functional Products')
+    fig, ax = chart_figure((12, 8))
+    keychain = results.get('Keychain Products')
+    decorative = results.get('Decorative Products')
+    functional = results.get('Functional Products')
 
     all_products = pd.concat([keychain, decorative, functional])
     if len(all_products) > 0:
         top_products = all_products.nlargest(12)
-        top_products.plot(kind='barh', color='steelblue')
-        plt.title('Most Popular Product Types', fontsize=14, fontweight='bold')
-        plt.xlabel('Number of Responses')
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/all_products.png', dpi=300, bbox_inches='tight')
-        print("  ✓ all_products.png")
-    plt.close()
+        top_products.plot(kind='barh', color='steelblue', ax=ax)
+        ax.set_title('Most Popular Product Types', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Number of Responses')
+        saved = save_chart(fig, f'{output_dir}/all_products.png')
+        print(f"  ✓ {saved.name}")
 
     # 3. Product Categories Comparison
-    plt.figure(figsize=(10, 6))
+    fig, ax = chart_figure((10, 6))
     category_counts = {
-        'Keychains': len(split_multiselect(df, 'Keychain Products')),
-        'Decorative': len(split_multiselect(df, 'Decorative Products')),
-        'Functional': len(split_multiselect(df, 'Functional Products'))
+        'Keychains': len(results.get('Keychain Products')),
+        'Decorative': len(results.get('Decorative Products')),
+        'Functional': len(results.get('Functional Products'))
     }
-    pd.Series(category_counts).plot(kind='bar', color=['coral', 'teal', 'gold'])
-    plt.title('Product Category Popularity', fontsize=14, fontweight='bold')
-    plt.xlabel('Category')
-    plt.ylabel('Total Selections')
-    plt.xticks(rotation=0)
-    plt.tight_layout()
-    plt.savefig(f'{output_dir}/product_categories.png', dpi=300, bbox_inches='tight')
-    print("  ✓ product_categories.png")
-    plt.close()
+    pd.Series(category_counts).plot(kind='bar', color=['coral', 'teal', 'gold'], ax=ax)
+    ax.set_title('Product Category Popularity', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Category')
+    ax.set_ylabel('Total Selections')
+    plt.setp(ax.get_xticklabels(), rotation=0)
+    saved = save_chart(fig, f'{output_dir}/product_categories.png')
+    print(f"  ✓ {saved.name}")
 
     # 4. Favorite Insects
-    plt.figure(figsize=(12, 8))
-    insects = split_multiselect(df, 'Favorite Insects')
+    fig, ax = chart_figure((12, 8))
+    insects = results.get('Favorite Insects')
     if len(insects) > 0:
-        insects.plot(kind='barh', color='green')
-        plt.title('Top Insect Preferences (MOST IMPORTANT!)', fontsize=14, fontweight='bold')
-        plt.xlabel('Number of Responses')
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/favorite_insects.png', dpi=300, bbox_inches='tight')
-        print("  ✓ favorite_insects.png")
-    plt.close()
+        insects.plot(kind='barh', color='green', ax=ax)
+        ax.set_title('Top Insect Preferences (MOST IMPORTANT!)', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Number of Responses')
+        saved = save_chart(fig, f'{output_dir}/favorite_insects.png')
+        print(f"  ✓ {saved.name}")
 
     # 5. Design Style
-    if 'Design Style' in df.columns:
-        plt.figure(figsize=(10, 6))
-        style = df['Design Style'].value_counts()
-        style.plot(kind='barh', color='purple')
-        plt.title('Design Style Preferences', fontsize=14, fontweight='bold')
-        plt.xlabel('Number of Responses')
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/design_style.png', dpi=300, bbox_inches='tight')
-        print("  ✓ design_style.png")
-        plt.close()
+    if results.has('Design Style'):
+        fig, ax = chart_figure((10, 6))
+        style = results.get('Design Style')
+        style.plot(kind='barh', color='purple', ax=ax)
+        ax.set_title('Design Style Preferences', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Number of Responses')
+        saved = save_chart(fig, f'{output_dir}/design_style.png')
+        print(f"  ✓ {saved.name}")
 
     # 6. Printing Method
-    if 'Printing Method' in df.columns:
-        plt.figure(figsize=(10, 6))
-        printing = df['Printing Method'].value_counts()
-        printing.plot(kind='barh', color='darkorange')
-        plt.title('Printing Method Preferences', fontsize=14, fontweight='bold')
-        plt.xlabel('Number of Responses')
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/printing_method.png', dpi=300, bbox_inches='tight')
-        print("  ✓ printing_method.png")
-        plt.close()
+    if results.has('Printing Method'):
+        fig, ax = chart_figure((10, 6))
+        printing = results.get('Printing Method')
+        printing.plot(kind='barh', color='darkorange', ax=ax)
+        ax.set_title('Printing Method Preferences', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Number of Responses')
+        saved = save_chart(fig, f'{output_dir}/printing_method.png')
+        print(f"  ✓ {saved.name}")
 
     # 7. Color Preference
-    if 'Color Preference' in df.columns:
-        plt.figure(figsize=(10, 6))
-        colors_pref = df['Color Preference'].value_counts()
-        colors_pref.plot(kind='barh', color='indianred')
-        plt.title('Color/Finish Preferences', fontsize=14, fontweight='bold')
-        plt.xlabel('Number of Responses')
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/color_preference.png', dpi=300, bbox_inches='tight')
-        print("  ✓ color_preference.png")
-        plt.close()
+    if results.has('Color Preference'):
+        fig, ax = chart_figure((10, 6))
+        colors_pref = results.get('Color Preference')
+        colors_pref.plot(kind='barh', color='indianred', ax=ax)
+        ax.set_title('Color/Finish Preferences', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Number of Responses')
+        saved = save_chart(fig, f'{output_dir}/color_preference.png')
+        print(f"  ✓ {saved.name}")
 
     # 8. Price Ranges (Combined)
-    if 'Price Small Items' in df.columns and 'Price Large Items' in df.columns:
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+    if results.has('Price Small Items') and results.has('Price Large Items'):
+        fig, (ax1, ax2) = chart_figure((14, 6), ncols=2)
 
-        small_price = df['Price Small Items'].value_counts()
+        small_price = results.get('Price Small Items')
         small_price.plot(kind='barh', ax=ax1, color='lightblue')
         ax1.set_title('Price Range - Small Items (Keychains)', fontweight='bold')
         ax1.set_xlabel('Number of Responses')
 
-        large_price = df['Price Large Items'].value_counts()
+        large_price = results.get('Price Large Items')
         large_price.plot(kind='barh', ax=ax2, color='lightcoral')
         ax2.set_title('Price Range - Large Items (Decorative)', fontweight='bold')
         ax2.set_xlabel('Number of Responses')
 
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/price_ranges.png', dpi=300, bbox_inches='tight')
-        print("  ✓ price_ranges.png")
-        plt.close()
+        saved = save_chart(fig, f'{output_dir}/price_ranges.png')
+        print(f"  ✓ {saved.name}")
+
+def export_summary_csv(results, output_file="polls/3d_merch_poll_summary.csv", resamples=RESAMPLES):
+    """Export summary statistics to CSV
 
-def export_summary_csv(df, output_file="polls/3d_merch_poll_summary.csv"):
-    """Export summary statistics to CSV"""
+    Every percentage gets a bootstrap confidence interval (CI Lower / CI Upper)
+    from resamples resamples of the respondents; resamples=0 leaves them out.
+    """
     summaries = []
+    intervals = bootstrap_intervals(results, resamples)
 
-    # Multi-select columns
-    multiselect_cols = [
-        'Keychain Products',
-        'Decorative Products',
-        'Functional Products',
-        'Favorite Insects'
-    ]
-
-    for col in multiselect_cols:
-        if col in df.columns:
-            counts = split_multiselect(df, col)
+    for col in MULTISELECT_COLS:
+        if results.has(col):
+            counts = results.get(col)
             for item, count in counts.items():
-                percentage = (count / len(df)) * 100
+                percentage = (count / results.total) * 100
                 summaries.append({
                     'Category': col,
                     'Item': item,
                     'Count': count,
-                    'Percentage': f"{percentage:.1f}%"
+                    'Percentage': f"{percentage:.1f}%",
+                    **interval_columns(intervals, col, item)
                 })
 
-    # Single-select columns
-    singleselect_cols = [
-        'Purchase Interest',
-        'Design Style',
-        'Printing Method',
-        'Color Preference',
-        'Price Small Items',
-        'Price Large Items'
-    ]
-
-    for col in singleselect_cols:
-        if col in df.columns:
-            counts = df[col].value_counts()
+    for col in SINGLESELECT_COLS:
+        if results.has(col):
+            counts = results.get(col)
             for item, count in counts.items():
-                percentage = (count / len(df)) * 100
+                percentage = (count / results.total) * 100
                 summaries.append({
                     'Category': col,
                     'Item': item,
                     'Count': count,
-                    'Percentage': f"{percentage:.1f}%"
+                    'Percentage': f"{percentage:.1f}%",
+                    **interval_columns(intervals, col, item)
                 })
 
     summary_df = pd.DataFrame(summaries)
     summary_df.to_csv(output_file, index=False)
     print(f"\n✓ Summary exported to '{output_file}'")
 
-def print_design_recommendations(df):
+def print_design_recommendations(results):
     """Print actionable design recommendations based on the data"""
     print("\n" + "="*60)
     print("DESIGN RECOMMENDATIONS")
     print("="*60)
 
-    if 'Favorite Insects' in df.columns:
-        insects = split_multiselect(df, 'Favorite Insects')
+    if results.has('Favorite Insects'):
+        insects = results.get('Favorite Insects')
         if len(insects) > 0:
             top_3_insects = insects.head(3)
             print("\nTop 3 insects to prioritize for design:")
             for i, (insect, count) in enumerate(top_3_insects.items(), 1):
-                percentage = (count / len(df)) * 100
+                percentage = (count / results.total) * 100
                 print(f"  {i}. {insect} ({count} responses, {percentage:.1f}%)")
 
-    if 'Design Style' in df.columns:
-        style = df['Design Style'].value_counts()
+    if results.has('Design Style'):
+        style = results.get('Design Style')
         if len(style) > 0:
             top_style = style.index[0]
             print(f"\nMost requested design style: {top_style}")
 
-    if 'Printing Method' in df.columns:
-        method = df['Printing Method'].value_counts()
+    if results.has('Printing Method'):
+        method = results.get('Printing Method')
         if len(method) > 0:
             top_method = method.index[0]
             print(f"Most requested printing method: {top_method}")
 
-    if 'Color Preference' in df.columns:
-        color = df['Color Preference'].value_counts()
+    if results.has('Color Preference'):
+        color = results.get('Color Preference')
         if len(color) > 0:
             top_color = color.index[0]
             print(f"Most requested color/finish: {top_color}")
 
     # Product recommendations
-    keychain = split_multiselect(df, 'Keychain Products')
-    decorative = split_multiselect(df, 'Decorative Products')
-    functional = split_multiselect(df, 'Functional Products')
+    keychain = results.get('Keychain Products')
+    decorative = results.get('Decorative Products')
+    functional = results.get('Functional Products')
 
     all_products = pd.concat([keychain, decorative, functional])
     if len(all_products) > 0:
         print("\nTop 5 products to create first:")
         top_5 = all_products.head(5)
         for i, (product, count) in enumerate(top_5.items(), 1):
-            percentage = (count / len(df)) * 100
+            percentage = (count / results.total) * 100
             print(f"  {i}. {product} ({count} responses, {percentage:.1f}%)")
 
     print("\n" + "="*60)
 
+def print_report(results):
+    """Print the detailed per-question analysis"""
+    print("\n" + "="*60)
+    print("DETAILED ANALYSIS")
+    print("="*60)
+
+    analyze_singleselect_column(results, 'Purchase Interest', 'Purchase Interest Level')
+
+    analyze_multiselect_column(results, 'Keychain Products', 'KEYCHAINS & ACCESSORIES')
+    analyze_multiselect_column(results, 'Decorative Products', 'DECORATIVE ITEMS')
+    analyze_multiselect_column(results, 'Functional Products', 'FUNCTIONAL ITEMS')
+
+    analyze_multiselect_column(results, 'Favorite Insects', 'FAVORITE INSECTS (TOP PRIORITY!)')
+
+    analyze_singleselect_column(results, 'Design Style', 'Design Style Preferences')
+    analyze_singleselect_column(results, 'Printing Method', 'Printing Method Preferences')
+    analyze_singleselect_column(results, 'Color Preference', 'Color/Finish Preferences')
+
+    analyze_singleselect_column(results, 'Price Small Items', 'Price Range - Small Items')
+    analyze_singleselect_column(results, 'Price Large Items', 'Price Range - Large Items')
+
 def main():
     """Main analysis function"""
-    if len(sys.argv) < 2:
-        print("Usage: python analyze_3d_merch_poll.py <csv_file>")
+    args = [arg for arg in sys.argv[1:] if arg not in ('--stream', '--svg', '--report-only', '--no-ci')]
+    if not args:
+        print("Usage: python analyze_3d_merch_poll.py <csv_file> [--stream] [--svg] [--report-only] [--no-ci]")
         print("Example: python analyze_3d_merch_poll.py 3d_merch_poll_responses.csv")
         sys.exit(1)
 
-    csv_file = sys.argv[1]
+    csv_file = args[0]
+    stream = '--stream' in sys.argv[1:]
+    report_only = '--report-only' in sys.argv[1:]
+    no_ci = '--no-ci' in sys.argv[1:]
+    if '--svg' in sys.argv[1:]:
+        from chart_renderer import set_output
+        set_output('svg')
 
     # Load data
-    df = load_data(csv_file)
+    results = load_data(csv_file, stream)
 
     # Print summary
-    print_summary(df)
+    print_summary(results)
 
     # Analyze each section
-    print("\n" + "="*60)
-    print("DETAILED ANALYSIS")
-    print("="*60)
-
-    analyze_singleselect_column(df, 'Purchase Interest', 'Purchase Interest Level')
-
-    analyze_multiselect_column(df, 'Keychain Products', 'KEYCHAINS & ACCESSORIES')
-    analyze_multiselect_column(df, 'Decorative Products', 'DECORATIVE ITEMS')
-    analyze_multiselect_column(df, 'Functional Products', 'FUNCTIONAL ITEMS')
-
-    analyze_multiselect_column(df, 'Favorite Insects', 'FAVORITE INSECTS (TOP PRIORITY!)')
-
-    analyze_singleselect_column(df, 'Design Style', 'Design Style Preferences')
-    analyze_singleselect_column(df, 'Printing Method', 'Printing Method Preferences')
-    analyze_singleselect_column(df, 'Color Preference', 'Color/Finish Preferences')
-
-    analyze_singleselect_column(df, 'Price Small Items', 'Price Range - Small Items')
-    analyze_singleselect_column(df, 'Price Large Items', 'Price Range - Large Items')
+    print_report(results)
 
-    # Create visualizations
-    create_visualizations(df)
+    # Create visualizations (skipped for text-only runs, which never import matplotlib)
+    if not report_only:
+        create_visualizations(results)
 
-    # Export summary
-    export_summary_csv(df)
+    # Export summary (with bootstrap confidence intervals unless --no-ci)
+    export_summary_csv(results, resamples=0 if no_ci else RESAMPLES)
 
     # Print design recommendations
-    print_design_recommendations(df)
+    print_design_recommendations(results)
 
     print("\nNext steps:")
     print("  1. Review the charts in 'analysis_charts_3d_merch/' folder")
@@ -5,21 +5,36 @@ Analyzes CSV data exported from Google Sheets coffee hour poll responses
 """
 
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 from pathlib import Path
 import sys
 
-# Set style for plots
-sns.set_style("whitegrid")
-plt.rcParams['figure.figsize'] = (12, 6)
+from poll_coverage import SlotCoverage
+from poll_bootstrap import RESAMPLES, bootstrap_intervals, interval_columns
+from poll_counts import format_timestamp
+from poll_loader import load_poll_results, stream_poll_results
+from poll_schema import load_schema
 
-def load_data(csv_file):
-    """Load poll data from CSV file"""
+# Column kinds come from polls/*-headers.csv + poll_schema.py
+SCHEMA = load_schema('coffee_hour')
+MULTISELECT_COLS = SCHEMA.multiselect
+SINGLESELECT_COLS = SCHEMA.singleselect
+
+# Slots in the recommended rotating schedule
+ROTATION_SLOTS = 3
+
+def load_data(csv_file, stream=False):
+    """Load poll data from CSV file and count every question once
+
+    With stream=True the CSV is read in blocks and only the counts are kept,
+    so memory stays bounded for very large exports.
+    """
     try:
-        df = pd.read_csv(csv_file)
-        print(f"✓ Loaded {len(df)} responses")
-        return df
+        if stream:
+            results = stream_poll_results('coffee_hour', csv_file)
+        else:
+            results = load_poll_results('coffee_hour', csv_file)
+        print(f"✓ Loaded {results.total} responses")
+        return results
     except FileNotFoundError:
         print(f"Error: File '{csv_file}' not found")
         sys.exit(1)
@@ -27,38 +42,23 @@ def load_data(csv_file):
         print(f"Error loading file: {e}")
         sys.exit(1)
 
-def split_multiselect(df, column):
-    """Split comma-separated values into individual items and count them"""
-    if column not in df.columns:
-        return pd.Series()
-
-    # Split comma-separated values and flatten
-    all_items = []
-    for value in df[column].dropna():
-        items = [item.strip() for item in str(value).split(',')]
-        all_items.extend(items)
-
-    # Count occurrences
-    counts = pd.Series(all_items).value_counts()
-    return counts
-
-def print_summary(df):
+def print_summary(results):
     """Print summary statistics"""
     print("\n" + "="*60)
     print("COFFEE HOUR POLL SUMMARY")
     print("="*60)
-    print(f"Total Responses: {len(df)}")
-    if 'Timestamp' in df.columns:
-        print(f"Date Range: {df['Timestamp'].min()} to {df['Timestamp'].max()}")
+    print(f"Total Responses: {results.total}")
+    if results.date_range is not None:
+        print(f"Date Range: {format_timestamp(results.date_range[0])} to {format_timestamp(results.date_range[1])}")
     print("\n")
 
-def analyze_multiselect_column(df, column, title):
+def analyze_multiselect_column(results, column, title):
     """Analyze and display results for multi-select questions"""
     print(f"\n{title}")
     print("-" * 60)
 
-    counts = split_multiselect(df, column)
-    total = len(df)
+    counts = results.get(column)
+    total = results.total
 
     if len(counts) == 0:
         print("  (No data)")
@@ -71,17 +71,17 @@ def analyze_multiselect_column(df, column, title):
 
     return counts
 
-def analyze_singleselect_column(df, column, title):
+def analyze_singleselect_column(results, column, title):
     """Analyze and display results for single-select questions"""
     print(f"\n{title}")
     print("-" * 60)
 
-    if column not in df.columns:
+    if not results.has(column):
         print("  (No data)")
         return None
 
-    counts = df[column].value_counts()
-    total = len(df)
+    counts = results.get(column)
+    total = results.total
 
     for item, count in counts.items():
         percentage = (count / total) * 100
@@ -90,55 +90,58 @@ def analyze_singleselect_column(df, column, title):
 
     return counts
 
-def create_visualizations(df, output_dir="analysis_charts_coffee_hour"):
+def create_visualizations(results, output_dir="analysis_charts_coffee_hour"):
     """Create visualization charts"""
+    # matplotlib and seaborn are only imported when charts are drawn
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    from chart_renderer import chart_figure, save_chart
+
+    # Set style for plots
+    sns.set_style("whitegrid")
+    plt.rcParams['figure.figsize'] = (12, 6)
+
     Path(output_dir).mkdir(exist_ok=True)
     print(f"\n\nGenerating charts in '{output_dir}/' folder...")
 
     # 1. Role Distribution
-    if 'Role' in df.columns:
-        plt.figure(figsize=(10, 6))
-        role_counts = df['Role'].value_counts()
-        role_counts.plot(kind='barh', color='steelblue')
-        plt.title('Role Distribution', fontsize=14, fontweight='bold')
-        plt.xlabel('Number of Responses')
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/role_distribution.png', dpi=300, bbox_inches='tight')
-        print("  ✓ role_distribution.png")
-        plt.close()
+    if results.has('Role'):
+        fig, ax = chart_figure((10, 6))
+        role_counts = results.get('Role')
+        role_counts.plot(kind='barh', color='steelblue', ax=ax)
+        ax.set_title('Role Distribution', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Number of Responses')
+        saved = save_chart(fig, f'{output_dir}/role_distribution.png')
+        print(f"  ✓ {saved.name}")
 
     # 2. Frequency Preference
-    if 'Frequency' in df.columns:
-        plt.figure(figsize=(10, 6))
-        freq_counts = df['Frequency'].value_counts()
-        freq_counts.plot(kind='barh', color='green')
-        plt.title('Frequency Preferences', fontsize=14, fontweight='bold')
-        plt.xlabel('Number of Responses')
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/frequency_preference.png', dpi=300, bbox_inches='tight')
-        print("  ✓ frequency_preference.png")
-        plt.close()
+    if results.has('Frequency'):
+        fig, ax = chart_figure((10, 6))
+        freq_counts = results.get('Frequency')
+        freq_counts.plot(kind='barh', color='green', ax=ax)
+        ax.set_title('Frequency Preferences', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Number of Responses')
+        saved = save_chart(fig, f'{output_dir}/frequency_preference.png')
+        print(f"  ✓ {saved.name}")
 
     # 3. Preferred Days (MOST IMPORTANT!)
-    plt.figure(figsize=(10, 6))
-    days = split_multiselect(df, 'Preferred Days')
+    fig, ax = chart_figure((10, 6))
+    days = results.get('Preferred Days')
     if len(days) > 0:
         # Sort by weekday order
         weekday_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
         days = days.reindex([d for d in weekday_order if d in days.index])
-        days.plot(kind='bar', color='coral')
-        plt.title('Preferred Days (MOST IMPORTANT!)', fontsize=14, fontweight='bold')
-        plt.xlabel('Day of Week')
-        plt.ylabel('Number of Responses')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/preferred_days.png', dpi=300, bbox_inches='tight')
-        print("  ✓ preferred_days.png")
-    plt.close()
+        days.plot(kind='bar', color='coral', ax=ax)
+        ax.set_title('Preferred Days (MOST IMPORTANT!)', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Day of Week')
+        ax.set_ylabel('Number of Responses')
+        plt.setp(ax.get_xticklabels(), rotation=45)
+        saved = save_chart(fig, f'{output_dir}/preferred_days.png')
+        print(f"  ✓ {saved.name}")
 
     # 4. Start Time (MOST IMPORTANT!)
-    plt.figure(figsize=(12, 8))
-    start_times = split_multiselect(df, 'Start Time')
+    fig, ax = chart_figure((12, 8))
+    start_times = results.get('Start Time')
     if len(start_times) > 0:
         # Sort by time order
         time_order = [
@@ -149,217 +152,189 @@ def create_visualizations(df, output_dir="analysis_charts_coffee_hour"):
 
         # Color code morning vs afternoon
         colors = ['#FFD700' if 'AM' in idx else '#FF8C00' for idx in start_times.index]
-        start_times.plot(kind='barh', color=colors)
-        plt.title('Preferred Start Times (MOST IMPORTANT!)', fontsize=14, fontweight='bold')
-        plt.xlabel('Number of Responses')
-        plt.ylabel('Start Time')
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/start_times.png', dpi=300, bbox_inches='tight')
-        print("  ✓ start_times.png")
-    plt.close()
+        start_times.plot(kind='barh', color=colors, ax=ax)
+        ax.set_title('Preferred Start Times (MOST IMPORTANT!)', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Number of Responses')
+        ax.set_ylabel('Start Time')
+        saved = save_chart(fig, f'{output_dir}/start_times.png')
+        print(f"  ✓ {saved.name}")
 
     # 5. Duration Preference
-    if 'Duration' in df.columns:
-        plt.figure(figsize=(10, 6))
-        duration_counts = df['Duration'].value_counts()
-        duration_counts.plot(kind='barh', color='purple')
-        plt.title('Duration Preferences', fontsize=14, fontweight='bold')
-        plt.xlabel('Number of Responses')
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/duration_preference.png', dpi=300, bbox_inches='tight')
-        print("  ✓ duration_preference.png")
-        plt.close()
+    if results.has('Duration'):
+        fig, ax = chart_figure((10, 6))
+        duration_counts = results.get('Duration')
+        duration_counts.plot(kind='barh', color='purple', ax=ax)
+        ax.set_title('Duration Preferences', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Number of Responses')
+        saved = save_chart(fig, f'{output_dir}/duration_preference.png')
+        print(f"  ✓ {saved.name}")
 
     # 6. Coffee & Tea Preferences (Combined)
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+    fig, (ax1, ax2) = chart_figure((14, 6), ncols=2)
 
-    coffee = split_multiselect(df, 'Coffee Types')
+    coffee = results.get('Coffee Types')
     if len(coffee) > 0:
         coffee.head(6).plot(kind='barh', ax=ax1, color='saddlebrown')
         ax1.set_title('Coffee Type Preferences', fontweight='bold')
         ax1.set_xlabel('Number of Responses')
 
-    tea = split_multiselect(df, 'Tea Types')
+    tea = results.get('Tea Types')
     if len(tea) > 0:
         tea.head(6).plot(kind='barh', ax=ax2, color='darkgreen')
         ax2.set_title('Tea Type Preferences', fontweight='bold')
         ax2.set_xlabel('Number of Responses')
 
-    plt.tight_layout()
-    plt.savefig(f'{output_dir}/beverages.png', dpi=300, bbox_inches='tight')
-    print("  ✓ beverages.png")
-    plt.close()
+    saved = save_chart(fig, f'{output_dir}/beverages.png')
+    print(f"  ✓ {saved.name}")
 
     # 7. Food Options
-    plt.figure(figsize=(12, 6))
-    food = split_multiselect(df, 'Food Options')
+    fig, ax = chart_figure((12, 6))
+    food = results.get('Food Options')
     if len(food) > 0:
-        food.plot(kind='barh', color='tomato')
-        plt.title('Food Preferences', fontsize=14, fontweight='bold')
-        plt.xlabel('Number of Responses')
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/food_preferences.png', dpi=300, bbox_inches='tight')
-        print("  ✓ food_preferences.png")
-    plt.close()
+        food.plot(kind='barh', color='tomato', ax=ax)
+        ax.set_title('Food Preferences', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Number of Responses')
+        saved = save_chart(fig, f'{output_dir}/food_preferences.png')
+        print(f"  ✓ {saved.name}")
 
     # 8. Location Preference
-    if 'Location Preference' in df.columns:
-        plt.figure(figsize=(10, 6))
-        location_counts = df['Location Preference'].value_counts()
-        location_counts.plot(kind='barh', color='teal')
-        plt.title('Location Preferences', fontsize=14, fontweight='bold')
-        plt.xlabel('Number of Responses')
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/location_preference.png', dpi=300, bbox_inches='tight')
-        print("  ✓ location_preference.png")
-        plt.close()
+    if results.has('Location Preference'):
+        fig, ax = chart_figure((10, 6))
+        location_counts = results.get('Location Preference')
+        location_counts.plot(kind='barh', color='teal', ax=ax)
+        ax.set_title('Location Preferences', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Number of Responses')
+        saved = save_chart(fig, f'{output_dir}/location_preference.png')
+        print(f"  ✓ {saved.name}")
 
     # 9. Environment Preference
-    if 'Environment Preference' in df.columns:
-        plt.figure(figsize=(8, 6))
-        env_counts = df['Environment Preference'].value_counts()
-        env_counts.plot(kind='pie', autopct='%1.1f%%', startangle=90)
-        plt.title('Indoor vs Outdoor Preference', fontsize=14, fontweight='bold')
-        plt.ylabel('')
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/environment_preference.png', dpi=300, bbox_inches='tight')
-        print("  ✓ environment_preference.png")
-        plt.close()
+    if results.has('Environment Preference'):
+        fig, ax = chart_figure((8, 6))
+        env_counts = results.get('Environment Preference')
+        env_counts.plot(kind='pie', autopct='%1.1f%%', startangle=90, ax=ax)
+        ax.set_title('Indoor vs Outdoor Preference', fontsize=14, fontweight='bold')
+        ax.set_ylabel('')
+        saved = save_chart(fig, f'{output_dir}/environment_preference.png')
+        print(f"  ✓ {saved.name}")
 
     # 10. Lab Hosting Willingness
-    if 'Lab Hosting Willingness' in df.columns:
-        plt.figure(figsize=(10, 6))
-        hosting_counts = df['Lab Hosting Willingness'].value_counts()
-        hosting_counts.plot(kind='barh', color='mediumseagreen')
-        plt.title('Lab Hosting Willingness', fontsize=14, fontweight='bold')
-        plt.xlabel('Number of Responses')
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/lab_hosting.png', dpi=300, bbox_inches='tight')
-        print("  ✓ lab_hosting.png")
-        plt.close()
+    if results.has('Lab Hosting Willingness'):
+        fig, ax = chart_figure((10, 6))
+        hosting_counts = results.get('Lab Hosting Willingness')
+        hosting_counts.plot(kind='barh', color='mediumseagreen', ax=ax)
+        ax.set_title('Lab Hosting Willingness', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Number of Responses')
+        saved = save_chart(fig, f'{output_dir}/lab_hosting.png')
+        print(f"  ✓ {saved.name}")
 
     # 11. Barriers to Attendance
-    plt.figure(figsize=(12, 6))
-    barriers = split_multiselect(df, 'Barriers')
+    fig, ax = chart_figure((12, 6))
+    barriers = results.get('Barriers')
     if len(barriers) > 0:
-        barriers.plot(kind='barh', color='indianred')
-        plt.title('Barriers to Attendance', fontsize=14, fontweight='bold')
-        plt.xlabel('Number of Responses')
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/barriers.png', dpi=300, bbox_inches='tight')
-        print("  ✓ barriers.png")
-    plt.close()
-
-def export_summary_csv(df, output_file="polls/coffee_hour_poll_summary.csv"):
-    """Export summary statistics to CSV"""
+        barriers.plot(kind='barh', color='indianred', ax=ax)
+        ax.set_title('Barriers to Attendance', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Number of Responses')
+        saved = save_chart(fig, f'{output_dir}/barriers.png')
+        print(f"  ✓ {saved.name}")
+
+def export_summary_csv(results, output_file="polls/coffee_hour_poll_summary.csv", resamples=RESAMPLES):
+    """Export summary statistics to CSV
+
+    Every percentage gets a bootstrap confidence interval (CI Lower / CI Upper)
+    from resamples resamples of the respondents; resamples=0 leaves them out.
+    """
     summaries = []
+    intervals = bootstrap_intervals(results, resamples)
 
-    # Multi-select columns
-    multiselect_cols = [
-        'Preferred Days',
-        'Start Time',
-        'Coffee Types',
-        'Tea Types',
-        'Food Options',
-        'Music Types',
-        'Barriers'
-    ]
-
-    for col in multiselect_cols:
-        if col in df.columns:
-            counts = split_multiselect(df, col)
+    for col in MULTISELECT_COLS:
+        if results.has(col):
+            counts = results.get(col)
             for item, count in counts.items():
-                percentage = (count / len(df)) * 100
+                percentage = (count / results.total) * 100
                 summaries.append({
                     'Category': col,
                     'Item': item,
                     'Count': count,
-                    'Percentage': f"{percentage:.1f}%"
+                    'Percentage': f"{percentage:.1f}%",
+                    **interval_columns(intervals, col, item)
                 })
 
-    # Single-select columns
-    singleselect_cols = [
-        'Role',
-        'Frequency',
-        'Duration',
-        'Environment Preference',
-        'Location Preference',
-        'Lab Hosting Willingness'
-    ]
-
-    for col in singleselect_cols:
-        if col in df.columns:
-            counts = df[col].value_counts()
+    for col in SINGLESELECT_COLS:
+        if results.has(col):
+            counts = results.get(col)
             for item, count in counts.items():
-                percentage = (count / len(df)) * 100
+                percentage = (count / results.total) * 100
                 summaries.append({
                     'Category': col,
                     'Item': item,
                     'Count': count,
-                    'Percentage': f"{percentage:.1f}%"
+                    'Percentage': f"{percentage:.1f}%",
+                    **interval_columns(intervals, col, item)
                 })
 
     summary_df = pd.DataFrame(summaries)
     summary_df.to_csv(output_file, index=False)
     print(f"\n✓ Summary exported to '{output_file}'")
 
-def print_scheduling_recommendations(df):
+def print_slot_recommendations(results, coverage):
+    """Day x start-time slots the most respondents can attend, and a rotating schedule"""
+    ranked = coverage.ranked()
+    if not ranked or ranked[0][1] == 0:
+        print("\nNo respondent picked both a day and a start time")
+        return
+
+    (day, time), count = ranked[0]
+    percentage = (count / results.total) * 100
+    print(f"\nBest slot: {day} at {time} ({count} respondents can attend, {percentage:.1f}%)")
+    for (day, time), count in ranked[1:3]:
+        if count > 0:
+            percentage = (count / results.total) * 100
+            print(f"Alternate slot: {day} at {time} ({count} respondents, {percentage:.1f}%)")
+
+    picks = coverage.best_slots(ROTATION_SLOTS)
+    if len(picks) > 1:
+        print(f"\nRotating schedule ({len(picks)} slots) reaching the most people:")
+        for i, ((day, time), gain, total) in enumerate(picks, 1):
+            percentage = (total / results.total) * 100
+            print(f"  {i}. {day} at {time} (+{gain} respondents, {total} total, {percentage:.1f}%)")
+
+def print_scheduling_recommendations(results):
     """Print actionable scheduling recommendations based on the data"""
     print("\n" + "="*60)
     print("SCHEDULING RECOMMENDATIONS")
     print("="*60)
 
-    if 'Preferred Days' in df.columns:
-        days = split_multiselect(df, 'Preferred Days')
-        if len(days) > 0:
-            top_day = days.index[0]
-            top_day_count = days.iloc[0]
-            percentage = (top_day_count / len(df)) * 100
-            print(f"\nBest day to schedule: {top_day} ({top_day_count} responses, {percentage:.1f}%)")
-
-            if len(days) > 1:
-                second_day = days.index[1]
-                print(f"Alternate day: {second_day}")
-
-    # Start times
-    if 'Start Time' in df.columns:
-        start_times = split_multiselect(df, 'Start Time')
-        if len(start_times) > 0:
-            top_time = start_times.index[0]
-            top_time_count = start_times.iloc[0]
-            percentage = (top_time_count / len(df)) * 100
-            print(f"\nBest start time: {top_time} ({top_time_count} responses, {percentage:.1f}%)")
-
-            if len(start_times) > 1:
-                second_time = start_times.index[1]
-                second_count = start_times.iloc[1]
-                percentage2 = (second_count / len(df)) * 100
-                print(f"Alternate start time: {second_time} ({second_count} responses, {percentage2:.1f}%)")
-
-    if 'Duration' in df.columns:
-        duration = df['Duration'].value_counts()
+    # Slots people can attend, from each respondent's days and start times together
+    patterns = results.pair_patterns('Preferred Days', 'Start Time')
+    if patterns is not None:
+        options = results.schema.options
+        coverage = SlotCoverage(patterns, options.get('Preferred Days', []), options.get('Start Time', []))
+        print_slot_recommendations(results, coverage)
+
+    if results.has('Duration'):
+        duration = results.get('Duration')
         if len(duration) > 0:
             best_duration = duration.index[0]
             print(f"\nRecommended duration: {best_duration}")
 
-    if 'Frequency' in df.columns:
-        frequency = df['Frequency'].value_counts()
+    if results.has('Frequency'):
+        frequency = results.get('Frequency')
         if len(frequency) > 0:
             best_frequency = frequency.index[0]
             print(f"Recommended frequency: {best_frequency}")
 
-    if 'Location Preference' in df.columns:
-        location = df['Location Preference'].value_counts()
+    if results.has('Location Preference'):
+        location = results.get('Location Preference')
         if len(location) > 0:
             best_location = location.index[0]
             print(f"\nBest location: {best_location}")
 
     # Food recommendations
-    food = split_multiselect(df, 'Food Options')
+    food = results.get('Food Options')
     if len(food) > 0:
         print("\nTop 3 food options:")
         for i, (food_item, count) in enumerate(food.head(3).items(), 1):
-            percentage = (count / len(df)) * 100
+            percentage = (count / results.total) * 100
             print(f"  {i}. {food_item} ({count} responses, {percentage:.1f}%)")
 
     # Check for dietary restrictions
@@ -372,52 +347,64 @@ def print_scheduling_recommendations(df):
 
     print("\n" + "="*60)
 
+def print_report(results):
+    """Print the detailed per-question analysis"""
+    print("\n" + "="*60)
+    print("DETAILED ANALYSIS")
+    print("="*60)
+
+    analyze_singleselect_column(results, 'Role', 'Role Distribution')
+
+    analyze_singleselect_column(results, 'Frequency', 'Frequency Preferences')
+    analyze_multiselect_column(results, 'Preferred Days', 'PREFERRED DAYS (MOST IMPORTANT!)')
+    analyze_singleselect_column(results, 'Duration', 'Duration Preferences')
+    analyze_multiselect_column(results, 'Start Time', 'START TIMES (MOST IMPORTANT!)')
+
+    analyze_multiselect_column(results, 'Coffee Types', 'Coffee Type Preferences')
+    analyze_multiselect_column(results, 'Tea Types', 'Tea Type Preferences')
+    analyze_multiselect_column(results, 'Food Options', 'Food Preferences')
+
+    analyze_singleselect_column(results, 'Environment Preference', 'Indoor/Outdoor Preference')
+    analyze_singleselect_column(results, 'Location Preference', 'Location Preferences')
+    analyze_multiselect_column(results, 'Music Types', 'Music Type Preferences')
+
+    analyze_singleselect_column(results, 'Lab Hosting Willingness', 'Lab Hosting Willingness')
+    analyze_multiselect_column(results, 'Barriers', 'Barriers to Attendance')
+
 def main():
     """Main analysis function"""
-    if len(sys.argv) < 2:
-        print("Usage: python analyze_coffee_hour_poll.py <csv_file>")
+    args = [arg for arg in sys.argv[1:] if arg not in ('--stream', '--svg', '--report-only', '--no-ci')]
+    if not args:
+        print("Usage: python analyze_coffee_hour_poll.py <csv_file> [--stream] [--svg] [--report-only] [--no-ci]")
         print("Example: python analyze_coffee_hour_poll.py coffee_hour_poll_responses.csv")
         sys.exit(1)
 
-    csv_file = sys.argv[1]
+    csv_file = args[0]
+    stream = '--stream' in sys.argv[1:]
+    report_only = '--report-only' in sys.argv[1:]
+    no_ci = '--no-ci' in sys.argv[1:]
+    if '--svg' in sys.argv[1:]:
+        from chart_renderer import set_output
+        set_output('svg')
 
     # Load data
-    df = load_data(csv_file)
+    results = load_data(csv_file, stream)
 
     # Print summary
-    print_summary(df)
+    print_summary(results)
 
     # Analyze each section
-    print("\n" + "="*60)
-    print("DETAILED ANALYSIS")
-    print("="*60)
-
-    analyze_singleselect_column(df, 'Role', 'Role Distribution')
-
-    analyze_singleselect_column(df, 'Frequency', 'Frequency Preferences')
-    analyze_multiselect_column(df, 'Preferred Days', 'PREFERRED DAYS (MOST IMPORTANT!)')
-    analyze_singleselect_column(df, 'Duration', 'Duration Preferences')
-    analyze_multiselect_column(df, 'Start Time', 'START TIMES (MOST IMPORTANT!)')
-
-    analyze_multiselect_column(df, 'Coffee Types', 'Coffee Type Preferences')
-    analyze_multiselect_column(df, 'Tea Types', 'Tea Type Preferences')
-    analyze_multiselect_column(df, 'Food Options', 'Food Preferences')
-
-    analyze_singleselect_column(df, 'Environment Preference', 'Indoor/Outdoor Preference')
-    analyze_singleselect_column(df, 'Location Preference', 'Location Preferences')
-    analyze_multiselect_column(df, 'Music Types', 'Music Type Preferences')
-
-    analyze_singleselect_column(df, 'Lab Hosting Willingness', 'Lab Hosting Willingness')
-    analyze_multiselect_column(df, 'Barriers', 'Barriers to Attendance')
+    print_report(results)
 
-    # Create visualizations
-    create_visualizations(df)
+    # Create visualizations (skipped for text-only runs, which never import matplotlib)
+    if not report_only:
+        create_visualizations(results)
 
-    # Export summary
-    export_summary_csv(df)
+    # Export summary (with bootstrap confidence intervals unless --no-ci)
+    export_summary_csv(results, resamples=0 if no_ci else RESAMPLES)
 
     # Print scheduling recommendations
-    print_scheduling_recommendations(df)
+    print_scheduling_recommendations(results)
 
     print("\nNext steps:")
     print("  1. Review the charts in 'analysis_charts_coffee_hour/' folder")
@@ -5,21 +5,32 @@ Analyzes CSV data exported from Google Sheets events poll responses
 """
 
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 from pathlib import Path
 import sys
 
-# Set style for plots
-sns.set_style("whitegrid")
-plt.rcParams['figure.figsize'] = (12, 6)
+from poll_bootstrap import RESAMPLES, bootstrap_intervals, interval_columns
+from poll_counts import format_timestamp
+from poll_loader import load_poll_results, stream_poll_results
+from poll_schema import load_schema
 
-def load_data(csv_file):
-    """Load poll data from CSV file"""
+# Column kinds come from polls/*-headers.csv + poll_schema.py
+SCHEMA = load_schema('events')
+MULTISELECT_COLS = SCHEMA.multiselect
+SINGLESELECT_COLS = SCHEMA.singleselect
+
+def load_data(csv_file, stream=False):
+    """Load poll data from CSV file and count every question once
+
+    With stream=True the CSV is read in blocks and only the counts are kept,
+    so memory stays bounded for very large exports.
+    """
     try:
-        df = pd.read_csv(csv_file)
-        print(f"✓ Loaded {len(df)} responses")
-        return df
+        if stream:
+            results = stream_poll_results('events', csv_file)
+        else:
+            results = load_poll_results('events', csv_file)
+        print(f"✓ Loaded {results.total} responses")
+        return results
     except FileNotFoundError:
         print(f"Error: File '{csv_file}' not found")
         sys.exit(1)
@@ -27,38 +38,23 @@ def load_data(csv_file):
         print(f"Error loading file: {e}")
         sys.exit(1)
 
-def split_multiselect(df, column):
-    """Split comma-separated values into individual items and count them"""
-    if column not in df.columns:
-        return pd.Series()
-
-    # Split comma-separated values and flatten
-    all_items = []
-    for value in df[column].dropna():
-        items = [item.strip() for item in str(value).split(',')]
-        all_items.extend(items)
-
-    # Count occurrences
-    counts = pd.Series(all_items).value_counts()
-    return counts
-
-def print_summary(df):
+def print_summary(results):
     """Print summary statistics"""
     print("\n" + "="*60)
     print("EVENTS POLL SUMMARY")
     print("="*60)
-    print(f"Total Responses: {len(df)}")
-    if 'Timestamp' in df.columns:
-        print(f"Date Range: {df['Timestamp'].min()} to {df['Timestamp'].max()}")
+    print(f"Total Responses: {results.total}")
+    if results.date_range is not None:
+        print(f"Date Range: {format_timestamp(results.date_range[0])} to {format_timestamp(results.date_range[1])}")
     print("\n")
 
-def analyze_multiselect_column(df, column, title):
+def analyze_multiselect_column(results, column, title):
     """Analyze and display results for multi-select questions"""
     print(f"\n{title}")
     print("-" * 60)
 
-    counts = split_multiselect(df, column)
-    total = len(df)
+    counts = results.get(column)
+    total = results.total
 
     if len(counts) == 0:
         print("  (No data)")
@@ -71,17 +67,17 @@ def analyze_multiselect_column(df, column, title):
 
     return counts
 
-def analyze_singleselect_column(df, column, title):
+def analyze_singleselect_column(results, column, title):
     """Analyze and display results for single-select questions"""
     print(f"\n{title}")
     print("-" * 60)
 
-    if column not in df.columns:
+    if not results.has(column):
         print("  (No data)")
         return None
 
-    counts = df[column].value_counts()
-    total = len(df)
+    counts = results.get(column)
+    total = results.total
 
     for item, count in counts.items():
         percentage = (count / total) * 100
@@ -90,233 +86,225 @@ def analyze_singleselect_column(df, column, title):
 
     return counts
 
-def create_visualizations(df, output_dir="analysis_charts_events"):
+def create_visualizations(results, output_dir="analysis_charts_events"):
     """Create visualization charts"""
+    # matplotlib and seaborn are only imported when charts are drawn
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    from chart_renderer import chart_figure, save_chart
+
+    # Set style for plots
+    sns.set_style("whitegrid")
+    plt.rcParams['figure.figsize'] = (12, 6)
+
     Path(output_dir).mkdir(exist_ok=True)
     print(f"\n\nGenerating charts in '{output_dir}/' folder...")
 
     # 1. Event Frequency
-    if 'Event Frequency' in df.columns:
-        plt.figure(figsize=(10, 6))
-        freq_counts = df['Event Frequency'].value_counts()
-        freq_counts.plot(kind='barh', color='steelblue')
-        plt.title('Preferred Event Frequency', fontsize=14, fontweight='bold')
-        plt.xlabel('Number of Responses')
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/event_frequency.png', dpi=300, bbox_inches='tight')
-        print("  ✓ event_frequency.png")
-        plt.close()
+    if results.has('Event Frequency'):
+        fig, ax = chart_figure((10, 6))
+        freq_counts = results.get('Event Frequency')
+        freq_counts.plot(kind='barh', color='steelblue', ax=ax)
+        ax.set_title('Preferred Event Frequency', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Number of Responses')
+        saved = save_chart(fig, f'{output_dir}/event_frequency.png')
+        print(f"  ✓ {saved.name}")
 
     # 2. Event Budget
-    if 'Event Budget' in df.columns:
-        plt.figure(figsize=(10, 6))
-        budget_counts = df['Event Budget'].value_counts()
-        budget_counts.plot(kind='barh', color='green')
-        plt.title('Event Budget Willingness', fontsize=14, fontweight='bold')
-        plt.xlabel('Number of Responses')
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/event_budget.png', dpi=300, bbox_inches='tight')
-        print("  ✓ event_budget.png")
-        plt.close()
+    if results.has('Event Budget'):
+        fig, ax = chart_figure((10, 6))
+        budget_counts = results.get('Event Budget')
+        budget_counts.plot(kind='barh', color='green', ax=ax)
+        ax.set_title('Event Budget Willingness', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Number of Responses')
+        saved = save_chart(fig, f'{output_dir}/event_budget.png')
+        print(f"  ✓ {saved.name}")
 
     # 3. Top On-Campus Events
-    plt.figure(figsize=(12, 8))
-    oncampus_social = split_multiselect(df, 'On-Campus Social Events')
-    oncampus_games = split_multiselect(df, 'On-Campus Games & Entertainment')
+    fig, ax = chart_figure((12, 8))
+    oncampus_social = results.get('On-Campus Social Events')
+    oncampus_games = results.get('On-Campus Games & Entertainment')
 
     # Combine and get top 10
     all_oncampus = pd.concat([oncampus_social, oncampus_games])
     if len(all_oncampus) > 0:
         top_oncampus = all_oncampus.nlargest(10)
-        top_oncampus.plot(kind='barh', color='coral')
-        plt.title('Top 10 On-Campus Events', fontsize=14, fontweight='bold')
-        plt.xlabel('Number of Responses')
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/top_oncampus_events.png', dpi=300, bbox_inches='tight')
-        print("  ✓ top_oncampus_events.png")
-    plt.close()
+        top_oncampus.plot(kind='barh', color='coral', ax=ax)
+        ax.set_title('Top 10 On-Campus Events', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Number of Responses')
+        saved = save_chart(fig, f'{output_dir}/top_oncampus_events.png')
+        print(f"  ✓ {saved.name}")
 
     # 4. Off-Campus Activities
-    plt.figure(figsize=(12, 8))
-    outdoor = split_multiselect(df, 'Outdoor Activities')
-    daytrips = split_multiselect(df, 'Day Trips')
-    entertainment = split_multiselect(df, 'Entertainment Outings')
+    fig, ax = chart_figure((12, 8))
+    outdoor = results.get('Outdoor Activities')
+    daytrips = results.get('Day Trips')
+    entertainment = results.get('Entertainment Outings')
 
     all_offcampus = pd.concat([outdoor, daytrips, entertainment])
     if len(all_offcampus) > 0:
         top_offcampus = all_offcampus.nlargest(10)
-        top_offcampus.plot(kind='barh', color='teal')
-        plt.title('Top 10 Off-Campus Activities', fontsize=14, fontweight='bold')
-        plt.xlabel('Number of Responses')
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/top_offcampus_activities.png', dpi=300, bbox_inches='tight')
-        print("  ✓ top_offcampus_activities.png")
-    plt.close()
+        top_offcampus.plot(kind='barh', color='teal', ax=ax)
+        ax.set_title('Top 10 Off-Campus Activities', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Number of Responses')
+        saved = save_chart(fig, f'{output_dir}/top_offcampus_activities.png')
+        print(f"  ✓ {saved.name}")
 
     # 5. Seasonal Events
-    plt.figure(figsize=(10, 6))
-    seasonal = split_multiselect(df, 'Seasonal Celebrations')
+    fig, ax = chart_figure((10, 6))
+    seasonal = results.get('Seasonal Celebrations')
     if len(seasonal) > 0:
-        seasonal.plot(kind='barh', color='orange')
-        plt.title('Seasonal Celebration Preferences', fontsize=14, fontweight='bold')
-        plt.xlabel('Number of Responses')
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/seasonal_events.png', dpi=300, bbox_inches='tight')
-        print("  ✓ seasonal_events.png")
-    plt.close()
+        seasonal.plot(kind='barh', color='orange', ax=ax)
+        ax.set_title('Seasonal Celebration Preferences', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Number of Responses')
+        saved = save_chart(fig, f'{output_dir}/seasonal_events.png')
+        print(f"  ✓ {saved.name}")
 
     # 6. Availability Times
-    plt.figure(figsize=(10, 6))
-    availability = split_multiselect(df, 'Availability Times')
+    fig, ax = chart_figure((10, 6))
+    availability = results.get('Availability Times')
     if len(availability) > 0:
-        availability.plot(kind='barh', color='purple')
-        plt.title('When People Can Attend Events', fontsize=14, fontweight='bold')
-        plt.xlabel('Number of Responses')
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/availability_times.png', dpi=300, bbox_inches='tight')
-        print("  ✓ availability_times.png")
-    plt.close()
+        availability.plot(kind='barh', color='purple', ax=ax)
+        ax.set_title('When People Can Attend Events', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Number of Responses')
+        saved = save_chart(fig, f'{output_dir}/availability_times.png')
+        print(f"  ✓ {saved.name}")
 
     # 7. Main Barriers
-    plt.figure(figsize=(10, 6))
-    barriers = split_multiselect(df, 'Main Barriers')
+    fig, ax = chart_figure((10, 6))
+    barriers = results.get('Main Barriers')
     if len(barriers) > 0:
-        barriers.plot(kind='barh', color='indianred')
-        plt.title('Barriers to Attendance', fontsize=14, fontweight='bold')
-        plt.xlabel('Number of Responses')
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/barriers.png', dpi=300, bbox_inches='tight')
-        print("  ✓ barriers.png")
-    plt.close()
+        barriers.plot(kind='barh', color='indianred', ax=ax)
+        ax.set_title('Barriers to Attendance', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Number of Responses')
+        saved = save_chart(fig, f'{output_dir}/barriers.png')
+        print(f"  ✓ {saved.name}")
 
     # 8. 3D Print Interest (if present)
-    if '3D Print Interest' in df.columns:
-        plt.figure(figsize=(8, 6))
-        print_interest = df['3D Print Interest'].value_counts()
+    if results.has('3D Print Interest'):
+        fig, ax = chart_figure((8, 6))
+        print_interest = results.get('3D Print Interest')
         colors = ['#2ecc71', '#f39c12', '#e74c3c']
-        print_interest.plot(kind='pie', autopct='%1.1f%%', colors=colors, startangle=90)
-        plt.title('Interest in 3D Printed Merchandise', fontsize=14, fontweight='bold')
-        plt.ylabel('')
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/3d_print_interest.png', dpi=300, bbox_inches='tight')
-        print("  ✓ 3d_print_interest.png")
-        plt.close()
+        print_interest.plot(kind='pie', autopct='%1.1f%%', colors=colors, startangle=90, ax=ax)
+        ax.set_title('Interest in 3D Printed Merchandise', fontsize=14, fontweight='bold')
+        ax.set_ylabel('')
+        saved = save_chart(fig, f'{output_dir}/3d_print_interest.png')
+        print(f"  ✓ {saved.name}")
 
     # 9. Alcohol Preference
-    if 'Alcohol Preference' in df.columns:
-        plt.figure(figsize=(8, 6))
-        alcohol = df['Alcohol Preference'].value_counts()
-        alcohol.plot(kind='pie', autopct='%1.1f%%', startangle=90)
-        plt.title('Alcohol Preference for Events', fontsize=14, fontweight='bold')
-        plt.ylabel('')
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/alcohol_preference.png', dpi=300, bbox_inches='tight')
-        print("  ✓ alcohol_preference.png")
-        plt.close()
+    if results.has('Alcohol Preference'):
+        fig, ax = chart_figure((8, 6))
+        alcohol = results.get('Alcohol Preference')
+        alcohol.plot(kind='pie', autopct='%1.1f%%', startangle=90, ax=ax)
+        ax.set_title('Alcohol Preference for Events', fontsize=14, fontweight='bold')
+        ax.set_ylabel('')
+        saved = save_chart(fig, f'{output_dir}/alcohol_preference.png')
+        print(f"  ✓ {saved.name}")
 
     # 10. Participation Level
-    plt.figure(figsize=(10, 6))
-    participation = split_multiselect(df, 'Participation Level')
+    fig, ax = chart_figure((10, 6))
+    participation = results.get('Participation Level')
     if len(participation) > 0:
-        participation.plot(kind='barh', color='mediumseagreen')
-        plt.title('How People Want to Participate', fontsize=14, fontweight='bold')
-        plt.xlabel('Number of Responses')
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/participation_level.png', dpi=300, bbox_inches='tight')
-        print("  ✓ participation_level.png")
-    plt.close()
-
-def export_summary_csv(df, output_file="polls/events_poll_summary.csv"):
-    """Export summary statistics to CSV"""
+        participation.plot(kind='barh', color='mediumseagreen', ax=ax)
+        ax.set_title('How People Want to Participate', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Number of Responses')
+        saved = save_chart(fig, f'{output_dir}/participation_level.png')
+        print(f"  ✓ {saved.name}")
+
+def export_summary_csv(results, output_file="polls/events_poll_summary.csv", resamples=RESAMPLES):
+    """Export summary statistics to CSV
+
+    Every percentage gets a bootstrap confidence interval (CI Lower / CI Upper)
+    from resamples resamples of the respondents; resamples=0 leaves them out.
+    """
     summaries = []
+    intervals = bootstrap_intervals(results, resamples)
 
-    # Multi-select columns
-    multiselect_cols = [
-        'On-Campus Social Events',
-        'On-Campus Games & Entertainment',
-        'Seasonal Celebrations',
-        'Outdoor Activities',
-        'Day Trips',
-        'Entertainment Outings',
-        'Availability Times',
-        'Main Barriers',
-        'Participation Level'
-    ]
-
-    for col in multiselect_cols:
-        if col in df.columns:
-            counts = split_multiselect(df, col)
+    for col in MULTISELECT_COLS:
+        if results.has(col):
+            counts = results.get(col)
             for item, count in counts.items():
-                percentage = (count / len(df)) * 100
+                percentage = (count / results.total) * 100
                 summaries.append({
                     'Category': col,
                     'Item': item,
                     'Count': count,
-                    'Percentage': f"{percentage:.1f}%"
+                    'Percentage': f"{percentage:.1f}%",
+                    **interval_columns(intervals, col, item)
                 })
 
-    # Single-select columns
-    singleselect_cols = ['Event Frequency', 'Event Budget', '3D Print Interest', 'Alcohol Preference']
-
-    for col in singleselect_cols:
-        if col in df.columns:
-            counts = df[col].value_counts()
+    for col in SINGLESELECT_COLS:
+        if results.has(col):
+            counts = results.get(col)
             for item, count in counts.items():
-                percentage = (count / len(df)) * 100
+                percentage = (count / results.total) * 100
                 summaries.append({
                     'Category': col,
                     'Item': item,
                     'Count': count,
-                    'Percentage': f"{percentage:.1f}%"
+                    'Percentage': f"{percentage:.1f}%",
+                    **interval_columns(intervals, col, item)
                 })
 
     summary_df = pd.DataFrame(summaries)
     summary_df.to_csv(output_file, index=False)
     print(f"\n✓ Summary exported to '{output_file}'")
 
+def print_report(results):
+    """Print the detailed per-question analysis"""
+    print("\n" + "="*60)
+    print("DETAILED ANALYSIS")
+    print("="*60)
+
+    analyze_multiselect_column(results, 'On-Campus Social Events', 'ON-CAMPUS: Social Events')
+    analyze_multiselect_column(results, 'On-Campus Games & Entertainment', 'ON-CAMPUS: Games & Entertainment')
+    analyze_multiselect_column(results, 'Seasonal Celebrations', 'Seasonal Celebrations')
+
+    analyze_multiselect_column(results, 'Outdoor Activities', 'OFF-CAMPUS: Outdoor Activities')
+    analyze_multiselect_column(results, 'Day Trips', 'OFF-CAMPUS: Day Trips')
+    analyze_multiselect_column(results, 'Entertainment Outings', 'OFF-CAMPUS: Entertainment')
+
+    analyze_singleselect_column(results, 'Event Frequency', 'Event Frequency Preference')
+    analyze_multiselect_column(results, 'Availability Times', 'When People Can Attend')
+    analyze_multiselect_column(results, 'Main Barriers', 'Barriers to Attendance')
+
+    analyze_singleselect_column(results, 'Event Budget', 'Event Budget Willingness')
+    analyze_singleselect_column(results, '3D Print Interest', '3D Print Merchandise Interest')
+
+    analyze_multiselect_column(results, 'Participation Level', 'How People Want to Participate')
+    analyze_singleselect_column(results, 'Alcohol Preference', 'Alcohol Preference')
+
 def main():
     """Main analysis function"""
-    if len(sys.argv) < 2:
-        print("Usage: python analyze_events_poll.py <csv_file>")
+    args = [arg for arg in sys.argv[1:] if arg not in ('--stream', '--svg', '--report-only', '--no-ci')]
+    if not args:
+        print("Usage: python analyze_events_poll.py <csv_file> [--stream] [--svg] [--report-only] [--no-ci]")
         print("Example: python analyze_events_poll.py events_poll_responses.csv")
         sys.exit(1)
 
-    csv_file = sys.argv[1]
+    csv_file = args[0]
+    stream = '--stream' in sys.argv[1:]
+    report_only = '--report-only' in sys.argv[1:]
+    no_ci = '--no-ci' in sys.argv[1:]
+    if '--svg' in sys.argv[1:]:
+        from chart_renderer import set_output
+        set_output('svg')
 
     # Load data
-    df = load_data(csv_file)
+    results = load_data(csv_file, stream)
 
     # Print summary
-    print_summary(df)
+    print_summary(results)
 
     # Analyze each section
-    print("\n" + "="*60)
-    print("DETAILED ANALYSIS")
-    print("="*60)
-
-    analyze_multiselect_column(df, 'On-Campus Social Events', 'ON-CAMPUS: Social Events')
-    analyze_multiselect_column(df, 'On-Campus Games & Entertainment', 'ON-CAMPUS: Games & Entertainment')
-    analyze_multiselect_column(df, 'Seasonal Celebrations', 'Seasonal Celebrations')
-
-    analyze_multiselect_column(df, 'Outdoor Activities', 'OFF-CAMPUS: Outdoor Activities')
-    analyze_multiselect_column(df, 'Day Trips', 'OFF-CAMPUS: Day Trips')
-    analyze_multiselect_column(df, 'Entertainment Outings', 'OFF-CAMPUS: Entertainment')
-
-    analyze_singleselect_column(df, 'Event Frequency', 'Event Frequency Preference')
-    analyze_multiselect_column(df, 'Availability Times', 'When People Can Attend')
-    analyze_multiselect_column(df, 'Main Barriers', 'Barriers to Attendance')
-
-    analyze_singleselect_column(df, 'Event Budget', 'Event Budget Willingness')
-    analyze_singleselect_column(df, '3D Print Interest', '3D Print Merchandise Interest')
-
-    analyze_multiselect_column(df, 'Participation Level', 'How People Want to Participate')
-    analyze_singleselect_column(df, 'Alcohol Preference', 'Alcohol Preference')
+    print_report(results)
 
-    # Create visualizations
-    create_visualizations(df)
+    # Create visualizations (skipped for text-only runs, which never import matplotlib)
+    if not report_only:
+        create_visualizations(results)
 
-    # Export summary
-    export_summary_csv(df)
+    # Export summary (with bootstrap confidence intervals unless --no-ci)
+    export_summary_csv(results, resamples=0 if no_ci else RESAMPLES)
 
     print("\n" + "="*60)
     print("ANALYSIS COMPLETE!")
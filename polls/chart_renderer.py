@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Shared matplotlib rendering for the PNG chart scripts
+Pins the non-interactive Agg backend and keeps one figure (with its axes) per
+layout, so a full run clears and redraws the same few figures instead of
+creating, saving and closing a new one for every chart.
+
+Charts are written as PNG at 300 dpi by default. set_output() switches to SVG
+(text stays text, so the files are small and sharp at any size) or to raster
+images of a fixed pixel width.
+"""
+
+import matplotlib
+matplotlib.use('Agg')
+
+from pathlib import Path
+
+import numpy as np
+from matplotlib import rcParams
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from poll_trace import span
+
+# 'png' or 'svg'
+OUTPUT_FORMAT = 'png'
+
+# Raster resolution; with TARGET_WIDTH set the dpi is picked per chart so the
+# saved image is that many pixels wide
+DPI = 300
+TARGET_WIDTH = None
+
+# (rows, columns) -> (figure, axes), reused for every chart with that layout
+_FIGURES = {}
+
+
+def set_output(fmt='png', width=None, dpi=300):
+    """Pick the output format: 'png' (at dpi, or width pixels wide) or 'svg'"""
+    global OUTPUT_FORMAT, TARGET_WIDTH, DPI
+    if fmt not in ('png', 'svg'):
+        raise ValueError(f"Unknown chart format '{fmt}' (expected png or svg)")
+    OUTPUT_FORMAT = fmt
+    TARGET_WIDTH = width
+    DPI = dpi
+
+
+def chart_figure(figsize, ncols=1):
+    """Blank figure and axes for the next chart
+
+    Returns (fig, ax) or (fig, (ax1, ax2, ...)) like plt.subplots. The same
+    objects come back for the next chart with the same number of columns, so
+    draw on the returned axes (not through plt) and save with save_chart.
+    """
+    key = (1, ncols)
+    if key not in _FIGURES:
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        _FIGURES[key] = (fig, fig.subplots(1, ncols))
+    fig, axes = _FIGURES[key]
+
+    fig.set_size_inches(figsize)
+    fig.patch.set_facecolor(rcParams['figure.facecolor'])
+    fig.patch.set_alpha(None)
+    fig.subplots_adjust(**{name: rcParams[f'figure.subplot.{name}']
+                           for name in ('left', 'right', 'bottom', 'top', 'wspace', 'hspace')})
+    for ax in np.atleast_1d(axes):
+        ax.clear()
+        # Not reset by clear(); pie charts and the chart styling change them
+        ax.tick_params(which='both', **{f'grid_{name}': rcParams[f'grid.{name}']
+                                        for name in ('color', 'alpha', 'linestyle', 'linewidth')})
+        ax.set_aspect('auto')
+        ax.set_frame_on(True)
+        for spine in ax.spines.values():
+            spine.set_visible(True)
+    return fig, axes
+
+
+def save_chart(fig, output_path, **savefig_kwargs):
+    """Lay out and write a chart in the current output format
+
+    output_path's suffix is replaced by the format. Returns the path written.
+    """
+    output_path = Path(output_path).with_suffix(f'.{OUTPUT_FORMAT}')
+    with span('matplotlib save', 'render', file=output_path.name):
+        return render_chart(fig, output_path, savefig_kwargs)
+
+
+def render_chart(fig, output_path, savefig_kwargs):
+    fig.tight_layout()
+
+    dpi = DPI
+    if OUTPUT_FORMAT == 'svg':
+        # Keep text as text and leave the date out so unchanged charts stay byte-identical
+        savefig_kwargs.setdefault('metadata', {'Date': None})
+        with matplotlib.rc_context({'svg.fonttype': 'none', 'svg.hashsalt': 'poll-charts'}):
+            fig.savefig(output_path, bbox_inches='tight', **savefig_kwargs)
+        return output_path
+
+    if TARGET_WIDTH:
+        # bbox_inches='tight' crops to the drawn area plus the pad on each side
+        # (text extents shift slightly with dpi, so widths land within ~1%)
+        tight = fig.get_tightbbox(fig.canvas.get_renderer())
+        dpi = TARGET_WIDTH / (tight.width + 2 * rcParams['savefig.pad_inches'])
+    fig.savefig(output_path, dpi=dpi, bbox_inches='tight', **savefig_kwargs)
+    return output_path
@@ -2,18 +2,100 @@
 """
 Create interactive Plotly visualizations for ALL poll results
 With DARK THEME and varied colors - NO MONOTONE BLUE!
+
+By default each chart page only holds its figure spec and loads one shared
+copy of plotly.js saved next to the chart folders
+(polls/analysis_results/plotly-<version>.min.js), so the charts stay small and
+still work offline. Pass --inline-plotlyjs to embed plotly.js in every page.
+
+Charts are only rebuilt when their input changes: each chart's counts, title
+and options are hashed and recorded in polls/analysis_results/chart_manifest.json,
+and a chart whose hash matches the manifest is left alone. Pass --force to
+rebuild everything.
+
+Every chart is also saved as a small static SVG next to its page (same colors
+and labels, no JavaScript), which poll-results.html shows inline. Pass
+--svg-only to write just the SVGs (plotly is then not needed) or --no-svg to
+skip them.
+
+Figures are not built through plotly.graph_objects: the dark-theme layout is
+validated once per chart kind and each chart only fills in its own values, which
+gives the same chart pages without the per-chart validation cost. Pass
+--validate-figures to go through plotly.graph_objects anyway, or
+--benchmark-figures to time both paths on the current results.
+
+Bars carry error bars, and every chart's hover text a line, with the
+bootstrap confidence interval of each option (see poll_bootstrap.py). Pass
+--resamples 0 to leave them out or --seed to draw different resamples.
 """
 
+import argparse
+import contextlib
+import fcntl
+import hashlib
+import html
+import json
+import math
+import os
+import numpy as np
 import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
 from pathlib import Path
 
+try:
+    import plotly.graph_objects as go
+    import plotly
+    import plotly.io
+    import plotly.offline
+    from _plotly_utils.utils import convert_to_base64
+except ImportError:
+    # Without plotly only the static SVG charts can be written
+    plotly = None
+
+from poll_bootstrap import CONFIDENCE, RESAMPLES, SEED, bootstrap_intervals
+from poll_loader import CACHE_DIR_NAME, load_poll_results
+from poll_schema import POLLS_DIR
+from poll_trace import span
+
 # Diverse color palette - NO ALL BLUE!
 COLORS = ['#4A90E2', '#FFC947', '#90EE90', '#FF6B6B', '#9B59B6', '#1ABC9C', '#F39C12', '#E74C3C', '#3498DB', '#2ECC71']
 UCR_BLUE = '#003DA5'
 UCR_GOLD = '#FFC947'
 
+# 'shared': chart pages reference one plotly.js file; 'inline': each page embeds it
+PLOTLYJS_MODE = 'shared'
+
+# Bump when the chart styling code changes so every chart is rebuilt once
+CHART_VERSION = 2
+MANIFEST_NAME = 'chart_manifest.json'
+
+# Rebuild charts even when their hash is in the manifest
+FORCE_REBUILD = False
+
+# Files written for every chart: the Plotly page and/or a static SVG next to it
+CHART_FORMATS = ('html', 'svg') if plotly else ('svg',)
+
+# Static SVG charts: drawn on a fixed-width canvas that scales to the page
+SVG_WIDTH = 800
+SVG_FONT = 'Inter, sans-serif'
+SVG_TITLE_COLOR = '#4A90E2'
+SVG_TEXT_COLOR = '#9FC5E8'
+SVG_GRID_COLOR = 'rgba(255,255,255,0.1)'
+SVG_EDGE_COLOR = 'rgba(255,255,255,0.2)'
+
+# Heatmaps: dark navy (lowest) through the chart blue to UCR gold (highest)
+HEATMAP_COLORS = [(0.0, '#1E2A3A'), (0.5, '#4A90E2'), (1.0, UCR_GOLD)]
+
+# Build figure dicts from pre-validated skeletons instead of through
+# plotly.graph_objects (same JSON, no per-chart validation)
+FAST_FIGURES = True
+_FIGURE_SKELETONS = {}
+
+# Bootstrap confidence intervals drawn on the charts (0 resamples: none)
+CI_RESAMPLES = RESAMPLES
+CI_SEED = SEED
+CI_LABEL = f"{CONFIDENCE:.0%} CI"
+ERROR_BAR_COLOR = 'rgba(255,255,255,0.6)'
+
 def wrap_label(text, max_length=20):
     """Wrap long labels into multiple lines"""
     if len(text) <= max_length:
@@ -49,7 +131,6 @@ def shorten_labels(data):
 
         # Coffee/Tea
         "Espresso-based drinks (latte, cappuccino)": "Espresso drinks",
-        "cappuccino)": "Espresso drinks",  # Handle split case
 
         # Food
         "Pastries and baked goods": "Pastries",
@@ -117,18 +198,6 @@ def shorten_labels(data):
 
     return new_data
 
-def split_multiselect(df, column):
-    """Split comma-separated values and count"""
-    if column not in df.columns:
-        return pd.Series()
-
-    all_items = []
-    for value in df[column].dropna():
-        items = [item.strip() for item in str(value).split(',')]
-        all_items.extend(items)
-
-    return pd.Series(all_items).value_counts()
-
 def consolidate_small_categories(data, min_percent=10, max_others_percent=20):
     """
     Consolidate categories below min_percent into 'Others' category
@@ -156,20 +225,170 @@ def consolidate_small_categories(data, min_percent=10, max_others_percent=20):
 
     return data
 
-def create_interactive_bar(data, title, output_path, orientation='h', consolidate=False):
-    """Create interactive horizontal bar chart with VARIED COLORS"""
-    # Handle empty data
-    if len(data) == 0 or data.sum() == 0:
-        print(f"  ⚠ Skipping {output_path.name} - no data")
-        return
+def chart_intervals(results):
+    """Bootstrap interval of every question in responses ('Lower'/'Upper' per option)"""
+    intervals = bootstrap_intervals(results, CI_RESAMPLES, seed=CI_SEED)
+    return {col: frame * results.total / 100 for col, frame in intervals.items()}
 
-    # Shorten labels for better readability
-    data = shorten_labels(data)
-
-    # Consolidate small categories if requested
-    if consolidate:
-        data = consolidate_small_categories(data)
+def labeled_intervals(ci, original, data):
+    """Intervals of the original labels, moved onto the shortened/consolidated labels of data
 
+    Consolidated 'Others' has no interval (NaN).
+    """
+    ci = ci.reindex(original.index)
+    ci.index = shorten_labels(original).index
+    return ci.reindex(data.index)
+
+def interval_hash(ci):
+    """Interval bounds as they go into the chart hash"""
+    return [[None if pd.isna(value) else round(float(value), 2) for value in row]
+            for row in ci.itertuples(index=False)]
+
+def interval_line(ci, label):
+    """Hover line with the interval of one bar or slice ('' without one)"""
+    if ci is None or pd.isna(ci.at[label, 'Lower']):
+        return ''
+    return f"<br>{CI_LABEL}: {ci.at[label, 'Lower']:.0f}-{ci.at[label, 'Upper']:.0f}"
+
+def error_bars(data, ci):
+    """Plotly error bar spec of the intervals (no bar for labels without one)"""
+    upper = [None if pd.isna(high) else round(float(high - count), 2)
+             for count, high in zip(data.values, ci['Upper'])]
+    lower = [None if pd.isna(low) else round(float(count - low), 2)
+             for count, low in zip(data.values, ci['Lower'])]
+    # Keys in plotly's (alphabetical) order, so fast figures serialize the same
+    return dict(array=upper, arrayminus=lower, color=ERROR_BAR_COLOR, symmetric=False,
+                thickness=1.5, type='data', width=4)
+
+def shared_plotlyjs(chart_dir):
+    """Write plotly.js once into the folder above chart_dir and return its file name
+
+    The version is part of the file name, so upgrading plotly writes a new file
+    and pages never load a plotly.js that does not match their figure spec.
+    """
+    filename = f"plotly-{plotly.offline.get_plotlyjs_version()}.min.js"
+    js_path = Path(chart_dir).parent / filename
+    if not js_path.exists():
+        tmp_path = js_path.with_name(f"{filename}.tmp{os.getpid()}")
+        tmp_path.write_text(plotly.offline.get_plotlyjs(), encoding='utf-8')
+        tmp_path.replace(js_path)
+    return filename
+
+def chart_div_id(output_path):
+    """Element id of a chart page's plot, from its folder and file name (stable across rebuilds)"""
+    name = f"{output_path.parent.name}-{output_path.stem}"
+    return 'chart-' + ''.join(char if char.isalnum() or char in '-_' else '_' for char in name)
+
+def chart_html(fig, output_path, div_id=None):
+    """Chart page for a figure dict, with plotly.js inlined or pointing at the shared copy
+
+    The plot's element id defaults to chart_div_id(output_path) rather than
+    plotly's random one, so rebuilding a chart gives a byte-identical page.
+    """
+    if div_id is None:
+        div_id = chart_div_id(output_path)
+    if PLOTLYJS_MODE == 'inline':
+        include_plotlyjs = True
+    else:
+        include_plotlyjs = f"../{shared_plotlyjs(output_path.parent)}"
+    # Figures come from build_*_figure or fast_*_figure, so they are already valid
+    with span('plotly serialize', 'render'):
+        return plotly.io.to_html(fig, include_plotlyjs=include_plotlyjs, validate=False,
+                                 config={'displayModeBar': False}, div_id=div_id)
+
+def write_chart(fig, output_path):
+    """Save a chart page"""
+    html_text = chart_html(fig, output_path)
+    with span('write chart', 'write', file=output_path.name):
+        output_path.write_text(html_text, encoding='utf-8')
+
+def chart_hash(kind, data, title, **options):
+    """Hash of everything that goes into a chart (the same for its page and its SVG)"""
+    payload = json.dumps([
+        CHART_VERSION, kind, title,
+        [str(label) for label in data.index], [int(count) for count in data.values],
+        sorted(options.items()),
+    ])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def plotly_build():
+    """plotly version and plotly.js mode a chart page was written with"""
+    return f"{plotly.__version__} {PLOTLYJS_MODE}"
+
+def manifest_path_for(output_path):
+    """One manifest per output root (the folder above the chart folders)"""
+    return output_path.parent.parent / MANIFEST_NAME
+
+def read_manifest(manifest_path):
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def chart_outputs(output_path):
+    """Files written for one chart, one per entry of CHART_FORMATS"""
+    return [output_path.with_suffix(f'.{fmt}') for fmt in CHART_FORMATS]
+
+def chart_is_current(output_path, key):
+    """True if this exact chart was already built and is still on disk"""
+    if FORCE_REBUILD or not output_path.exists():
+        return False
+    manifest = read_manifest(manifest_path_for(output_path))
+    entry = manifest.get(f"{output_path.parent.name}/{output_path.name}")
+    if entry is None or entry['hash'] != key:
+        return False
+    # Chart pages also go stale when plotly or the plotly.js mode changes
+    return output_path.suffix != '.html' or entry.get('plotly') == plotly_build()
+
+@contextlib.contextmanager
+def manifest_lock(manifest_path):
+    """Hold the manifest while updating it (polls can be charted in parallel, see poll_build.py)
+
+    The lock file lives in polls/.poll_cache/, named after the manifest's
+    path, so nothing but charts ends up in the published output folder.
+    """
+    digest = hashlib.sha256(str(manifest_path.resolve()).encode('utf-8')).hexdigest()[:16]
+    lock_path = POLLS_DIR / CACHE_DIR_NAME / f"{MANIFEST_NAME}.{digest}.lock"
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+def record_chart(output_path, key, title, height):
+    """Add a freshly written chart to the manifest (results_page.py reads it too)"""
+    manifest_path = manifest_path_for(output_path)
+    entry = {
+        'hash': key,
+        'title': title,
+        'height': height,
+        'bytes': output_path.stat().st_size,
+    }
+    if output_path.suffix == '.html':
+        entry['plotly'] = plotly_build()
+
+    with manifest_lock(manifest_path):
+        manifest = read_manifest(manifest_path)
+        manifest[f"{output_path.parent.name}/{output_path.name}"] = entry
+        tmp_path = manifest_path.with_name(f"{MANIFEST_NAME}.tmp{os.getpid()}")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        tmp_path.replace(manifest_path)
+
+def skip_unchanged(output_path, key):
+    """Skip a chart whose inputs have not changed since the last build"""
+    if not all(chart_is_current(path, key) for path in chart_outputs(output_path)):
+        return False
+    if 'html' in CHART_FORMATS and PLOTLYJS_MODE == 'shared':
+        shared_plotlyjs(output_path.parent)
+    print(f"  · {output_path.name} (unchanged)")
+    return True
+
+def bar_fields(data, orientation, ci=None):
+    """Per-chart values of a bar chart (labels, counts, texts, colors, height, error bars)"""
     total = data.sum()
     percentages = (data.values / total * 100).round(1)
 
@@ -180,38 +399,60 @@ def create_interactive_bar(data, title, output_path, orientation='h', consolidat
     # Use different colors for each bar!
     bar_colors = [COLORS[i % len(COLORS)] for i in range(len(data))]
 
-    hover_text = [f'<b>{item}</b><br>Count: {count}<br>Percentage: {pct:.1f}%'
+    hover_text = [f'<b>{item}</b><br>Count: {count}<br>Percentage: {pct:.1f}%{interval_line(ci, item)}'
                   for item, count, pct in zip(original_labels, data.values, percentages)]
 
     # Smart label positioning: inside for large bars, outside for small ones
     max_value = data.values.max()
     text_positions = ['inside' if val > max_value * 0.15 else 'outside' for val in data.values]
 
+    if orientation == 'h':
+        text = [f'<b>{count} ({pct:.1f}%)</b>' for count, pct in zip(data.values, percentages)]
+    else:
+        text = [f'<b>{count}<br>({pct:.1f}%)</b>' for count, pct in zip(data.values, percentages)]
+
+    return dict(
+        labels=wrapped_labels,
+        values=data.values,
+        text=text,
+        textposition=text_positions,
+        hovertext=hover_text,
+        colors=bar_colors,
+        height=max(400, len(data) * 50) if orientation == 'h' else 500,
+        error=error_bars(data, ci) if ci is not None else None,
+    )
+
+def build_bar_figure(data, title, orientation='h', ci=None):
+    """Bar chart as a validated plotly Figure"""
+    fields = bar_fields(data, orientation, ci)
+
     if orientation == 'h':
         fig = go.Figure(go.Bar(
-            y=wrapped_labels,
-            x=data.values,
+            y=fields['labels'],
+            x=fields['values'],
             orientation='h',
-            text=[f'<b>{count} ({pct:.1f}%)</b>' for count, pct in zip(data.values, percentages)],
-            textposition=text_positions,
+            text=fields['text'],
+            textposition=fields['textposition'],
             textfont=dict(color='#9FC5E8', size=12, family='Inter, sans-serif'),
-            hovertext=hover_text,
+            hovertext=fields['hovertext'],
             hoverinfo='text',
-            marker=dict(color=bar_colors, opacity=0.9, line=dict(width=1, color='rgba(255,255,255,0.2)')),
+            marker=dict(color=fields['colors'], opacity=0.9, line=dict(width=1, color='rgba(255,255,255,0.2)')),
+            error_x=fields['error'],
             cliponaxis=False  # Ensure text labels are not clipped
         ))
         xaxis_title = 'Number of Responses'
         yaxis_title = ''
     else:
         fig = go.Figure(go.Bar(
-            x=wrapped_labels,
-            y=data.values,
-            text=[f'<b>{count}<br>({pct:.1f}%)</b>' for count, pct in zip(data.values, percentages)],
-            textposition=text_positions,
+            x=fields['labels'],
+            y=fields['values'],
+            text=fields['text'],
+            textposition=fields['textposition'],
             textfont=dict(color='#9FC5E8', size=12, family='Inter, sans-serif'),
-            hovertext=hover_text,
+            hovertext=fields['hovertext'],
             hoverinfo='text',
-            marker=dict(color=bar_colors, opacity=0.9, line=dict(width=1, color='rgba(255,255,255,0.2)')),
+            marker=dict(color=fields['colors'], opacity=0.9, line=dict(width=1, color='rgba(255,255,255,0.2)')),
+            error_y=fields['error'],
             cliponaxis=False  # Ensure text labels are not clipped
         ))
         xaxis_title = ''
@@ -237,7 +478,7 @@ def create_interactive_bar(data, title, output_path, orientation='h', consolidat
             showgrid=True,
             zerolinecolor='rgba(255,255,255,0.2)'
         ),
-        height=max(400, len(data) * 50) if orientation == 'h' else 500,
+        height=fields['height'],
         margin=dict(l=20, r=100, t=80, b=40),  # More right margin for labels
         hoverlabel=dict(
             bgcolor="rgba(26, 26, 26, 0.95)",
@@ -247,28 +488,14 @@ def create_interactive_bar(data, title, output_path, orientation='h', consolidat
             bordercolor="#4A90E2"
         )
     )
+    return fig
 
-    fig.write_html(output_path, config={'displayModeBar': False})
-    print(f"  ✓ {output_path.name}")
-
-def create_interactive_donut(data, title, output_path, legend_position='right', consolidate=False, scale=1.0):
-    """Create interactive donut chart with VARIED COLORS"""
-    # Handle empty data
-    if len(data) == 0 or data.sum() == 0:
-        print(f"  ⚠ Skipping {output_path.name} - no data")
-        return
-
-    # Shorten labels for better readability
-    data = shorten_labels(data)
-
-    # Consolidate small categories if requested
-    if consolidate:
-        data = consolidate_small_categories(data)
-
+def donut_fields(data, scale=1.0, ci=None):
+    """Per-chart values of a donut chart"""
     total = data.sum()
     percentages = (data.values / total * 100).round(1)
 
-    hover_text = [f'<b>{item}</b><br>Count: {count}<br>{pct:.1f}% of responses'
+    hover_text = [f'<b>{item}</b><br>Count: {count}<br>{pct:.1f}% of responses{interval_line(ci, item)}'
                   for item, count, pct in zip(data.index, data.values, percentages)]
 
     # Use our varied color palette
@@ -285,31 +512,47 @@ def create_interactive_donut(data, title, output_path, legend_position='right',
         text_template = '%{label}<br>%{value} (%{percent})'
         font_size = 12
 
-    fig = go.Figure(go.Pie(
+    # Taller height and smaller margins for better mobile display
+    base_height = 650 if len(data) <= 3 else 550
+    chart_margins = dict(l=10, r=10, t=80, b=10) if len(data) <= 3 else dict(l=20, r=20, t=80, b=20)
+
+    return dict(
         labels=data.index,
         values=data.values,
         hole=hole_size,
-        marker=dict(colors=pie_colors, line=dict(color='rgba(255,255,255,0.2)', width=2)),
+        colors=pie_colors,
         textinfo='label+percent+value' if len(data) > 3 else 'label+percent',
         texttemplate=text_template,
-        textposition='outside',
-        textfont=dict(color='#9FC5E8', size=font_size, family='Inter, sans-serif'),
+        font_size=font_size,
         hovertext=hover_text,
+        height=int(base_height * scale),
+        margin=chart_margins,
+    )
+
+def build_donut_figure(data, title, scale=1.0, ci=None):
+    """Donut chart as a validated plotly Figure"""
+    fields = donut_fields(data, scale, ci)
+
+    fig = go.Figure(go.Pie(
+        labels=fields['labels'],
+        values=fields['values'],
+        hole=fields['hole'],
+        marker=dict(colors=fields['colors'], line=dict(color='rgba(255,255,255,0.2)', width=2)),
+        textinfo=fields['textinfo'],
+        texttemplate=fields['texttemplate'],
+        textposition='outside',
+        textfont=dict(color='#9FC5E8', size=fields['font_size'], family='Inter, sans-serif'),
+        hovertext=fields['hovertext'],
         hoverinfo='text'
     ))
 
     # DARK THEME - NO LEGEND (labels are already on chart)
-    # Taller height and smaller margins for better mobile display
-    base_height = 650 if len(data) <= 3 else 550
-    chart_height = int(base_height * scale)
-    chart_margins = dict(l=10, r=10, t=80, b=10) if len(data) <= 3 else dict(l=20, r=20, t=80, b=20)
-
     fig.update_layout(
         title=dict(text=title, font=dict(size=20, family='Inter, sans-serif', color='#4A90E2', weight=600)),
         plot_bgcolor='rgba(0,0,0,0)',
         paper_bgcolor='rgba(0,0,0,0)',
         font=dict(family='Inter, sans-serif', size=13, color='#9FC5E8'),
-        height=chart_height,
+        height=fields['height'],
         showlegend=False,
         hoverlabel=dict(
             bgcolor="rgba(26, 26, 26, 0.95)",
@@ -318,250 +561,843 @@ def create_interactive_donut(data, title, output_path, legend_position='right',
             font_color="#FFC947",
             bordercolor="#4A90E2"
         ),
-        margin=chart_margins
+        margin=fields['margin']
+    )
+    return fig
+
+def heatmap_fields(matrix, value_label='Value', decimals=2):
+    """Per-chart values of a heatmap (labels, values, cell texts, height)"""
+    values = matrix.to_numpy(dtype=float)
+    # Column labels are tilted 40 degrees below the cells (about 7px per character)
+    label_room = max(len(str(label)) for label in matrix.columns) * 7 * math.sin(math.radians(40))
+    # Missing cells (NaN) stay blank
+    text = [['' if np.isnan(value) else f'{value:.{decimals}f}' for value in row] for row in values]
+    hover_text = [[f'<b>{row}</b> + <b>{column}</b><br>{value_label}: {value:.{decimals}f}'
+                   for column, value in zip(matrix.columns, row_values)]
+                  for row, row_values in zip(matrix.index, values)]
+    return dict(
+        x=[wrap_label(str(label)) for label in matrix.columns],
+        y=[wrap_label(str(label)) for label in matrix.index],
+        z=values,
+        text=text,
+        hovertext=hover_text,
+        label_room=label_room,
+        height=max(400, round(120 + len(matrix.index) * 40 + label_room)),
     )
 
-    fig.write_html(output_path, config={'displayModeBar': False})
+def build_heatmap_figure(matrix, title, value_label='Value', decimals=2):
+    """Heatmap (rows x columns of a DataFrame) as a validated plotly Figure"""
+    fields = heatmap_fields(matrix, value_label, decimals)
+
+    fig = go.Figure(go.Heatmap(
+        x=fields['x'],
+        y=fields['y'],
+        z=fields['z'],
+        text=fields['text'],
+        texttemplate='%{text}',
+        textfont=dict(size=11, family='Inter, sans-serif'),
+        hovertext=fields['hovertext'],
+        hoverinfo='text',
+        colorscale=[[stop, color] for stop, color in HEATMAP_COLORS],
+        zmin=0,
+        xgap=2,
+        ygap=2,
+        colorbar=dict(
+            title=dict(text=value_label, font=dict(color='#9FC5E8', size=13, family='Inter, sans-serif')),
+            tickfont=dict(color='#9FC5E8', size=12, family='Inter, sans-serif'),
+            outlinewidth=0
+        )
+    ))
+
+    # DARK THEME, first row at the top
+    fig.update_layout(
+        title=dict(text=title, font=dict(size=20, family='Inter, sans-serif', color='#4A90E2', weight=600)),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family='Inter, sans-serif', size=13, color='#9FC5E8'),
+        xaxis=dict(
+            tickfont=dict(color='#9FC5E8', size=12, family='Inter, sans-serif', weight='bold'),
+            tickangle=-40,
+            showgrid=False
+        ),
+        yaxis=dict(
+            tickfont=dict(color='#9FC5E8', size=12, family='Inter, sans-serif', weight='bold'),
+            autorange='reversed',
+            showgrid=False
+        ),
+        height=fields['height'],
+        margin=dict(l=20, r=20, t=80, b=40),
+        hoverlabel=dict(
+            bgcolor="rgba(26, 26, 26, 0.95)",
+            font_size=14,
+            font_family="Inter, sans-serif",
+            font_color="#FFC947",
+            bordercolor="#4A90E2"
+        )
+    )
+    return fig
+
+def figure_skeleton(kind, orientation='h'):
+    """Figure dict of a sample chart, built through plotly once per kind
+
+    Holds the dark-theme layout (and plotly's template) already validated, so
+    fast figures only fill in their own values.
+    """
+    key = (kind, orientation)
+    if key not in _FIGURE_SKELETONS:
+        sample = pd.Series([2, 1], index=['a', 'b'])
+        if kind == 'bar':
+            fig = build_bar_figure(sample, '', orientation)
+        else:
+            fig = build_donut_figure(sample, '')
+        _FIGURE_SKELETONS[key] = fig.to_dict()
+    return _FIGURE_SKELETONS[key]
+
+def fast_bar_figure(data, title, orientation='h', ci=None):
+    """Same figure dict as build_bar_figure(...).to_dict(), without validation"""
+    fields = bar_fields(data, orientation, ci)
+    skeleton = figure_skeleton('bar', orientation)
+
+    label_axis, value_axis = ('y', 'x') if orientation == 'h' else ('x', 'y')
+    trace = dict(skeleton['data'][0])
+    trace[label_axis] = fields['labels']
+    trace[value_axis] = fields['values']
+    trace['text'] = fields['text']
+    trace['textposition'] = fields['textposition']
+    trace['hovertext'] = fields['hovertext']
+    trace['marker'] = dict(trace['marker'], color=fields['colors'])
+    if fields['error'] is not None:
+        trace[f'error_{value_axis}'] = fields['error']
+        # plotly orders trace properties alphabetically, with type last
+        trace = dict(sorted(trace.items(), key=lambda item: (item[0] == 'type', item[0])))
+
+    layout = dict(skeleton['layout'], height=fields['height'])
+    layout['title'] = dict(layout['title'], text=title)
+
+    fig = {'data': [trace], 'layout': layout}
+    convert_to_base64(fig)
+    return fig
+
+def fast_donut_figure(data, title, scale=1.0, ci=None):
+    """Same figure dict as build_donut_figure(...).to_dict(), without validation"""
+    fields = donut_fields(data, scale, ci)
+    skeleton = figure_skeleton('donut')
+
+    trace = dict(skeleton['data'][0])
+    trace['labels'] = fields['labels'].to_numpy()
+    trace['values'] = fields['values']
+    trace['hole'] = fields['hole']
+    trace['marker'] = dict(trace['marker'], colors=fields['colors'])
+    trace['textinfo'] = fields['textinfo']
+    trace['texttemplate'] = fields['texttemplate']
+    trace['textfont'] = dict(trace['textfont'], size=fields['font_size'])
+    trace['hovertext'] = fields['hovertext']
+
+    layout = dict(skeleton['layout'], height=fields['height'], margin=fields['margin'])
+    layout['title'] = dict(layout['title'], text=title)
+
+    fig = {'data': [trace], 'layout': layout}
+    convert_to_base64(fig)
+    return fig
+
+def svg_number(value):
+    """Coordinate with at most one decimal (keeps the SVG small)"""
+    return f"{value:.1f}".rstrip('0').rstrip('.')
+
+def svg_text(x, y, lines, size=12, anchor='middle', weight=None, fill=SVG_TEXT_COLOR):
+    """<text> vertically centred on y, one <tspan> per line"""
+    if isinstance(lines, str):
+        lines = [lines]
+    line_height = size * 1.2
+    top = y - (len(lines) - 1) * line_height / 2
+    attrs = (f'x="{svg_number(x)}" y="{svg_number(top)}" font-size="{size}" '
+             f'text-anchor="{anchor}" dominant-baseline="central" fill="{fill}"')
+    if weight:
+        attrs += f' font-weight="{weight}"'
+    if len(lines) == 1:
+        return f'<text {attrs}>{html.escape(str(lines[0]))}</text>'
+    spans = ''.join(
+        f'<tspan x="{svg_number(x)}" dy="{svg_number(line_height) if i else 0}">{html.escape(str(line))}</tspan>'
+        for i, line in enumerate(lines))
+    return f'<text {attrs}>{spans}</text>'
+
+def svg_document(title, height, body):
+    """Whole SVG chart: dark-theme title over the drawn body, scaled to its container"""
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {SVG_WIDTH} {height}" '
+        f'width="100%" role="img" font-family="{SVG_FONT}">'
+        f'<title>{html.escape(title)}</title>'
+        + svg_text(20, 40, title, size=20, anchor='start', weight=600, fill=SVG_TITLE_COLOR)
+        + ''.join(body)
+        + '</svg>'
+    )
+
+def axis_ticks(max_value, target=6):
+    """Whole-number axis ticks at a 1/2/5 step, up to max_value"""
+    raw_step = max_value / target
+    magnitude = 10 ** math.floor(math.log10(raw_step)) if raw_step > 0 else 1
+    step = max(1, int(next(m * magnitude for m in (1, 2, 5, 10) if m * magnitude >= raw_step)))
+    return list(range(0, int(max_value) + 1, step))
+
+def svg_bar(data, title, orientation='h', ci=None):
+    """Static SVG version of build_bar_figure (same colors, labels, error bars and height)"""
+    total = data.sum()
+    percentages = data.values / total * 100
+    labels = [wrap_label(str(label)).split('<br>') for label in data.index]
+    max_value = data.values.max()
+    n = len(data)
+    body = []
+
+    if orientation == 'h':
+        height = max(400, n * 50)
+        label_width = max(len(line) for lines in labels for line in lines) * 7.5
+        x0, x1, y0, y1 = 28 + label_width, SVG_WIDTH - 100, 80, height - 60
+    else:
+        height = 500
+        label_lines = max(len(lines) for lines in labels)
+        x0, x1, y0, y1 = 70, SVG_WIDTH - 20, 80, height - 30 - label_lines * 14.4
+
+    # Bar ends, or interval ends where there is one
+    if ci is not None:
+        lows = ci['Lower'].to_numpy(dtype=float)
+        highs = ci['Upper'].to_numpy(dtype=float)
+        reach = np.fmax(data.values, highs)
+    else:
+        lows = highs = np.full(n, np.nan)
+        reach = data.values
+
+    # Same 5% headroom plotly leaves above the longest bar (or error bar)
+    axis_max = reach.max() * 1.05
+    ticks = axis_ticks(axis_max)
+    if orientation == 'h':
+        scale = (x1 - x0) / axis_max
+        for tick in ticks:
+            x = x0 + tick * scale
+            body.append(f'<line x1="{svg_number(x)}" y1="{y0}" x2="{svg_number(x)}" '
+                        f'y2="{svg_number(y1)}" stroke="{SVG_GRID_COLOR}"/>')
+            body.append(svg_text(x, y1 + 14, str(tick), weight='bold'))
+        body.append(svg_text((x0 + x1) / 2, height - 18, 'Number of Responses', size=13, weight='bold'))
+    else:
+        scale = (y1 - y0) / axis_max
+        for tick in ticks:
+            y = y1 - tick * scale
+            body.append(f'<line x1="{x0}" y1="{svg_number(y)}" x2="{x1}" '
+                        f'y2="{svg_number(y)}" stroke="{SVG_GRID_COLOR}"/>')
+            body.append(svg_text(x0 - 8, y, str(tick), anchor='end', weight='bold'))
+        middle = svg_number((y0 + y1) / 2)
+        body.append(f'<text x="22" y="{middle}" font-size="13" font-weight="bold" text-anchor="middle" '
+                    f'dominant-baseline="central" fill="{SVG_TEXT_COLOR}" '
+                    f'transform="rotate(-90 22 {middle})">Number of Responses</text>')
+
+    # Categories run bottom-to-top (h) or left-to-right (v), like plotly's category axes
+    band = ((y1 - y0) if orientation == 'h' else (x1 - x0)) / n
+    thickness = band * 0.8
+    for i, (item, count, pct, lines) in enumerate(zip(data.index, data.values, percentages, labels)):
+        color = COLORS[i % len(COLORS)]
+        length = count * scale
+        inside = count > max_value * 0.15
+        # Outside labels start past the error bar
+        outside = reach[i] * scale
+        interval = interval_line(ci, item).replace('<br>', ', ')
+        tooltip = f'<title>{html.escape(str(item))}: {count} ({pct:.1f}%){interval}</title>'
+        if orientation == 'h':
+            middle = y1 - (i + 0.5) * band
+            rect = (x0, middle - thickness / 2, length, thickness)
+            value_text = svg_text(x0 + length - 6 if inside else x0 + outside + 6, middle,
+                                  f'{count} ({pct:.1f}%)', anchor='end' if inside else 'start',
+                                  weight='bold')
+            label_text = svg_text(x0 - 8, middle, lines, anchor='end', weight='bold')
+            whisker = ((x0 + lows[i] * scale, middle), (x0 + highs[i] * scale, middle))
+        else:
+            middle = x0 + (i + 0.5) * band
+            rect = (middle - thickness / 2, y1 - length, thickness, length)
+            value_text = svg_text(middle, y1 - length + 22 if inside else y1 - outside - 20,
+                                  [str(count), f'({pct:.1f}%)'], weight='bold')
+            label_text = svg_text(middle, y1 + 10 + len(lines) * 7.2, lines, weight='bold')
+            whisker = ((middle, y1 - lows[i] * scale), (middle, y1 - highs[i] * scale))
+        x, y, width, bar_height = (svg_number(v) for v in rect)
+        body.append(f'<rect x="{x}" y="{y}" width="{width}" height="{bar_height}" fill="{color}" '
+                    f'fill-opacity="0.9" stroke="{SVG_EDGE_COLOR}">{tooltip}</rect>')
+        if not np.isnan(lows[i]):
+            body.append(svg_error_bar(*whisker, orientation))
+        body.append(value_text)
+        body.append(label_text)
+
+    return svg_document(title, height, body), height
+
+def svg_error_bar(low, high, orientation='h'):
+    """Error bar between two points, with 4px caps like plotly's"""
+    (ax, ay), (bx, by) = low, high
+    if orientation == 'h':
+        caps = [(ax, ay - 4, ax, ay + 4), (bx, by - 4, bx, by + 4)]
+    else:
+        caps = [(ax - 4, ay, ax + 4, ay), (bx - 4, by, bx + 4, by)]
+    path = ' '.join(f'M{svg_number(x1)},{svg_number(y1)} L{svg_number(x2)},{svg_number(y2)}'
+                    for x1, y1, x2, y2 in [(ax, ay, bx, by)] + caps)
+    return f'<path d="{path}" stroke="{ERROR_BAR_COLOR}" stroke-width="1.5" fill="none"/>'
+
+def donut_slice(cx, cy, outer, inner, start, end):
+    """SVG path of a donut slice; angles in radians, clockwise from 12 o'clock"""
+    if end - start >= 2 * math.pi - 1e-9:
+        # A full ring is drawn as two halves (an arc cannot end where it starts)
+        return (donut_slice(cx, cy, outer, inner, start, start + math.pi) + ' '
+                + donut_slice(cx, cy, outer, inner, start + math.pi, end))
+
+    def point(radius, angle):
+        return f"{svg_number(cx + radius * math.sin(angle))},{svg_number(cy - radius * math.cos(angle))}"
+
+    large = 1 if end - start > math.pi else 0
+    return (f'M{point(outer, start)} A{svg_number(outer)},{svg_number(outer)} 0 {large} 1 {point(outer, end)} '
+            f'L{point(inner, end)} A{svg_number(inner)},{svg_number(inner)} 0 {large} 0 {point(inner, start)} Z')
+
+def svg_donut(data, title, scale=1.0, ci=None):
+    """Static SVG version of build_donut_figure (same colors, hole, labels and height)"""
+    fields = donut_fields(data, scale, ci)
+    total = data.sum()
+    margin = fields['margin']
+    height = fields['height']
+
+    # Leave room on both sides for the outside labels
+    cx = SVG_WIDTH / 2
+    cy = margin['t'] + (height - margin['t'] - margin['b']) / 2
+    outer = max(40, min((SVG_WIDTH - 360) / 2, (height - margin['t'] - margin['b']) / 2 - 40))
+    inner = outer * fields['hole']
+
+    body = []
+    start = 0.0
+    for item, count, color in zip(data.index, data.values, fields['colors']):
+        pct = count / total * 100
+        end = start + 2 * math.pi * count / total
+        interval = interval_line(ci, item).replace('<br>', ', ')
+        tooltip = f'<title>{html.escape(str(item))}: {count} ({pct:.1f}%){interval}</title>'
+        body.append(f'<path d="{donut_slice(cx, cy, outer, inner, start, end)}" fill="{color}" '
+                    f'stroke="{SVG_EDGE_COLOR}" stroke-width="2">{tooltip}</path>')
+
+        middle = (start + end) / 2
+        side = math.sin(middle)
+        anchor = 'start' if side > 0.1 else 'end' if side < -0.1 else 'middle'
+        value = f'{pct:.1f}%' if len(data) <= 3 else f'{count} ({pct:.1f}%)'
+        body.append(svg_text(cx + (outer + 16) * side, cy - (outer + 16) * math.cos(middle),
+                             [str(item), value], size=fields['font_size'], anchor=anchor))
+        start = end
+
+    return svg_document(title, height, body), height
+
+def heat_color(fraction):
+    """Color of a heatmap cell at fraction (0-1) of the value range, as rgb()"""
+    for (start, low), (end, high) in zip(HEATMAP_COLORS, HEATMAP_COLORS[1:]):
+        if fraction <= end:
+            t = (fraction - start) / (end - start)
+            low, high = ([int(color[k:k + 2], 16) for k in (1, 3, 5)] for color in (low, high))
+            return 'rgb({},{},{})'.format(*(round(a + (b - a) * t) for a, b in zip(low, high)))
+    return heat_color(1.0)
+
+def svg_heatmap(matrix, title, value_label='Value', decimals=2):
+    """Static SVG version of build_heatmap_figure (same colors, labels and height)"""
+    fields = heatmap_fields(matrix, value_label, decimals)
+    values = fields['z']
+    row_labels = [label.split('<br>') for label in fields['y']]
+    column_labels = [str(label) for label in matrix.columns]
+    n_rows, n_columns = values.shape
+    height = fields['height']
+
+    label_width = max(len(line) for lines in row_labels for line in lines) * 7.5
+    x0, x1 = 28 + label_width, SVG_WIDTH - 100
+    y0, y1 = 80, height - 40 - fields['label_room']
+    cell_width, cell_height = (x1 - x0) / n_columns, (y1 - y0) / n_rows
+    top = max(float(np.nanmax(values)), 1e-12)
+
+    body = []
+    for i, (row, lines) in enumerate(zip(matrix.index, row_labels)):
+        middle = y0 + (i + 0.5) * cell_height
+        body.append(svg_text(x0 - 8, middle, lines, anchor='end', weight='bold'))
+        for j, column in enumerate(matrix.columns):
+            value = values[i, j]
+            if np.isnan(value):
+                continue
+            fraction = min(max(value / top, 0.0), 1.0)
+            x, y = x0 + j * cell_width + 1, y0 + i * cell_height + 1
+            tooltip = f'<title>{html.escape(f"{row} + {column}: {value_label} {value:.{decimals}f}")}</title>'
+            body.append(f'<rect x="{svg_number(x)}" y="{svg_number(y)}" width="{svg_number(cell_width - 2)}" '
+                        f'height="{svg_number(cell_height - 2)}" fill="{heat_color(fraction)}">{tooltip}</rect>')
+            if cell_width >= 30:
+                # Dark text on the light (gold) end of the scale
+                fill = '#1A1A1A' if fraction > 0.75 else '#FFFFFF'
+                body.append(svg_text(x + cell_width / 2 - 1, middle, f'{value:.{decimals}f}', size=11, fill=fill))
+    for j, label in enumerate(column_labels):
+        x = x0 + (j + 0.5) * cell_width
+        body.append(f'<text x="{svg_number(x)}" y="{svg_number(y1 + 12)}" font-size="12" font-weight="bold" '
+                    f'text-anchor="end" fill="{SVG_TEXT_COLOR}" '
+                    f'transform="rotate(-40 {svg_number(x)} {svg_number(y1 + 12)})">{html.escape(label)}</text>')
+
+    # Color bar from 0 (bottom) to the largest value (top)
+    stops = ''.join(f'<stop offset="{svg_number((1 - stop) * 100)}%" stop-color="{color}"/>'
+                    for stop, color in reversed(HEATMAP_COLORS))
+    body.append(f'<defs><linearGradient id="heat" x1="0" y1="0" x2="0" y2="1">{stops}</linearGradient></defs>')
+    body.append(f'<rect x="{x1 + 30}" y="{y0}" width="14" height="{svg_number(y1 - y0)}" fill="url(#heat)"/>')
+    body.append(svg_text(x1 + 37, y0 - 14, value_label, size=13))
+    body.append(svg_text(x1 + 50, y0 + 6, f'{top:.{decimals}f}', anchor='start'))
+    body.append(svg_text(x1 + 50, y1 - 6, '0', anchor='start'))
+
+    return svg_document(title, height, body), height
+
+def write_svg(svg, output_path):
+    """Save a static chart"""
+    with span('write chart', 'write', file=output_path.name):
+        output_path.write_text(svg, encoding='utf-8')
+
+def create_interactive_bar(data, title, output_path, orientation='h', consolidate=False, ci=None):
+    """Create interactive horizontal bar chart with VARIED COLORS
+
+    ci: 'Lower'/'Upper' responses per option (see chart_intervals), drawn as error bars
+    """
+    # Handle empty data
+    if len(data) == 0 or data.sum() == 0:
+        print(f"  ⚠ Skipping {output_path.name} - no data")
+        return
+
+    options = dict(orientation=orientation, consolidate=consolidate)
+    if ci is not None:
+        options['ci'] = interval_hash(ci.reindex(data.index))
+    key = chart_hash('bar', data, title, **options)
+    if skip_unchanged(output_path, key):
+        return
+
+    original = data
+
+    # Shorten labels for better readability
+    data = shorten_labels(data)
+
+    # Consolidate small categories if requested
+    if consolidate:
+        data = consolidate_small_categories(data)
+
+    if ci is not None:
+        ci = labeled_intervals(ci, original, data)
+
+    if 'html' in CHART_FORMATS:
+        with span('plotly figure', 'render'):
+            if FAST_FIGURES:
+                fig = fast_bar_figure(data, title, orientation, ci)
+            else:
+                fig = build_bar_figure(data, title, orientation, ci).to_dict()
+        write_chart(fig, output_path)
+        record_chart(output_path, key, title, fig['layout']['height'])
+
+    if 'svg' in CHART_FORMATS:
+        with span('svg chart', 'render'):
+            svg, height = svg_bar(data, title, orientation, ci)
+        svg_path = output_path.with_suffix('.svg')
+        write_svg(svg, svg_path)
+        record_chart(svg_path, key, title, height)
     print(f"  ✓ {output_path.name}")
 
-def analyze_coffee_hour_poll():
+def create_interactive_donut(data, title, output_path, legend_position='right', consolidate=False, scale=1.0,
+                             ci=None):
+    """Create interactive donut chart with VARIED COLORS
+
+    ci: 'Lower'/'Upper' responses per option (see chart_intervals), shown on hover
+    """
+    # Handle empty data
+    if len(data) == 0 or data.sum() == 0:
+        print(f"  ⚠ Skipping {output_path.name} - no data")
+        return
+
+    options = dict(legend_position=legend_position, consolidate=consolidate, scale=scale)
+    if ci is not None:
+        options['ci'] = interval_hash(ci.reindex(data.index))
+    key = chart_hash('donut', data, title, **options)
+    if skip_unchanged(output_path, key):
+        return
+
+    original = data
+
+    # Shorten labels for better readability
+    data = shorten_labels(data)
+
+    # Consolidate small categories if requested
+    if consolidate:
+        data = consolidate_small_categories(data)
+
+    if ci is not None:
+        ci = labeled_intervals(ci, original, data)
+
+    if 'html' in CHART_FORMATS:
+        with span('plotly figure', 'render'):
+            if FAST_FIGURES:
+                fig = fast_donut_figure(data, title, scale, ci)
+            else:
+                fig = build_donut_figure(data, title, scale, ci).to_dict()
+        write_chart(fig, output_path)
+        record_chart(output_path, key, title, fig['layout']['height'])
+
+    if 'svg' in CHART_FORMATS:
+        with span('svg chart', 'render'):
+            svg, height = svg_donut(data, title, scale, ci)
+        svg_path = output_path.with_suffix('.svg')
+        write_svg(svg, svg_path)
+        record_chart(svg_path, key, title, height)
+    print(f"  ✓ {output_path.name}")
+
+def create_interactive_heatmap(matrix, title, output_path, value_label='Value', decimals=2):
+    """Create interactive heatmap of a DataFrame (rows x columns) in the same dark theme"""
+    # Handle empty data
+    if matrix.size == 0 or not np.nan_to_num(matrix.to_numpy(dtype=float)).any():
+        print(f"  ⚠ Skipping {output_path.name} - no data")
+        return
+
+    # The whole matrix goes into the hash through the options (there is no counts Series)
+    key = chart_hash('heatmap', pd.Series(dtype='int64'), title, value_label=value_label, decimals=decimals,
+                     rows=[str(label) for label in matrix.index],
+                     columns=[str(label) for label in matrix.columns],
+                     values=[[round(float(value), 6) for value in row] for row in matrix.to_numpy()])
+    if skip_unchanged(output_path, key):
+        return
+
+    if 'html' in CHART_FORMATS:
+        with span('plotly figure', 'render'):
+            fig = build_heatmap_figure(matrix, title, value_label, decimals).to_dict()
+        write_chart(fig, output_path)
+        record_chart(output_path, key, title, fig['layout']['height'])
+
+    if 'svg' in CHART_FORMATS:
+        with span('svg chart', 'render'):
+            svg, height = svg_heatmap(matrix, title, value_label, decimals)
+        svg_path = output_path.with_suffix('.svg')
+        write_svg(svg, svg_path)
+        record_chart(svg_path, key, title, height)
+    print(f"  ✓ {output_path.name}")
+
+def create_coffee_hour_charts(results, output_dir='polls/analysis_results/interactive_charts_coffee_hour'):
     """Generate interactive visualizations for coffee hour poll"""
     print("\n" + "="*70)
     print("CREATING INTERACTIVE COFFEE HOUR CHARTS")
     print("="*70)
 
-    df = pd.read_csv('polls/coffee_hour_poll_responses.csv')
-    output_dir = Path('polls/analysis_results/interactive_charts_coffee_hour')
+    output_dir = Path(output_dir)
     output_dir.mkdir(exist_ok=True, parents=True)
 
-    print(f"\nTotal responses: {len(df)}")
+    print(f"\nTotal responses: {results.total}")
     print(f"Output directory: {output_dir}\n")
 
+    intervals = chart_intervals(results)
+
     # 0. Role Demographics - Donut
-    if 'Role' in df.columns:
-        role = df['Role'].value_counts()
+    if results.has('Role'):
+        role = results.get('Role')
         create_interactive_donut(role, 'Respondent Demographics',
-                                output_dir / 'role.html')
+                                output_dir / 'role.html', ci=intervals.get('Role'))
 
     # 1. Preferred Days
-    days = split_multiselect(df, 'Preferred Days')
+    days = results.get('Preferred Days')
     weekday_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
     days = days.reindex([d for d in weekday_order if d in days.index])
     create_interactive_bar(days, 'Preferred Days for Coffee Hour',
-                          output_dir / 'preferred_days.html')
+                          output_dir / 'preferred_days.html', ci=intervals.get('Preferred Days'))
 
     # 2. Start Times - sorted chronologically
-    times = split_multiselect(df, 'Start Time')
+    times = results.get('Start Time')
     # Sort by time order instead of frequency
     time_order = ['9:00 AM', '9:30 AM', '10:00 AM', '10:30 AM', '11:00 AM', '11:30 AM',
                   '2:00 PM', '2:30 PM', '3:00 PM', '3:30 PM', '4:00 PM']
     times = times.reindex([t for t in time_order if t in times.index])
     create_interactive_bar(times, 'Preferred Start Times',
-                          output_dir / 'start_times.html')
+                          output_dir / 'start_times.html', ci=intervals.get('Start Time'))
 
     # 3. Frequency - Donut
-    if 'Frequency' in df.columns:
-        freq = df['Frequency'].value_counts()
+    if results.has('Frequency'):
+        freq = results.get('Frequency')
         create_interactive_donut(freq, 'How Often Should We Meet?',
-                                output_dir / 'frequency.html')
+                                output_dir / 'frequency.html', ci=intervals.get('Frequency'))
 
     # 4. Duration - Donut
-    if 'Duration' in df.columns:
-        duration = df['Duration'].value_counts()
+    if results.has('Duration'):
+        duration = results.get('Duration')
         create_interactive_donut(duration, 'Preferred Duration',
-                                output_dir / 'duration.html')
+                                output_dir / 'duration.html', ci=intervals.get('Duration'))
 
     # 5. Food Preferences
-    food = split_multiselect(df, 'Food Options')
+    food = results.get('Food Options')
     create_interactive_bar(food, 'Food Preferences',
-                          output_dir / 'food.html')
+                          output_dir / 'food.html', ci=intervals.get('Food Options'))
 
     # 6. Coffee Types
-    coffee = split_multiselect(df, 'Coffee Types')
+    coffee = results.get('Coffee Types')
     create_interactive_bar(coffee, 'Coffee Preferences',
-                          output_dir / 'coffee.html')
+                          output_dir / 'coffee.html', ci=intervals.get('Coffee Types'))
 
     # 7. Tea Types
-    tea = split_multiselect(df, 'Tea Types')
+    tea = results.get('Tea Types')
     create_interactive_bar(tea, 'Tea Preferences',
-                          output_dir / 'tea.html')
+                          output_dir / 'tea.html', ci=intervals.get('Tea Types'))
 
     # 8. Location
-    if 'Location Preference' in df.columns:
-        location = df['Location Preference'].value_counts()
+    if results.has('Location Preference'):
+        location = results.get('Location Preference')
         create_interactive_donut(location, 'Preferred Location',
-                                output_dir / 'location.html')
+                                output_dir / 'location.html', ci=intervals.get('Location Preference'))
 
     # 9. Barriers
-    barriers = split_multiselect(df, 'Barriers')
+    barriers = results.get('Barriers')
     create_interactive_bar(barriers, 'Barriers to Attendance',
-                          output_dir / 'barriers.html')
+                          output_dir / 'barriers.html', ci=intervals.get('Barriers'))
 
     print(f"\n✓ Coffee Hour charts saved to {output_dir}/\n")
 
-def analyze_events_poll():
+def create_events_charts(results, output_dir='polls/analysis_results/interactive_charts_events'):
     """Generate interactive visualizations for events poll"""
     print("\n" + "="*70)
     print("CREATING INTERACTIVE EVENTS CHARTS")
     print("="*70)
 
-    df = pd.read_csv('polls/events_poll_responses.csv')
-    output_dir = Path('polls/analysis_results/interactive_charts_events')
+    output_dir = Path(output_dir)
     output_dir.mkdir(exist_ok=True, parents=True)
 
-    print(f"\nTotal responses: {len(df)}")
+    print(f"\nTotal responses: {results.total}")
     print(f"Output directory: {output_dir}\n")
 
+    intervals = chart_intervals(results)
+
     # On-Campus Social Events
-    if 'On-Campus Social Events' in df.columns:
-        events = split_multiselect(df, 'On-Campus Social Events')
+    if results.has('On-Campus Social Events'):
+        events = results.get('On-Campus Social Events')
         create_interactive_bar(events, 'On-Campus Social Events',
-                              output_dir / 'on_campus_social.html')
+                              output_dir / 'on_campus_social.html', ci=intervals.get('On-Campus Social Events'))
 
     # On-Campus Games & Entertainment
-    if 'On-Campus Games & Entertainment' in df.columns:
-        games = split_multiselect(df, 'On-Campus Games & Entertainment')
+    if results.has('On-Campus Games & Entertainment'):
+        games = results.get('On-Campus Games & Entertainment')
         create_interactive_bar(games, 'Games & Entertainment Preferences',
-                              output_dir / 'games_entertainment.html')
+                              output_dir / 'games_entertainment.html', ci=intervals.get('On-Campus Games & Entertainment'))
 
     # Seasonal Celebrations
-    if 'Seasonal Celebrations' in df.columns:
-        seasonal = split_multiselect(df, 'Seasonal Celebrations')
+    if results.has('Seasonal Celebrations'):
+        seasonal = results.get('Seasonal Celebrations')
         create_interactive_bar(seasonal, 'Seasonal Celebrations',
-                              output_dir / 'seasonal.html')
+                              output_dir / 'seasonal.html', ci=intervals.get('Seasonal Celebrations'))
 
     # Outdoor Activities
-    if 'Outdoor Activities' in df.columns:
-        outdoor = split_multiselect(df, 'Outdoor Activities')
+    if results.has('Outdoor Activities'):
+        outdoor = results.get('Outdoor Activities')
         create_interactive_bar(outdoor, 'Outdoor Activities',
-                              output_dir / 'outdoor.html')
+                              output_dir / 'outdoor.html', ci=intervals.get('Outdoor Activities'))
 
     # Day Trips
-    if 'Day Trips' in df.columns:
-        trips = split_multiselect(df, 'Day Trips')
+    if results.has('Day Trips'):
+        trips = results.get('Day Trips')
         create_interactive_bar(trips, 'Day Trip Preferences',
-                              output_dir / 'day_trips.html')
+                              output_dir / 'day_trips.html', ci=intervals.get('Day Trips'))
 
     # Entertainment Outings
-    if 'Entertainment Outings' in df.columns:
-        entertainment = split_multiselect(df, 'Entertainment Outings')
+    if results.has('Entertainment Outings'):
+        entertainment = results.get('Entertainment Outings')
         create_interactive_bar(entertainment, 'Entertainment Outings',
-                              output_dir / 'entertainment_outings.html')
+                              output_dir / 'entertainment_outings.html', ci=intervals.get('Entertainment Outings'))
 
     # Event Frequency
-    if 'Event Frequency' in df.columns:
-        freq = df['Event Frequency'].value_counts()
+    if results.has('Event Frequency'):
+        freq = results.get('Event Frequency')
         create_interactive_donut(freq, 'Preferred Event Frequency',
-                                output_dir / 'frequency.html')
+                                output_dir / 'frequency.html', ci=intervals.get('Event Frequency'))
 
     # Availability Times
-    if 'Availability Times' in df.columns:
-        times = split_multiselect(df, 'Availability Times')
+    if results.has('Availability Times'):
+        times = results.get('Availability Times')
         create_interactive_bar(times, 'Best Times for Events',
-                              output_dir / 'availability_times.html')
+                              output_dir / 'availability_times.html', ci=intervals.get('Availability Times'))
 
     # Main Barriers
-    if 'Main Barriers' in df.columns:
-        barriers = split_multiselect(df, 'Main Barriers')
+    if results.has('Main Barriers'):
+        barriers = results.get('Main Barriers')
         create_interactive_bar(barriers, 'Main Barriers to Attendance',
-                              output_dir / 'barriers.html')
+                              output_dir / 'barriers.html', ci=intervals.get('Main Barriers'))
 
     # Event Budget
-    if 'Event Budget' in df.columns:
-        budget = df['Event Budget'].value_counts()
+    if results.has('Event Budget'):
+        budget = results.get('Event Budget')
         create_interactive_donut(budget, 'Event Budget Preferences',
-                                output_dir / 'budget.html')
+                                output_dir / 'budget.html', ci=intervals.get('Event Budget'))
 
     # Participation Level - with consolidation
-    if 'Participation Level' in df.columns:
-        participation = df['Participation Level'].value_counts()
+    if results.has('Participation Level'):
+        participation = results.get('Participation Level')
         create_interactive_donut(participation, 'Participation Level',
-                                output_dir / 'participation.html', consolidate=True)
+                                output_dir / 'participation.html', consolidate=True, ci=intervals.get('Participation Level'))
 
     print(f"\n✓ Events charts saved to {output_dir}/\n")
 
-def analyze_3d_merch_poll():
+def create_3d_merch_charts(results, output_dir='polls/analysis_results/interactive_charts_3d_merch'):
     """Generate interactive visualizations for 3D merch poll"""
     print("\n" + "="*70)
     print("CREATING INTERACTIVE 3D MERCH CHARTS")
     print("="*70)
 
-    df = pd.read_csv('polls/3d_merch_poll_responses.csv')
-    output_dir = Path('polls/analysis_results/interactive_charts_3d_merch')
+    output_dir = Path(output_dir)
     output_dir.mkdir(exist_ok=True, parents=True)
 
-    print(f"\nTotal responses: {len(df)}")
+    print(f"\nTotal responses: {results.total}")
     print(f"Output directory: {output_dir}\n")
 
+    intervals = chart_intervals(results)
+
     # Purchase interest - smaller size
-    if 'Purchase Interest' in df.columns:
-        interest = df['Purchase Interest'].value_counts()
+    if results.has('Purchase Interest'):
+        interest = results.get('Purchase Interest')
         create_interactive_donut(interest, 'Purchase Interest Level',
-                                output_dir / 'purchase_interest.html', scale=0.8)
+                                output_dir / 'purchase_interest.html', scale=0.8, ci=intervals.get('Purchase Interest'))
 
     # Keychain Products
-    if 'Keychain Products' in df.columns:
-        keychain = split_multiselect(df, 'Keychain Products')
+    if results.has('Keychain Products'):
+        keychain = results.get('Keychain Products')
         create_interactive_bar(keychain, 'Keychain Product Preferences',
-                              output_dir / 'keychain_products.html')
+                              output_dir / 'keychain_products.html', ci=intervals.get('Keychain Products'))
 
     # Decorative Products
-    if 'Decorative Products' in df.columns:
-        decorative = split_multiselect(df, 'Decorative Products')
+    if results.has('Decorative Products'):
+        decorative = results.get('Decorative Products')
         create_interactive_bar(decorative, 'Decorative Product Preferences',
-                              output_dir / 'decorative_products.html')
+                              output_dir / 'decorative_products.html', ci=intervals.get('Decorative Products'))
 
     # Functional Products
-    if 'Functional Products' in df.columns:
-        functional = split_multiselect(df, 'Functional Products')
+    if results.has('Functional Products'):
+        functional = results.get('Functional Products')
         create_interactive_bar(functional, 'Functional Product Preferences',
-                              output_dir / 'functional_products.html')
+                              output_dir / 'functional_products.html', ci=intervals.get('Functional Products'))
 
     # Favorite insects
-    if 'Favorite Insects' in df.columns:
-        insects = split_multiselect(df, 'Favorite Insects')
+    if results.has('Favorite Insects'):
+        insects = results.get('Favorite Insects')
         create_interactive_bar(insects, 'Favorite Insects to Feature',
-                              output_dir / 'insects.html')
+                              output_dir / 'insects.html', ci=intervals.get('Favorite Insects'))
 
     # Design style - smaller size
-    if 'Design Style' in df.columns:
-        style = df['Design Style'].value_counts()
+    if results.has('Design Style'):
+        style = results.get('Design Style')
         create_interactive_donut(style, 'Design Style Preferences',
-                                output_dir / 'design_style.html', scale=0.8)
+                                output_dir / 'design_style.html', scale=0.8, ci=intervals.get('Design Style'))
 
     # Printing Method - smaller size
-    if 'Printing Method' in df.columns:
-        printing = df['Printing Method'].value_counts()
+    if results.has('Printing Method'):
+        printing = results.get('Printing Method')
         create_interactive_donut(printing, 'Printing Method Preferences',
-                                output_dir / 'printing_method.html', scale=0.8)
+                                output_dir / 'printing_method.html', scale=0.8, ci=intervals.get('Printing Method'))
 
     # Color Preference - smaller size
-    if 'Color Preference' in df.columns:
-        color = df['Color Preference'].value_counts()
+    if results.has('Color Preference'):
+        color = results.get('Color Preference')
         create_interactive_donut(color, 'Color Preferences',
-                                output_dir / 'color_preference.html', scale=0.8)
+                                output_dir / 'color_preference.html', scale=0.8, ci=intervals.get('Color Preference'))
 
     # Size Preference - smaller size
-    if 'Size Preference' in df.columns:
-        size = df['Size Preference'].value_counts()
+    if results.has('Size Preference'):
+        size = results.get('Size Preference')
         create_interactive_donut(size, 'Size Preferences',
-                                output_dir / 'size_preference.html', scale=0.8)
+                                output_dir / 'size_preference.html', scale=0.8, ci=intervals.get('Size Preference'))
 
     # Price range - small items - smaller size
-    if 'Price Small Items' in df.columns:
-        price_small = df['Price Small Items'].value_counts()
+    if results.has('Price Small Items'):
+        price_small = results.get('Price Small Items')
         create_interactive_donut(price_small, 'Price Range - Small Items',
-                                output_dir / 'price_small.html', scale=0.8)
+                                output_dir / 'price_small.html', scale=0.8, ci=intervals.get('Price Small Items'))
 
     # Price range - large items - smaller size
-    if 'Price Large Items' in df.columns:
-        price_large = df['Price Large Items'].value_counts()
+    if results.has('Price Large Items'):
+        price_large = results.get('Price Large Items')
         create_interactive_donut(price_large, 'Price Range - Large Items',
-                                output_dir / 'price_large.html', scale=0.8)
+                                output_dir / 'price_large.html', scale=0.8, ci=intervals.get('Price Large Items'))
 
     print(f"\n✓ 3D Merch charts saved to {output_dir}/\n")
 
+def analyze_coffee_hour_poll():
+    """Generate interactive visualizations for coffee hour poll"""
+    create_coffee_hour_charts(load_poll_results('coffee_hour'))
+
+def analyze_events_poll():
+    """Generate interactive visualizations for events poll"""
+    create_events_charts(load_poll_results('events'))
+
+def analyze_3d_merch_poll():
+    """Generate interactive visualizations for 3D merch poll"""
+    create_3d_merch_charts(load_poll_results('3d_merch'))
+
+def benchmark_figures(rounds=5):
+    """Time plotly.graph_objects against the fast figure path on every counted column
+
+    Each column is drawn as a horizontal bar, a vertical bar and a donut both
+    ways (with its confidence intervals), and the chart pages are checked to be
+    byte-identical.
+    """
+    import time
+
+    charts = []
+    for poll in ('coffee_hour', 'events', '3d_merch'):
+        results = load_poll_results(poll)
+        intervals = chart_intervals(results)
+        for column, data in results.counts.items():
+            data = data[data > 0]
+            ci = intervals[column].reindex(data.index) if column in intervals else None
+            if len(data):
+                charts += [(build_bar_figure, fast_bar_figure, data, column, 'h', ci),
+                           (build_bar_figure, fast_bar_figure, data, column, 'v', ci),
+                           (build_donut_figure, fast_donut_figure, data, column, 1.0, ci)]
+
+    page = Path('polls/analysis_results/benchmark/chart.html')
+    for build, fast, data, title, option, ci in charts:
+        validated = chart_html(build(data, title, option, ci).to_dict(), page)
+        if chart_html(fast(data, title, option, ci), page) != validated:
+            raise AssertionError(f"{fast.__name__} differs from {build.__name__} for {title!r}")
+
+    def timed(make_figure):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for build, fast, data, title, option, ci in charts:
+                chart_html(make_figure(build, fast)(data, title, option, ci), page)
+        return (time.perf_counter() - start) / (rounds * len(charts)) * 1000
+
+    validated_ms = timed(lambda build, fast: lambda *args: build(*args).to_dict())
+    fast_ms = timed(lambda build, fast: fast)
+    print(f"{len(charts)} charts, identical output, mean per chart page over {rounds} rounds:")
+    print(f"  plotly.graph_objects  {validated_ms:7.2f} ms")
+    print(f"  fast figures          {fast_ms:7.2f} ms  ({validated_ms / fast_ms:.1f}x faster, "
+          f"{validated_ms - fast_ms:.2f} ms saved per chart)")
+
 def main():
+    global PLOTLYJS_MODE, FORCE_REBUILD, FAST_FIGURES, CHART_FORMATS, CI_RESAMPLES, CI_SEED
+    parser = argparse.ArgumentParser(description="Create the interactive Plotly charts for every poll")
+    parser.add_argument('--inline-plotlyjs', action='store_true',
+                        help="embed plotly.js in every chart page (about 3.6 MB each)")
+    parser.add_argument('--force', action='store_true',
+                        help="rebuild every chart even if its data has not changed")
+    parser.add_argument('--validate-figures', action='store_true',
+                        help="build every figure through plotly.graph_objects (slower, same output)")
+    parser.add_argument('--benchmark-figures', action='store_true',
+                        help="compare figure building speed on the current results and exit")
+    parser.add_argument('--resamples', type=int, default=RESAMPLES,
+                        help=f"bootstrap resamples behind the confidence intervals (default {RESAMPLES}, 0 for none)")
+    parser.add_argument('--seed', type=int, default=SEED, help="seed of the bootstrap resamples")
+    formats = parser.add_mutually_exclusive_group()
+    formats.add_argument('--svg-only', action='store_true',
+                         help="only write the static SVG charts (plotly not needed)")
+    formats.add_argument('--no-svg', action='store_true',
+                         help="only write the Plotly chart pages")
+    args = parser.parse_args()
+    if args.svg_only:
+        CHART_FORMATS = ('svg',)
+    elif args.no_svg:
+        CHART_FORMATS = ('html',)
+    if 'html' in CHART_FORMATS and plotly is None:
+        parser.error("plotly is not installed; run with --svg-only or pip install plotly")
+    if args.inline_plotlyjs:
+        PLOTLYJS_MODE = 'inline'
+    FORCE_REBUILD = args.force
+    FAST_FIGURES = not args.validate_figures
+    CI_RESAMPLES = args.resamples
+    CI_SEED = args.seed
+
+    if args.benchmark_figures:
+        benchmark_figures()
+        return
+
     analyze_coffee_hour_poll()
     analyze_events_poll()
     analyze_3d_merch_poll()
@@ -2,35 +2,32 @@
 """
 Create improved poll visualizations with transparent backgrounds,
 N + % labels, and modern styling
+Draws from the same PollResults as the other chart scripts; poll_pipeline.py
+calls it with the results it already loaded.
+
+Run from the repository root:
+    python polls/create_better_visualizations.py
 """
 
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
-import numpy as np
 
-# Set modern style
-plt.style.use('seaborn-v0_8-darkgrid')
-sns.set_palette("husl")
+from chart_renderer import chart_figure, save_chart
+from poll_loader import load_poll_results
+
+# Modern style, only applied while these charts are drawn so the other PNG
+# charts of the same run keep theirs
+STYLE = 'seaborn-v0_8-darkgrid'
+PALETTE = 'husl'
+
+OUTPUT_DIR = 'polls/analysis_results/improved_charts_coffee_hour'
 
 # UCR Colors
 UCR_BLUE = '#003DA5'
 UCR_GOLD = '#FFC947'
 COLORS = ['#003DA5', '#4A90E2', '#6BA3F5', '#FFC947', '#FFD700']
 
-def split_multiselect(df, column):
-    """Split comma-separated values and count"""
-    if column not in df.columns:
-        return pd.Series()
-
-    all_items = []
-    for value in df[column].dropna():
-        items = [item.strip() for item in str(value).split(',')]
-        all_items.extend(items)
-
-    return pd.Series(all_items).value_counts()
-
 def create_horizontal_bar_with_labels(data, title, output_path, top_n=None):
     """Create horizontal bar chart with N + % labels"""
     total = data.sum()
@@ -39,7 +36,7 @@ def create_horizontal_bar_with_labels(data, title, output_path, top_n=None):
         data = data.head(top_n)
 
     # Create figure with transparent background
-    fig, ax = plt.subplots(figsize=(12, max(6, len(data) * 0.4)))
+    fig, ax = chart_figure((12, max(6, len(data) * 0.4)))
     fig.patch.set_alpha(0.0)
     ax.patch.set_alpha(0.0)
 
@@ -62,14 +59,12 @@ def create_horizontal_bar_with_labels(data, title, output_path, top_n=None):
     ax.spines['right'].set_visible(False)
     ax.grid(axis='x', alpha=0.3, linestyle='--')
 
-    plt.tight_layout()
-    plt.savefig(output_path, dpi=300, bbox_inches='tight', transparent=True)
-    plt.close()
-    print(f"  ✓ {output_path.name}")
+    saved = save_chart(fig, output_path, transparent=True)
+    print(f"  ✓ {saved.name}")
 
 def create_donut_chart(data, title, output_path):
     """Create modern donut chart with N + %"""
-    fig, ax = plt.subplots(figsize=(10, 8))
+    fig, ax = chart_figure((10, 8))
     fig.patch.set_alpha(0.0)
     ax.patch.set_alpha(0.0)
 
@@ -86,17 +81,15 @@ def create_donut_chart(data, title, output_path):
 
     ax.set_title(title, fontsize=14, fontweight='bold', pad=20)
 
-    plt.tight_layout()
-    plt.savefig(output_path, dpi=300, bbox_inches='tight', transparent=True)
-    plt.close()
-    print(f"  ✓ {output_path.name}")
+    saved = save_chart(fig, output_path, transparent=True)
+    print(f"  ✓ {saved.name}")
 
 def create_lollipop_chart(data, title, output_path, top_n=10):
     """Create modern lollipop chart"""
     data = data.head(top_n)
     total = data.sum()
 
-    fig, ax = plt.subplots(figsize=(12, max(6, len(data) * 0.5)))
+    fig, ax = chart_figure((12, max(6, len(data) * 0.5)))
     fig.patch.set_alpha(0.0)
     ax.patch.set_alpha(0.0)
 
@@ -119,74 +112,75 @@ def create_lollipop_chart(data, title, output_path, top_n=10):
     ax.set_xlabel('Number of Responses', fontsize=12, fontweight='bold')
     ax.set_title(title, fontsize=14, fontweight='bold', pad=20)
     ax.spines['top'].set_visible(False)
-    ax.spines='right'].set_visible(False)
+    ax.spines['right'].set_visible(False)
     ax.grid(axis='x', alpha=0.3, linestyle='--')
 
-    plt.tight_layout()
-    plt.savefig(output_path, dpi=300, bbox_inches='tight', transparent=True)
-    plt.close()
-    print(f"  ✓ {output_path.name}")
+    saved = save_chart(fig, output_path, transparent=True)
+    print(f"  ✓ {saved.name}")
 
-def analyze_coffee_hour_poll():
+def analyze_coffee_hour_poll(results, output_dir=OUTPUT_DIR):
     """Generate improved visualizations for coffee hour poll"""
     print("\n" + "="*70)
     print("CREATING IMPROVED COFFEE HOUR VISUALIZATIONS")
     print("="*70)
 
-    df = pd.read_csv('polls/coffee_hour_poll_responses.csv')
-    output_dir = Path('polls/analysis_results/improved_charts_coffee_hour')
+    output_dir = Path(output_dir)
     output_dir.mkdir(exist_ok=True, parents=True)
 
-    print(f"\nTotal responses: {len(df)}\n")
+    print(f"\nTotal responses: {results.total}\n")
+
+    with plt.style.context(STYLE), sns.color_palette(PALETTE):
+        create_coffee_hour_charts(results, output_dir)
+
+    print(f"\n✓ Charts saved to {output_dir}/\n")
 
+def create_coffee_hour_charts(results, output_dir):
     # 1. Preferred Days - Horizontal bar
-    days = split_multiselect(df, 'Preferred Days')
+    days = results.get('Preferred Days')
     weekday_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
     days = days.reindex([d for d in weekday_order if d in days.index])
     create_horizontal_bar_with_labels(days, 'Preferred Days for Coffee Hour',
                                        output_dir / 'preferred_days.png')
 
     # 2. Start Times - Lollipop chart
-    times = split_multiselect(df, 'Start Time')
+    times = results.get('Start Time')
     create_lollipop_chart(times, 'Preferred Start Times',
                           output_dir / 'start_times.png')
 
     # 3. Frequency - Donut chart
-    if 'Frequency' in df.columns:
-        freq = df['Frequency'].value_counts()
+    if results.has('Frequency'):
+        freq = results.get('Frequency')
         create_donut_chart(freq, 'Preferred Frequency',
                           output_dir / 'frequency.png')
 
     # 4. Duration - Donut chart
-    if 'Duration' in df.columns:
-        duration = df['Duration'].value_counts()
+    if results.has('Duration'):
+        duration = results.get('Duration')
         create_donut_chart(duration, 'Preferred Duration',
                           output_dir / 'duration.png')
 
     # 5. Food Preferences - Horizontal bar
-    food = split_multiselect(df, 'Food Options')
+    food = results.get('Food Options')
     create_horizontal_bar_with_labels(food, 'Food Preferences',
                                        output_dir / 'food.png')
 
     # 6. Beverages - Side by side
-    coffee = split_multiselect(df, 'Coffee Types')
+    coffee = results.get('Coffee Types')
     create_horizontal_bar_with_labels(coffee.head(6), 'Coffee Preferences',
                                        output_dir / 'coffee.png', top_n=6)
 
-    tea = split_multiselect(df, 'Tea Types')
+    tea = results.get('Tea Types')
     create_horizontal_bar_with_labels(tea.head(6), 'Tea Preferences',
                                        output_dir / 'tea.png', top_n=6)
 
     # 7. Location - Donut
-    if 'Location Preference' in df.columns:
-        location = df['Location Preference'].value_counts()
+    if results.has('Location Preference'):
+        location = results.get('Location Preference')
         create_donut_chart(location, 'Location Preferences',
                           output_dir / 'location.png')
 
-    print(f"\n✓ Charts saved to {output_dir}/\n")
-
 def main():
-    analyze_coffee_hour_poll()
+    analyze_coffee_hour_poll(load_poll_results('coffee_hour'))
 
 if __name__ == "__main__":
     main()
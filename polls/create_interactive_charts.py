@@ -4,28 +4,16 @@ Create interactive Plotly visualizations for poll results
 These can be embedded directly in the website HTML
 """
 
-import pandas as pd
 import plotly.graph_objects as go
-import plotly.express as px
 from pathlib import Path
 
+from poll_loader import load_poll_results
+
 # UCR Colors
 UCR_BLUE = '#003DA5'
 UCR_GOLD = '#FFC947'
 UCR_COLORS = ['#003DA5', '#4A90E2', '#6BA3F5', '#FFC947', '#FFD700', '#F4D03F']
 
-def split_multiselect(df, column):
-    """Split comma-separated values and count"""
-    if column not in df.columns:
-        return pd.Series()
-
-    all_items = []
-    for value in df[column].dropna():
-        items = [item.strip() for item in str(value).split(',')]
-        all_items.extend(items)
-
-    return pd.Series(all_items).value_counts()
-
 def create_interactive_bar(data, title, output_path, orientation='h'):
     """Create interactive horizontal bar chart with hover info"""
     total = data.sum()
@@ -108,66 +96,65 @@ def create_interactive_donut(data, title, output_path):
     fig.write_html(output_path, config={'displayModeBar': False})
     print(f"  ✓ {output_path.name}")
 
-def analyze_coffee_hour_poll():
+def analyze_coffee_hour_poll(results):
     """Generate interactive visualizations for coffee hour poll"""
     print("\n" + "="*70)
     print("CREATING INTERACTIVE COFFEE HOUR CHARTS (Plotly)")
     print("="*70)
 
-    df = pd.read_csv('polls/coffee_hour_poll_responses.csv')
     output_dir = Path('polls/analysis_results/interactive_charts_coffee_hour')
     output_dir.mkdir(exist_ok=True, parents=True)
 
-    print(f"\nTotal responses: {len(df)}")
+    print(f"\nTotal responses: {results.total}")
     print(f"Output directory: {output_dir}\n")
 
     # 1. Preferred Days
-    days = split_multiselect(df, 'Preferred Days')
+    days = results.get('Preferred Days')
     weekday_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
     days = days.reindex([d for d in weekday_order if d in days.index])
     create_interactive_bar(days, 'Preferred Days for Coffee Hour',
                           output_dir / 'preferred_days.html')
 
     # 2. Start Times
-    times = split_multiselect(df, 'Start Time')
+    times = results.get('Start Time')
     create_interactive_bar(times.head(10), 'Top 10 Preferred Start Times',
                           output_dir / 'start_times.html')
 
     # 3. Frequency - Donut
-    if 'Frequency' in df.columns:
-        freq = df['Frequency'].value_counts()
+    if results.has('Frequency'):
+        freq = results.get('Frequency')
         create_interactive_donut(freq, 'How Often Should We Meet?',
                                 output_dir / 'frequency.html')
 
     # 4. Duration - Donut
-    if 'Duration' in df.columns:
-        duration = df['Duration'].value_counts()
+    if results.has('Duration'):
+        duration = results.get('Duration')
         create_interactive_donut(duration, 'Preferred Duration',
                                 output_dir / 'duration.html')
 
     # 5. Food Preferences
-    food = split_multiselect(df, 'Food Options')
+    food = results.get('Food Options')
     create_interactive_bar(food, 'Food Preferences',
                           output_dir / 'food.html')
 
     # 6. Coffee Types
-    coffee = split_multiselect(df, 'Coffee Types')
+    coffee = results.get('Coffee Types')
     create_interactive_bar(coffee, 'Coffee Preferences',
                           output_dir / 'coffee.html')
 
     # 7. Tea Types
-    tea = split_multiselect(df, 'Tea Types')
+    tea = results.get('Tea Types')
     create_interactive_bar(tea, 'Tea Preferences',
                           output_dir / 'tea.html')
 
     # 8. Location
-    if 'Location Preference' in df.columns:
-        location = df['Location Preference'].value_counts()
+    if results.has('Location Preference'):
+        location = results.get('Location Preference')
         create_interactive_donut(location, 'Preferred Location',
                                 output_dir / 'location.html')
 
     # 9. Barriers
-    barriers = split_multiselect(df, 'Barriers')
+    barriers = results.get('Barriers')
     create_interactive_bar(barriers, 'Barriers to Attendance',
                           output_dir / 'barriers.html')
 
@@ -175,7 +162,7 @@ def analyze_coffee_hour_poll():
     print("These HTML files can be embedded in your website using <iframe>")
 
 def main():
-    analyze_coffee_hour_poll()
+    analyze_coffee_hour_poll(load_poll_results('coffee_hour'))
 
 if __name__ == "__main__":
     main()
@@ -11,6 +11,8 @@ from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 
+from poll_trace import span
+
 # OAuth credentials for UCR Entomology Social Committee project
 # Project ID: ucr-ento-social
 # Client ID: 669189357521-bsceob8p9koi5snd4v9lkdk038tl88vm.apps.googleusercontent.com
@@ -20,6 +22,13 @@ CREDENTIALS_FILE = "polls/credentials.json"
 TOKEN_FILE = "polls/token_sheets.json"
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets.readonly']
 
+# Sheet mappings: (sheet_id, output_filename)
+SHEETS = {
+    "Coffee Hours Poll": ("1tk7wZq2Dtn1hiqdS1e4_s6QELMp0GjZZskl9n4XrnHc", "coffee_hour_poll_responses.csv"),
+    "Events Poll": ("155M7Lwj5cehBWV0_qSamorFlA53l3psgXwB5WbnOgxU", "events_poll_responses.csv"),
+    "3D Print Poll": ("1JnP38azOm1ipd5aJ1qaXKz_-6ea7T9KoPYXXoEkHfb0", "3d_merch_poll_responses.csv")
+}
+
 def authenticate_sheets():
     """Authenticate with Google Sheets API using existing OAuth credentials"""
     creds = None
@@ -43,7 +52,8 @@ def download_sheet_to_csv(sheet_id, output_path):
 
         # Get all data from the sheet
         sheet = service.spreadsheets()
-        result = sheet.values().get(spreadsheetId=sheet_id, range='A:Z').execute()
+        with span('download sheet', 'download', file=Path(output_path).name):
+            result = sheet.values().get(spreadsheetId=sheet_id, range='A:Z').execute()
         values = result.get('values', [])
 
         if not values:
@@ -51,7 +61,8 @@ def download_sheet_to_csv(sheet_id, output_path):
             return False
 
         # Write to CSV
-        with open(output_path, 'w', newline='', encoding='utf-8') as f:
+        with span('write csv', 'write', rows=len(values)), \
+                open(output_path, 'w', newline='', encoding='utf-8') as f:
             writer = csv.writer(f)
             writer.writerows(values)
 
@@ -65,13 +76,6 @@ def download_sheet_to_csv(sheet_id, output_path):
 def main():
     polls_dir = Path("/Users/lucianocosme/Projects/ucr-ento-social/polls")
 
-    # Sheet mappings: (sheet_id, output_filename)
-    sheets = {
-        "Coffee Hours Poll": ("1tk7wZq2Dtn1hiqdS1e4_s6QELMp0GjZZskl9n4XrnHc", "coffee_hour_poll_responses.csv"),
-        "Events Poll": ("155M7Lwj5cehBWV0_qSamorFlA53l3psgXwB5WbnOgxU", "events_poll_responses.csv"),
-        "3D Print Poll": ("1JnP38azOm1ipd5aJ1qaXKz_-6ea7T9KoPYXXoEkHfb0", "3d_merch_poll_responses.csv")
-    }
-
     print("="*70)
     print("DOWNLOADING GOOGLE SHEETS TO CSV")
     print("="*70)
@@ -80,7 +84,7 @@ def main():
     success_count = 0
     fail_count = 0
 
-    for poll_name, (sheet_id, output_csv) in sheets.items():
+    for poll_name, (sheet_id, output_csv) in SHEETS.items():
         print(f"Processing: {poll_name}")
         output_path = polls_dir / output_csv
 
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the poll analysis and chart stages
+Runs each stage on synthetic response sets of 1k, 100k and 1M rows for every
+poll and records its wall time, peak memory and the size of what it wrote:
+
+    load_data               parse the CSV (no cache) and count every question
+    split_multiselect       split and count every multi-select column from the loaded rows
+    export_summary_csv      write the summary CSV
+    create_visualizations   draw the matplotlib charts
+    create_interactive_bar  write the Plotly page and SVG of every multi-select column
+
+Synthetic sets come from poll_synthetic.py (default, seeded distributions, so
+no real responses are needed) and are written once to
+polls/.poll_cache/benchmark/ and reused.
+Wall time is the best of a few runs (one run for 100k rows and up); peak memory
+is measured in a separate run with tracemalloc, so it counts Python and NumPy
+allocations.
+
+Results are JSON files; compare a new run against a baseline to flag
+regressions. --compare without a file uses polls/benchmarks/baseline.json and,
+if there is none yet, saves the run there as the baseline. Timings only mean
+something on the machine that measured them, so the baseline is not in git.
+
+Run from the repository root:
+    python polls/poll_benchmark.py run --compare         # first run records the baseline
+    python polls/poll_benchmark.py run --sizes 1000 100000 --polls events
+    python polls/poll_benchmark.py run --save polls/benchmarks/baseline.json
+    python polls/poll_benchmark.py compare polls/benchmarks/baseline.json new.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import shutil
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from poll_counts import split_multiselect
+from poll_loader import CACHE_DIR_NAME, cache_dir_for
+from poll_schema import POLLS, POLLS_DIR, load_schema
+from poll_synthetic import write_synthetic_csv
+
+BENCHMARK_DIR = POLLS_DIR / CACHE_DIR_NAME / 'benchmark'
+BASELINE_PATH = POLLS_DIR / 'benchmarks' / 'baseline.json'
+
+# Bump when poll_synthetic.py changes what it generates
+GENERATOR_VERSION = 1
+
+SIZES = (1_000, 100_000, 1_000_000)
+STAGES = ('load_data', 'split_multiselect', 'export_summary_csv',
+          'create_visualizations', 'create_interactive_bar')
+
+# Slowdowns / growth beyond these fractions are reported as regressions
+TIME_TOLERANCE = 0.25
+MEMORY_TOLERANCE = 0.10
+OUTPUT_TOLERANCE = 0.10
+
+# Seconds and MB below which a change is noise, not a regression
+MIN_SECONDS = 0.05
+MIN_MB = 1.0
+
+
+def synthetic_csv(poll, rows, seed=0):
+    """Synthetic response CSV with `rows` rows for a poll, generated once and reused"""
+    path = BENCHMARK_DIR / f'{poll}_{rows}_seed{seed}_v{GENERATOR_VERSION}.csv'
+    if not path.exists():
+        tmp_path = write_synthetic_csv(poll, rows, path.with_suffix('.tmp'), seed)
+        tmp_path.replace(path)
+    return path
+
+
+def output_bytes(path):
+    """Size of a file, or of every file under a folder"""
+    path = Path(path)
+    if path.is_dir():
+        return sum(f.stat().st_size for f in path.rglob('*') if f.is_file())
+    return path.stat().st_size if path.exists() else 0
+
+
+class Stages:
+    """The benchmarked stages of one poll, each returning the path it wrote (or None)"""
+
+    def __init__(self, poll, csv_file, out_dir):
+        import analyze_3d_merch_poll
+        import analyze_coffee_hour_poll
+        import analyze_events_poll
+        self.report = {'coffee_hour': analyze_coffee_hour_poll, 'events': analyze_events_poll,
+                       '3d_merch': analyze_3d_merch_poll}[poll]
+        self.poll = poll
+        self.schema = load_schema(poll)
+        self.csv_file = csv_file
+        self.out_dir = out_dir
+        self.results = None
+
+    def load_data(self):
+        # Always a cold parse; the cache it writes is the stage's output
+        shutil.rmtree(cache_dir_for(self.csv_file), ignore_errors=True)
+        self.results = self.report.load_data(self.csv_file)
+        return cache_dir_for(self.csv_file)
+
+    def split_multiselect(self):
+        df = self.results.df
+        for col in self.schema.multiselect:
+            split_multiselect(df, col, self.schema.options.get(col))
+
+    def export_summary_csv(self):
+        path = self.out_dir / 'summary.csv'
+        self.report.export_summary_csv(self.results, output_file=str(path))
+        return path
+
+    def create_visualizations(self):
+        path = self.out_dir / 'charts'
+        self.report.create_visualizations(self.results, output_dir=str(path))
+        return path
+
+    def create_interactive_bar(self):
+        import create_all_interactive_charts as charts
+        charts.FORCE_REBUILD = True
+        path = self.out_dir / 'interactive'
+        path.mkdir(parents=True, exist_ok=True)
+        for i, col in enumerate(self.schema.multiselect):
+            if self.results.has(col):
+                charts.create_interactive_bar(self.results.get(col), col, path / f'bar_{i}.html')
+        return path
+
+
+def run_stage(stage, repeat):
+    """(best wall seconds, peak traced MB, output bytes) of a stage; its prints are discarded"""
+    best = None
+    output = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            output = stage()
+            seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            stage()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak / 1e6, output_bytes(output) if output else 0
+
+
+def run_benchmarks(polls, sizes, stages, seed=0):
+    """Benchmark results keyed 'poll/rows/stage'"""
+    results = {}
+    for poll in polls:
+        for rows in sizes:
+            print(f"\n{POLLS[poll]['title']}, {rows:,} rows")
+            csv_file = synthetic_csv(poll, rows, seed)
+            out_dir = BENCHMARK_DIR / 'out' / f'{poll}_{rows}'
+            shutil.rmtree(out_dir, ignore_errors=True)
+            out_dir.mkdir(parents=True)
+            bench = Stages(poll, csv_file, out_dir)
+            if 'load_data' not in stages:
+                # Later stages need loaded results
+                with contextlib.redirect_stdout(io.StringIO()):
+                    bench.load_data()
+
+            repeat = max(1, min(3, 100_000 // rows))
+            for name in stages:
+                seconds, peak_mb, size = run_stage(getattr(bench, name), repeat)
+                results[f'{poll}/{rows}/{name}'] = {
+                    'seconds': round(seconds, 4),
+                    'peak_mb': round(peak_mb, 2),
+                    'output_bytes': size,
+                }
+                print(f"  {name:<24} {seconds:>9.3f}s {peak_mb:>9.1f} MB {size / 1e6:>9.2f} MB out")
+    return results
+
+
+def environment():
+    return {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+    }
+
+
+def read_results(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_results(path, results):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'environment': environment(), 'results': results}, f, indent=2, sort_keys=True)
+        f.write('\n')
+    print(f"\n✓ Results saved to '{path}'")
+
+
+def compare(baseline, current):
+    """Print every benchmark both runs have, flag regressions and return how many there were"""
+    base, new = baseline['results'], current['results']
+    shared = [key for key in new if key in base]
+    regressions = 0
+
+    print(f"\n{'Benchmark':<44} {'Time':>17} {'Peak memory':>19} {'Output':>9}")
+    for key in shared:
+        b, n = base[key], new[key]
+        flags = []
+        if (n['seconds'] > b['seconds'] * (1 + TIME_TOLERANCE)
+                and n['seconds'] - b['seconds'] > MIN_SECONDS):
+            flags.append('time')
+        if (n['peak_mb'] > b['peak_mb'] * (1 + MEMORY_TOLERANCE)
+                and n['peak_mb'] - b['peak_mb'] > MIN_MB):
+            flags.append('memory')
+        if n['output_bytes'] > b['output_bytes'] * (1 + OUTPUT_TOLERANCE):
+            flags.append('output')
+        regressions += bool(flags)
+        print(f"{key:<44} {b['seconds']:>7.3f}→{n['seconds']:<7.3f}s "
+              f"{b['peak_mb']:>8.1f}→{n['peak_mb']:<8.1f} {ratio(n['output_bytes'], b['output_bytes']):>9}"
+              f"{'  ✗ ' + ', '.join(flags) if flags else ''}")
+
+    missing = [key for key in base if key not in new]
+    if missing:
+        print(f"\n{len(missing)} baseline benchmarks were not run")
+    print(f"\n{regressions} regression(s) in {len(shared)} benchmarks")
+    return regressions
+
+
+def ratio(new, old):
+    if not old:
+        return '-' if not new else 'new'
+    return f"{new / old:.2f}x"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the poll analysis and chart stages")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="run the benchmarks")
+    run.add_argument('--polls', nargs='+', choices=list(POLLS), default=list(POLLS))
+    run.add_argument('--sizes', nargs='+', type=int, default=list(SIZES), metavar='ROWS')
+    run.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES))
+    run.add_argument('--seed', type=int, default=0, help="seed of the synthetic responses")
+    run.add_argument('--save', metavar='JSON', help="write the results to this file")
+    run.add_argument('--compare', metavar='JSON', nargs='?', const=str(BASELINE_PATH),
+                     help="compare the results with this baseline (default: polls/benchmarks/baseline.json, "
+                          "written by this run if it does not exist yet)")
+
+    cmp = commands.add_parser('compare', help="compare two saved runs")
+    cmp.add_argument('baseline')
+    cmp.add_argument('current')
+    args = parser.parse_args()
+
+    if args.command == 'compare':
+        regressions = compare(read_results(args.baseline), read_results(args.current))
+    else:
+        stages = [stage for stage in STAGES if stage in args.stages]
+        results = run_benchmarks(args.polls, args.sizes, stages, args.seed)
+        if args.save:
+            write_results(args.save, results)
+        regressions = 0
+        if args.compare and not Path(args.compare).exists():
+            print(f"\nNo baseline at '{args.compare}' yet; this run becomes the baseline")
+            write_results(args.compare, results)
+        elif args.compare:
+            regressions = compare(read_results(args.compare), {'results': results})
+    if regressions:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
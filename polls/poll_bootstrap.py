@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Bootstrap confidence intervals for the option shares of every poll question
+A share is the percentage of respondents who gave an answer ("Friday 42.0%").
+With a few dozen respondents that number can move a lot from one sample to
+the next, so every share gets a percentile bootstrap interval: resample the
+respondents with replacement many times and take the middle 95% of the
+resampled shares.
+
+Resampling never loops over respondents in Python: a batch of resamples is a
+matrix of how often each respondent was drawn, times the respondent x option
+indicator matrix. For large polls each question is first reduced to its
+distinct answer patterns and how many respondents gave each; drawing n
+respondents with replacement is then one multinomial draw of pattern counts,
+so the cost no longer grows with the number of responses.
+Batches run in a thread pool (NumPy releases the GIL while drawing
+and multiplying), each with its own random stream spawned from one seed, so
+the intervals are the same for a given seed whatever the number of workers.
+
+Everything is drawn from the answer patterns (PollResults.answer_patterns) in
+sorted order, never from the rows in file order. Results counted with --stream
+or --incremental keep the same patterns, so their intervals are identical to
+the loaded poll's.
+
+Run from the repository root:
+    python polls/poll_bootstrap.py
+    python polls/poll_bootstrap.py events --resamples 10000 --seed 7
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from poll_loader import CACHE_DIR_NAME, load_poll_results
+from poll_schema import POLLS, POLLS_DIR
+from poll_trace import span
+
+RESAMPLES = 10000
+CONFIDENCE = 0.95
+# Fixed by default so the summary CSVs and charts only change with the data
+SEED = 0
+
+# Cells of the resample weight matrix per batch (bounds memory per worker)
+BATCH_CELLS = 1 << 20
+
+# A binomial draw costs about as much as this many respondent index draws
+BINOMIAL_DRAW_COST = 8
+
+# Bump whenever the resampling changes (invalidates the stored intervals)
+BOOTSTRAP_VERSION = 1
+INTERVALS_DIR = POLLS_DIR / CACHE_DIR_NAME / 'bootstrap'
+# Interval sets kept per poll (the reports and charts share one while the
+# responses are unchanged; older response sets are dropped)
+KEPT_INTERVALS = 4
+
+
+def pattern_matrix(patterns):
+    """(options, answers, answers x options 0/1 matrix, respondents) of one question
+
+    patterns is one question of PollResults.answer_patterns. Answers and
+    options are sorted, so loaded and streamed results give the same arrays.
+    """
+    answers = sorted(patterns)
+    options = sorted({option for answer in answers for option in answer})
+    position = {option: j for j, option in enumerate(options)}
+    matrix = np.zeros((len(answers), len(options)), dtype=np.float64)
+    for i, answer in enumerate(answers):
+        matrix[i, [position[option] for option in answer]] = 1
+    respondents = np.array([patterns[answer] for answer in answers], dtype=np.int64)
+    return options, answers, matrix, respondents
+
+
+def resampled_patterns(patterns, respondents, size, rng):
+    """Shares (0-1) of each option in size resamples: multinomial draws of pattern counts"""
+    n = int(respondents.sum())
+    weights = rng.multinomial(n, respondents / n, size=size)
+    return (weights.astype(np.float64) @ patterns) / n
+
+
+def resampled_respondents(indicators, size, rng):
+    """Shares (0-1) of each option in size resamples: n respondent draws per resample"""
+    n = len(indicators)
+    picks = rng.integers(0, n, size=(size, n)) + np.arange(size)[:, None] * n
+    weights = np.bincount(picks.ravel(), minlength=size * n).reshape(size, n)
+    return (weights.astype(np.float64) @ indicators) / n
+
+
+def resampled_options(counts, n, size, rng):
+    """Shares (0-1) of each option in size resamples: one binomial draw per option
+
+    Each share on its own is exactly the resampled share of a question whose
+    answer patterns are unknown; only the correlation between options is lost,
+    which the percentile intervals do not use.
+    """
+    return rng.binomial(n, counts / n, size=(size, len(counts))) / n
+
+
+def resample_groups(results):
+    """(resample function, data, width, [(question, options), ...]) groups to resample
+
+    Each group is resampled on its own and its share columns split back into
+    its questions. Per-question answer patterns make large polls cheap; when
+    there are about as many respondents as patterns, drawing whole respondents
+    (every question at once) is faster, since an index draw costs a fraction of
+    a binomial draw. Questions with too many distinct answers to keep their
+    patterns draw each option's count instead.
+    """
+    patterns = results.answer_patterns()
+    if patterns is None:
+        return []
+    questions = {question: pattern_matrix(answers) for question, answers in patterns.items()
+                 if answers is not None}
+    groups = [(resampled_patterns, (matrix, respondents), len(respondents), [(question, options)])
+              for question, (options, _, matrix, respondents) in questions.items()]
+    unpatterned = []
+    for question, answers in patterns.items():
+        if answers is None:
+            counts = results.get(question)
+            counts = counts[counts > 0].sort_index()
+            unpatterned.append((resampled_options, (counts.to_numpy(dtype=np.float64), results.total),
+                                len(counts), [(question, list(counts.index))]))
+
+    width = sum(len(respondents) for _, _, _, respondents in questions.values())
+    joint = results.joint_patterns() if results.total <= width * BINOMIAL_DRAW_COST else None
+    if joint is not None:
+        # One row per respondent, in sorted joint pattern order (not file order),
+        # so streamed results draw exactly the same respondents
+        answers = sorted(joint)
+        blocks = []
+        # Joint keys hold an answer for every question, patterned or not
+        for q, question in enumerate(patterns):
+            if question not in questions:
+                continue
+            _, question_answers, matrix, _ = questions[question]
+            row_of = {answer: i for i, answer in enumerate(question_answers)}
+            blocks.append(matrix[[row_of[key[q]] for key in answers]])
+        indicators = np.repeat(np.hstack(blocks), [joint[key] for key in answers], axis=0)
+        groups = [(resampled_respondents, (indicators,), results.total,
+                   [(question, options) for question, (options, _, _, _) in questions.items()])]
+    return groups + unpatterned
+
+
+def intervals_key(groups, resamples, confidence, seed):
+    """Hash of everything the intervals are drawn from (answer patterns and settings)"""
+    digest = hashlib.sha256(json.dumps([BOOTSTRAP_VERSION, resamples, confidence, seed]).encode('utf-8'))
+    for resample, data, _, columns in groups:
+        digest.update(json.dumps([resample.__name__, columns]).encode('utf-8'))
+        for array in map(np.asarray, data):
+            digest.update(json.dumps(array.shape).encode('utf-8'))
+            digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+def intervals_path(poll):
+    return INTERVALS_DIR / f"{poll}.json"
+
+
+def read_stored(path):
+    """{key: stored intervals} of one poll, oldest first ({} if there are none)"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(stored, dict) or stored.get('version') != BOOTSTRAP_VERSION:
+        return {}
+    return stored.get('entries', {})
+
+
+def read_intervals(path, key):
+    """Intervals stored under key by write_intervals, or None if there are none"""
+    entry = read_stored(path).get(key)
+    if entry is None:
+        return None
+    return {question: pd.DataFrame({'Lower': data['lower'], 'Upper': data['upper']}, index=data['options'])
+            for question, data in entry.items()}
+
+
+def write_intervals(path, key, intervals):
+    """Store intervals under key, keeping only the KEPT_INTERVALS most recent keys"""
+    entries = read_stored(path)
+    entries.pop(key, None)
+    entries[key] = {question: {'options': list(frame.index), 'lower': frame['Lower'].tolist(),
+                               'upper': frame['Upper'].tolist()}
+                    for question, frame in intervals.items()}
+    entries = dict(list(entries.items())[-KEPT_INTERVALS:])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.stem}.tmp{os.getpid()}.json")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': BOOTSTRAP_VERSION, 'entries': entries}, f)
+    os.replace(tmp_path, path)
+
+
+def bootstrap_intervals(results, resamples=RESAMPLES, confidence=CONFIDENCE, seed=SEED, workers=None,
+                        cache=True):
+    """{question: DataFrame} of bootstrap share intervals for every select question
+
+    Each DataFrame is indexed by option with 'Lower' and 'Upper' percentages
+    (0-100) of all respondents. seed=None draws fresh entropy.
+
+    Intervals are stored in one file per poll in INTERVALS_DIR, under a hash
+    of the answer patterns and settings, so runs over unchanged responses
+    (every chart skipped, the report re-run) read them back instead of
+    resampling. Only the KEPT_INTERVALS most recent sets are kept.
+    """
+    if results.total == 0 or resamples <= 0:
+        return {}
+    groups = resample_groups(results)
+    if not groups:
+        return {}
+
+    path = key = None
+    if cache and seed is not None:
+        path = intervals_path(results.schema.name)
+        key = intervals_key(groups, resamples, confidence, seed)
+        intervals = read_intervals(path, key)
+        if intervals is not None:
+            return intervals
+
+    # One task per batch of resamples, each with its own spawned random stream
+    tasks = []
+    for g, (_, _, width, _) in enumerate(groups):
+        batch = max(1, min(resamples, BATCH_CELLS // width))
+        for start in range(0, resamples, batch):
+            tasks.append((g, min(batch, resamples - start)))
+    seeds = np.random.SeedSequence(seed).spawn(len(tasks))
+
+    def run(task, task_seed):
+        g, size = task
+        resample, data, _, _ = groups[g]
+        return resample(*data, size, np.random.default_rng(task_seed))
+
+    with span('bootstrap intervals', 'aggregate', resamples=resamples, batches=len(tasks)):
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            shares = [[] for _ in groups]
+            for (g, _), batch_shares in zip(tasks, pool.map(run, tasks, seeds)):
+                shares[g].append(batch_shares)
+
+    tail = (1 - confidence) / 2
+    intervals = {}
+    for (_, _, _, columns), parts in zip(groups, shares):
+        lower, upper = np.quantile(np.vstack(parts), [tail, 1 - tail], axis=0) * 100
+        start = 0
+        for question, options in columns:
+            stop = start + len(options)
+            intervals[question] = pd.DataFrame({'Lower': lower[start:stop], 'Upper': upper[start:stop]},
+                                               index=options)
+            start = stop
+
+    if path is not None:
+        try:
+            write_intervals(path, key, intervals)
+        except OSError as e:
+            print(f"  ⚠ Could not store bootstrap intervals: {e}")
+    return intervals
+
+
+def interval_columns(intervals, column, item):
+    """CI Lower / CI Upper summary CSV fields of one answer ({} without intervals)"""
+    if column not in intervals or item not in intervals[column].index:
+        return {}
+    lower, upper = intervals[column].loc[item, ['Lower', 'Upper']]
+    return {'CI Lower': f"{lower:.1f}%", 'CI Upper': f"{upper:.1f}%"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bootstrap confidence intervals of every option share")
+    parser.add_argument('polls', nargs='*', help=f"polls to resample (default: all of {', '.join(POLLS)})")
+    parser.add_argument('--resamples', type=int, default=RESAMPLES)
+    parser.add_argument('--confidence', type=float, default=CONFIDENCE)
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--workers', type=int, help="threads (default: one per CPU)")
+    parser.add_argument('--no-cache', action='store_true', help="always resample, even for unchanged responses")
+    args = parser.parse_args()
+
+    polls = args.polls or list(POLLS)
+    unknown = [poll for poll in polls if poll not in POLLS]
+    if unknown:
+        parser.error(f"unknown poll(s): {', '.join(unknown)}")
+    elapsed = 0.0
+    for poll in polls:
+        results = load_poll_results(poll)
+        start = time.perf_counter()
+        intervals = bootstrap_intervals(results, args.resamples, args.confidence, args.seed, args.workers,
+                                        cache=not args.no_cache)
+        elapsed += time.perf_counter() - start
+
+        print("\n" + "="*60)
+        print(f"{poll.upper()} ({results.total} responses, {args.confidence:.0%} intervals)")
+        print("="*60)
+        for column, counts in results.counts.items():
+            print(f"\n{column}")
+            print("-" * 60)
+            for item, count in counts.items():
+                percentage = (count / results.total) * 100
+                lower, upper = intervals[column].loc[item, ['Lower', 'Upper']]
+                print(f"{item:<40} {count:>3} ({percentage:>5.1f}%)  [{lower:5.1f}% - {upper:5.1f}%]")
+
+    print(f"\n✓ {args.resamples} resamples of {len(polls)} poll(s) in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+UCR Entomology Social Committee - Parallel, incremental poll build
+Models the polls workflow as a graph of tasks with declared inputs and outputs:
+
+    download:<poll>  ->  parse:<poll>  ->  analyze:<poll>  (report, PNGs, summary CSV)
+                                      \\->  render:<poll>   (interactive charts)  ->  results-page
+
+Independent tasks (the three polls, and analyze/render of the same poll) run
+in a process pool. A task is skipped when the contents of its inputs (data files
+and the code it runs) hash the same as on its last successful run and its
+outputs are still there. State is kept in polls/.poll_cache/build_state.json.
+
+Run from the repository root:
+    python polls/poll_build.py                  # build whatever changed
+    python polls/poll_build.py events -j 2      # one poll, two worker processes
+    python polls/poll_build.py --download       # fetch the Google Sheets first
+    python polls/poll_build.py --watch          # rebuild when a response CSV changes
+    python polls/poll_build.py --force          # run every task
+    python polls/poll_build.py --force --trace  # stage timings of every task -> poll_trace.json
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import poll_trace
+from poll_loader import CACHE_DIR_NAME, file_hash
+from poll_schema import POLLS, POLLS_DIR, SITE_DIR
+
+# Bump when task definitions change so every task runs once
+BUILD_VERSION = 1
+STATE_PATH = POLLS_DIR / CACHE_DIR_NAME / 'build_state.json'
+
+# Seconds between checks of the response CSVs in watch mode
+WATCH_INTERVAL = 2.0
+
+# Code every task that reads responses depends on
+LOADER_CODE = ['poll_schema.py', 'poll_counts.py', 'poll_loader.py', 'poll_trace.py']
+
+# Code behind the numbers in the summary CSVs and charts beyond the counts
+# (bootstrap intervals, coffee hour slot coverage)
+STATS_CODE = ['poll_bootstrap.py', 'poll_coverage.py']
+
+
+class Task:
+    """One build step: a top-level function run in a worker, with its inputs, outputs and dependencies
+
+    Inputs are files whose contents decide whether the task must run again;
+    outputs are files or folders that must exist for the task to be skipped.
+    always=True tasks (downloads) run whenever they are selected.
+    """
+
+    def __init__(self, name, action, args=(), inputs=(), outputs=(), deps=(), always=False):
+        self.name = name
+        self.action = action
+        self.args = tuple(args)
+        self.inputs = [Path(path) for path in inputs]
+        self.outputs = [Path(path) for path in outputs]
+        self.deps = list(deps)
+        self.always = always
+
+
+# Task actions run in worker processes, so they import what they need themselves
+
+def download_action(poll):
+    from download_sheets import SHEETS, download_sheet_to_csv
+    responses = POLLS[poll]['responses']
+    sheet_id = next(sheet_id for sheet_id, csv_name in SHEETS.values() if csv_name == responses)
+    if not download_sheet_to_csv(sheet_id, POLLS_DIR / responses):
+        raise RuntimeError(f"could not download {responses}")
+
+
+def parse_action(poll):
+    from poll_loader import load_poll_results
+    results = load_poll_results(poll)
+    print(f"✓ Loaded {results.total} responses")
+
+
+def analyze_action(poll, chart_format, chart_width):
+    from chart_renderer import set_output
+    from poll_pipeline import run_poll
+    set_output(chart_format, width=chart_width)
+    run_poll(poll, png=True, html=False)
+
+
+def render_action(poll):
+    from poll_loader import load_poll_results
+    from poll_pipeline import create_charts
+    create_charts(poll, load_poll_results(poll))
+
+
+def results_page_action(polls):
+    from poll_loader import load_poll_results
+    from results_page import build_results_page
+    build_results_page({poll: load_poll_results(poll).total for poll in polls})
+
+
+def poll_inputs(poll):
+    """Data files every task of a poll reads"""
+    config = POLLS[poll]
+    return [POLLS_DIR / config['responses'], POLLS_DIR / config['headers'],
+            SITE_DIR / config['form']]
+
+
+def code(*modules):
+    return [POLLS_DIR / module for module in modules]
+
+
+def build_graph(polls, download=False, chart_format='png', chart_width=None):
+    """Tasks for the given polls, keyed by name, in dependency order"""
+    tasks = {}
+
+    def add(task):
+        tasks[task.name] = task
+
+    for poll in polls:
+        csv_file = POLLS_DIR / POLLS[poll]['responses']
+        if download:
+            add(Task(f'download:{poll}', download_action, [poll],
+                     outputs=[csv_file], always=True))
+        parse_deps = [f'download:{poll}'] if download else []
+        add(Task(f'parse:{poll}', parse_action, [poll],
+                 inputs=poll_inputs(poll) + code(*LOADER_CODE),
+                 outputs=[POLLS_DIR / CACHE_DIR_NAME / csv_file.name], deps=parse_deps))
+        add(Task(f'analyze:{poll}', analyze_action, [poll, chart_format, chart_width],
+                 inputs=poll_inputs(poll) + code(*LOADER_CODE, *STATS_CODE,
+                                                 f'analyze_{poll}_poll.py', 'chart_renderer.py',
+                                                 'poll_pipeline.py', 'poll_incremental.py',
+                                                 'create_better_visualizations.py'),
+                 outputs=[Path(f'analysis_charts_{poll}'), Path(f'polls/{poll}_poll_summary.csv')],
+                 deps=[f'parse:{poll}']))
+        add(Task(f'render:{poll}', render_action, [poll],
+                 inputs=poll_inputs(poll) + code(*LOADER_CODE, *STATS_CODE,
+                                                 'create_all_interactive_charts.py'),
+                 outputs=[Path(f'polls/analysis_results/interactive_charts_{poll}')],
+                 deps=[f'parse:{poll}']))
+
+    manifest = Path('polls/analysis_results/chart_manifest.json')
+    add(Task('results-page', results_page_action, [tuple(polls)],
+             inputs=[manifest] + [poll_inputs(poll)[0] for poll in polls]
+                    + code(*LOADER_CODE, 'results_page.py'),
+             outputs=[SITE_DIR / 'poll-results.html'],
+             deps=[f'render:{poll}' for poll in polls]))
+    return tasks
+
+
+def downstream(tasks, names):
+    """The given tasks and every task that depends on them, in graph order"""
+    selected = set(names)
+    for name, task in tasks.items():
+        if any(dep in selected for dep in task.deps):
+            selected.add(name)
+    return [name for name in tasks if name in selected]
+
+
+def read_state():
+    try:
+        with open(STATE_PATH, encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {}
+    if state.get('version') != BUILD_VERSION:
+        state = {'version': BUILD_VERSION, 'files': {}, 'tasks': {}}
+    return state
+
+
+def write_state(state):
+    STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = STATE_PATH.with_name(f"{STATE_PATH.name}.tmp{os.getpid()}")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, STATE_PATH)
+
+
+def content_hash(path, state):
+    """SHA-256 of a file, only re-read when its size or mtime changed (None if missing)"""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    signature = [stat.st_size, stat.st_mtime_ns]
+    known = state['files'].get(str(path))
+    if known and known[:2] == signature:
+        return known[2]
+    digest = file_hash(path)
+    state['files'][str(path)] = signature + [digest]
+    return digest
+
+
+def input_key(task, state):
+    """Hash of a task's name, arguments and the contents of its inputs"""
+    payload = json.dumps([task.name, repr(task.args),
+                          [(str(path), content_hash(path, state)) for path in task.inputs]])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def is_current(task, key, state):
+    return (not task.always and state['tasks'].get(task.name) == key
+            and all(path.exists() for path in task.outputs))
+
+
+def run_task(name, action, args):
+    """Worker side: run one task, capturing what it prints and the trace events it records"""
+    # Forked workers start with a copy of the parent's events
+    poll_trace.collect()
+    log = io.StringIO()
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(log), poll_trace.span(name, 'task'):
+            action(*args)
+        ok = True
+    except Exception:
+        log.write(traceback.format_exc())
+        ok = False
+    return ok, log.getvalue(), time.perf_counter() - start, poll_trace.collect()
+
+
+def run_build(tasks, selected, jobs=None, force=False, verbose=False):
+    """Run the selected tasks, each as soon as its dependencies are done
+
+    Dependencies outside the selection count as done. Returns True if no task failed.
+    """
+    state = read_state()
+    pending = list(selected)
+    done, failed = set(), set()
+    running = {}
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            for name in list(pending):
+                task = tasks[name]
+                deps = [dep for dep in task.deps if dep in selected]
+                if any(dep in failed for dep in deps):
+                    pending.remove(name)
+                    failed.add(name)
+                    print(f"  ✗ {name} (not run: a dependency failed)")
+                elif all(dep in done for dep in deps):
+                    pending.remove(name)
+                    key = input_key(task, state)
+                    if not force and is_current(task, key, state):
+                        done.add(name)
+                        print(f"  · {name} (unchanged)")
+                    else:
+                        future = pool.submit(run_task, name, task.action, task.args)
+                        running[future] = (name, key)
+
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, key = running.pop(future)
+                ok, log, seconds, events = future.result()
+                poll_trace.add_events(events)
+                if ok:
+                    done.add(name)
+                    state['tasks'][name] = key
+                    write_state(state)
+                    print(f"  ✓ {name} ({seconds:.1f}s)")
+                else:
+                    failed.add(name)
+                    state['tasks'].pop(name, None)
+                    write_state(state)
+                    print(f"  ✗ {name} failed")
+                if verbose or not ok:
+                    print('\n'.join(f"      {line}" for line in log.rstrip().splitlines()))
+
+    return not failed
+
+
+def watched_files(tasks):
+    """Response CSVs the graph reads, mapped to the parse task that reads them"""
+    return {POLLS_DIR / POLLS[name.split(':', 1)[1]]['responses']: name
+            for name in tasks if name.startswith('parse:')}
+
+
+def file_signature(path):
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def watch(tasks, jobs=None, verbose=False):
+    """Rebuild the tasks downstream of a response CSV whenever it changes"""
+    files = watched_files(tasks)
+    seen = {path: file_signature(path) for path in files}
+    print(f"\nWatching {len(files)} response files (Ctrl+C to stop)...")
+    try:
+        while True:
+            time.sleep(WATCH_INTERVAL)
+            changed = [path for path in files if file_signature(path) != seen[path]]
+            if not changed:
+                continue
+            for path in changed:
+                seen[path] = file_signature(path)
+            print(f"\n{', '.join(path.name for path in changed)} changed")
+            selected = downstream(tasks, [files[path] for path in changed])
+            run_build(tasks, selected, jobs=jobs, verbose=verbose)
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build every poll output in parallel, skipping what has not changed")
+    parser.add_argument('polls', nargs='*', metavar='poll',
+                        help=f"polls to build: {', '.join(POLLS)} (default: all)")
+    parser.add_argument('-j', '--jobs', type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument('--download', action='store_true', help="download the response sheets first")
+    parser.add_argument('--force', action='store_true', help="run every task, changed or not")
+    parser.add_argument('--watch', action='store_true',
+                        help="keep running and rebuild when a response CSV changes")
+    parser.add_argument('--chart-format', choices=('png', 'svg'), default='png',
+                        help="file format of the matplotlib charts (default: png)")
+    parser.add_argument('--chart-width', type=int, metavar='PIXELS',
+                        help="save raster charts this many pixels wide instead of at 300 dpi")
+    parser.add_argument('-v', '--verbose', action='store_true', help="print the output of every task")
+    parser.add_argument('--trace', nargs='?', const=poll_trace.DEFAULT_PATH, metavar='JSON',
+                        help=f"record the stages of every task to a trace file "
+                             f"(default: {poll_trace.DEFAULT_PATH})")
+    args = parser.parse_args()
+    if args.trace:
+        poll_trace.enable(args.trace)
+    polls = args.polls or list(POLLS)
+    unknown = [poll for poll in polls if poll not in POLLS]
+    if unknown:
+        parser.error(f"unknown poll(s): {', '.join(unknown)}")
+
+    tasks = build_graph(polls, download=args.download, chart_format=args.chart_format,
+                        chart_width=args.chart_width)
+
+    print("="*70)
+    print("BUILDING POLL OUTPUTS")
+    print("="*70)
+    start = time.perf_counter()
+    ok = run_build(tasks, list(tasks), jobs=args.jobs, force=args.force, verbose=args.verbose)
+    print(f"\n{'Build finished' if ok else 'Build FAILED'} in {time.perf_counter() - start:.1f}s")
+
+    if args.watch:
+        watch(tasks, jobs=args.jobs, verbose=args.verbose)
+    elif not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Thin client for the warm poll worker (poll_worker.py)
+Sends one job over a Unix socket and prints the worker's output as it arrives.
+Only uses the standard library, so it starts in a few milliseconds; the worker
+already has pandas, matplotlib and plotly imported and the polls loaded.
+
+The worker is started in the background on first use and exits after
+IDLE_TIMEOUT seconds without jobs.
+
+Run from the repository root:
+    python polls/poll_client.py analyze coffee_hour      # report, PNGs, summary CSV
+    python polls/poll_client.py analyze --no-png         # every poll, text + summary only
+    python polls/poll_client.py charts events            # interactive charts
+    python polls/poll_client.py summary                  # summary CSVs
+    python polls/poll_client.py status | stop
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+POLLS_DIR = Path(__file__).resolve().parent
+SOCKET_PATH = POLLS_DIR / '.poll_cache' / 'worker.sock'
+
+# Jobs the worker understands, and how long it may wait between jobs
+JOBS = ('analyze', 'charts', 'summary', 'status', 'stop')
+IDLE_TIMEOUT = 30 * 60
+
+# How long to wait for a freshly started worker to load its libraries
+START_TIMEOUT = 60
+
+
+def connect():
+    """Socket connected to the worker, or None if no worker is running"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(SOCKET_PATH))
+    except (FileNotFoundError, ConnectionRefusedError):
+        sock.close()
+        return None
+    return sock
+
+
+def start_worker():
+    """Start poll_worker.py in the background and wait until it accepts jobs"""
+    SOCKET_PATH.parent.mkdir(parents=True, exist_ok=True)
+    log = open(SOCKET_PATH.with_name('worker.log'), 'ab')
+    subprocess.Popen([sys.executable, str(POLLS_DIR / 'poll_worker.py')],
+                     stdin=subprocess.DEVNULL, stdout=log, stderr=log,
+                     start_new_session=True)
+    print("Starting poll worker (first run loads pandas, matplotlib and plotly)...",
+          file=sys.stderr)
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        sock = connect()
+        if sock is not None:
+            return sock
+        time.sleep(0.1)
+    raise SystemExit(f"Poll worker did not start; see {log.name}")
+
+
+def submit(job, polls=(), options=None, start=True):
+    """Send a job, print its output as it streams back and return whether it succeeded"""
+    sock = connect()
+    if sock is None:
+        if not start:
+            print("Poll worker is not running")
+            return job in ('status', 'stop')
+        sock = start_worker()
+
+    request = {'job': job, 'polls': list(polls), 'options': options or {}, 'cwd': os.getcwd()}
+    with sock, sock.makefile('rwb') as stream:
+        stream.write(json.dumps(request).encode('utf-8') + b'\n')
+        stream.flush()
+        for line in stream:
+            message = json.loads(line)
+            if 'out' in message:
+                sys.stdout.write(message['out'])
+                sys.stdout.flush()
+            elif 'done' in message:
+                return message['ok']
+    print("Poll worker closed the connection", file=sys.stderr)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run poll jobs on the warm poll worker")
+    parser.add_argument('job', choices=JOBS)
+    parser.add_argument('polls', nargs='*', metavar='poll', help="polls to process (default: all)")
+    parser.add_argument('--no-png', action='store_true', help="analyze: skip the PNG charts")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    ok = submit(args.job, args.polls, {'png': not args.no_png},
+                start=args.job not in ('status', 'stop'))
+    if args.job not in ('status', 'stop'):
+        print(f"\n[{args.job} took {time.perf_counter() - start:.2f}s]", file=sys.stderr)
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Option co-occurrence of multi-select questions
+Counts, for every pair of options of the chosen multi-select questions, how
+many respondents picked both, e.g. which insects go with which keychain or
+decorative products, or which food options go with which coffee types. Each
+pair also gets
+
+- lift: how much more often the pair is picked together than if the two
+  options were picked independently (1 = no association)
+- Jaccard similarity: respondents who picked both over those who picked either
+
+All counts come from one matrix product A.T @ A of the respondents x options
+0/1 matrix. For large option vocabularies A is a scipy sparse matrix (only the
+picks are stored), so the work follows the number of picks rather than
+respondents x options squared and thousands of options stay cheap. The polls'
+own questions have a few dozen options at most, where a dense product in
+blocks of respondents is faster; it is also the fallback without scipy.
+
+Run from the repository root:
+    python polls/poll_cooccurrence.py 3d_merch "Favorite Insects" "Keychain Products" "Decorative Products"
+    python polls/poll_cooccurrence.py coffee_hour "Food Options" "Coffee Types" --metric jaccard --chart
+    python polls/poll_cooccurrence.py events "Outdoor Activities" --top 10 --table pairs.csv
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    from scipy import sparse
+except ImportError:
+    # Without scipy the product is always dense (fine for the polls' vocabularies)
+    sparse = None
+
+from poll_loader import load_poll_results
+from poll_schema import MULTI_SELECT, POLLS, POLLS_DIR
+from poll_trace import span
+
+METRICS = ('count', 'lift', 'jaccard')
+
+# Pairs picked together by fewer respondents are left out of the top pairs
+# (their lift is mostly noise)
+MIN_COUNT = 5
+
+# Respondents per block when unpacking the bit matrices
+CHUNK_ROWS = 1 << 16
+
+# Up to this many options in all, a dense product per block of respondents
+# (a few BLAS columns) is faster than the sparse one; wider vocabularies go sparse
+DENSE_OPTIONS = 256
+
+
+class CoOccurrence:
+    """
+    Respondents who picked each pair of options of a few multi-select questions
+
+    counts[i, j] is how many respondents picked both option i and option j
+    (options of every question one after another, see questions), and
+    counts[i, i] how many picked option i. counts is a scipy sparse matrix for
+    wide vocabularies, a NumPy array otherwise.
+    """
+
+    def __init__(self, total, questions, counts):
+        self.total = total
+        self.questions = questions
+        self.counts = counts
+        self.support = np.asarray(counts.diagonal(), dtype=np.int64)
+        self.labels = [(question, option) for question, options in questions.items() for option in options]
+        self.positions = {}
+        start = 0
+        for question, options in questions.items():
+            self.positions[question] = slice(start, start + len(options))
+            start += len(options)
+
+    def check(self, question):
+        if question not in self.questions:
+            raise KeyError(f"'{question}' is not one of the counted questions "
+                           f"({', '.join(self.questions)})")
+
+    def metric(self, counts, support_a, support_b, metric):
+        """Metric of pairs from their counts and the counts of either option"""
+        counts = np.asarray(counts, dtype=np.float64)
+        if metric == 'count':
+            return counts
+        if metric == 'lift':
+            expected = support_a * support_b / self.total
+            return np.divide(counts, expected, out=np.zeros_like(counts), where=expected > 0)
+        if metric == 'jaccard':
+            either = support_a + support_b - counts
+            return np.divide(counts, either, out=np.zeros_like(counts), where=either > 0)
+        raise ValueError(f"unknown metric '{metric}' (expected one of: {', '.join(METRICS)})")
+
+    def matrix(self, rows, columns, metric='count'):
+        """Options of rows (index) x options of columns as a DataFrame of the metric"""
+        self.check(rows)
+        self.check(columns)
+        block = self.counts[self.positions[rows], self.positions[columns]]
+        block = block.toarray() if sparse is not None and sparse.issparse(block) else np.asarray(block)
+        values = self.metric(block, self.support[self.positions[rows]][:, None],
+                             self.support[self.positions[columns]][None, :], metric)
+        frame = pd.DataFrame(values, index=self.questions[rows], columns=self.questions[columns])
+        return frame.astype(np.int64) if metric == 'count' else frame
+
+    def pairs(self, min_count=MIN_COUNT, same_question=True):
+        """Every pair of different options picked together by at least min_count respondents
+
+        One row per pair with its count, lift and Jaccard similarity, highest
+        lift first. same_question=False keeps only pairs across questions.
+        """
+        if sparse is not None and sparse.issparse(self.counts):
+            entries = sparse.triu(self.counts, k=1).tocoo()
+            i, j, counts = entries.row, entries.col, entries.data
+        else:
+            i, j = np.nonzero(np.triu(self.counts, k=1))
+            counts = self.counts[i, j]
+        keep = counts >= min_count
+        i, j, counts = i[keep], j[keep], np.asarray(counts[keep], dtype=np.int64)
+        if not same_question:
+            question_of = np.repeat(np.arange(len(self.questions)),
+                                    [len(options) for options in self.questions.values()])
+            across = question_of[i] != question_of[j]
+            i, j, counts = i[across], j[across], counts[across]
+
+        support_a, support_b = self.support[i], self.support[j]
+        frame = pd.DataFrame({
+            'Question A': [self.labels[k][0] for k in i],
+            'Option A': [self.labels[k][1] for k in i],
+            'Question B': [self.labels[k][0] for k in j],
+            'Option B': [self.labels[k][1] for k in j],
+            'Count': counts,
+            'Lift': self.metric(counts, support_a, support_b, 'lift'),
+            'Jaccard': self.metric(counts, support_a, support_b, 'jaccard'),
+        })
+        return frame.sort_values(['Lift', 'Count'], ascending=False, kind='stable').reset_index(drop=True)
+
+
+def option_blocks(results, options):
+    """0/1 picks (respondents x options of every question) in blocks of CHUNK_ROWS respondents"""
+    for start in range(0, results.total, CHUNK_ROWS):
+        yield np.hstack([
+            np.unpackbits(results.matrices[question].bits[start:start + CHUNK_ROWS], axis=1, count=len(labels))
+            for question, labels in options.items()
+        ])
+
+
+def sparse_picks(results, options, width):
+    """Respondents x options CSR matrix of the picks
+
+    Blocks are scanned in respondent order, so the CSR arrays are filled
+    directly without sorting.
+    """
+    indices, row_picks = [np.zeros(0, dtype=np.int32)], [np.zeros(0, dtype=np.int64)]
+    for block in option_blocks(results, options):
+        rows, cols = np.nonzero(block)
+        indices.append(cols.astype(np.int32))
+        row_picks.append(np.bincount(rows, minlength=len(block)))
+    indices = np.concatenate(indices)
+    indptr = np.concatenate([[0], np.cumsum(np.concatenate(row_picks))])
+    return sparse.csr_matrix((np.ones(len(indices), dtype=np.int64), indices, indptr),
+                             shape=(results.total, width))
+
+
+def count_cooccurrence(results, questions):
+    """CoOccurrence of the given multi-select questions of a poll loaded with load_poll_results"""
+    options = {}
+    for question in questions:
+        if results.schema.kind(question) != MULTI_SELECT or question not in results.matrices:
+            raise KeyError(f"'{question}' is not a multi-select question "
+                           f"(expected one of: {', '.join(results.matrices)})")
+        options[question] = list(results.matrices[question].options)
+    width = sum(len(labels) for labels in options.values())
+
+    with span(f"co-occurrence {', '.join(questions)}", 'aggregate', options=width):
+        if sparse is not None and width > DENSE_OPTIONS:
+            picks = sparse_picks(results, options, width)
+            counts = (picks.T.tocsr() @ picks).tocsr()
+        else:
+            # float32 sums stay exact below 2**24 respondents per block
+            counts = np.zeros((width, width), dtype=np.int64)
+            for block in option_blocks(results, options):
+                block = block.astype(np.float32)
+                counts += np.rint(block.T @ block).astype(np.int64)
+    return CoOccurrence(results.total, options, counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Which options of multi-select questions are picked together")
+    parser.add_argument('poll', choices=list(POLLS))
+    parser.add_argument('questions', nargs='+',
+                        help="multi-select questions; the first is matched against the others "
+                             "(or against itself when it is the only one)")
+    parser.add_argument('--metric', choices=METRICS, default='lift', help="value shown in the matrix and heatmap")
+    parser.add_argument('--top', type=int, default=15, help="strongest pairs to list (by lift)")
+    parser.add_argument('--min-count', type=int, default=MIN_COUNT,
+                        help="leave out pairs picked together by fewer respondents")
+    parser.add_argument('--chart', action='store_true', help="also write an interactive heatmap")
+    parser.add_argument('--table', help="write every pair (count, lift, Jaccard) to this CSV file")
+    parser.add_argument('--csv', help="response CSV (default: the poll's own responses)")
+    args = parser.parse_args()
+
+    csv_file = Path(args.csv) if args.csv else POLLS_DIR / POLLS[args.poll]['responses']
+    results = load_poll_results(args.poll, csv_file)
+    try:
+        cooccurrence = count_cooccurrence(results, list(dict.fromkeys(args.questions)))
+    except KeyError as e:
+        parser.error(e.args[0])
+
+    rows = args.questions[0]
+    columns = [question for question in cooccurrence.questions if question != rows] or [rows]
+    decimals = 0 if args.metric == 'count' else 2
+    matrix = pd.concat([cooccurrence.matrix(rows, question, args.metric) for question in columns], axis=1)
+    if columns == [rows]:
+        # An option against itself is just its own count; left blank so it does not swamp the scale
+        matrix = matrix.astype(float).mask(np.eye(len(matrix), dtype=bool))
+    if len(columns) > 1:
+        # Options shared by several questions (Other) get their question added
+        labels = [(question, option) for question in columns for option in cooccurrence.questions[question]]
+        repeated = {option for option in matrix.columns if list(matrix.columns).count(option) > 1}
+        matrix.columns = [f"{option} ({question})" if option in repeated else option
+                          for question, option in labels]
+    print(f"\n{rows} x {', '.join(columns)}: {args.metric} ({results.total} responses)")
+    print("-" * 60)
+    print(matrix.to_string(na_rep='', float_format=lambda value: f'{value:.{decimals}f}'))
+
+    pairs = cooccurrence.pairs(args.min_count, same_question=len(cooccurrence.questions) == 1)
+    print(f"\nStrongest pairs (picked together by at least {args.min_count} respondents)")
+    print("-" * 60)
+    options = [option for _, option in cooccurrence.labels]
+    shared = {option for option in options if options.count(option) > 1}
+
+    def label(question, option):
+        return f"{option} ({question})" if option in shared else option
+
+    for _, pair in pairs.head(args.top).iterrows():
+        name = f"{label(pair['Question A'], pair['Option A'])} + {label(pair['Question B'], pair['Option B'])}"
+        print(f"{name:<55} {pair['Count']:>4}  lift {pair['Lift']:4.2f}  Jaccard {pair['Jaccard']:4.2f}")
+
+    if args.table:
+        cooccurrence.pairs(min_count=1).to_csv(args.table, index=False)
+        print(f"\n✓ Pairs exported to '{args.table}'")
+
+    if args.chart:
+        import create_all_interactive_charts as charts
+        output_dir = Path(f'polls/analysis_results/cooccurrence_{args.poll}')
+        output_dir.mkdir(parents=True, exist_ok=True)
+        name = f"{rows} {' '.join(columns)} {args.metric}".lower()
+        slug = ''.join(char if char.isalnum() else '_' for char in name).strip('_')
+        charts.create_interactive_heatmap(matrix, f"{rows} x {', '.join(columns)}",
+                                          output_dir / f'{slug}.html',
+                                          value_label=args.metric.capitalize(), decimals=decimals)
+
+
+if __name__ == "__main__":
+    main()
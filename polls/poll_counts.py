@@ -0,0 +1,549 @@
+#!/usr/bin/env python3
+"""
+Shared counting engine for poll multi-select questions
+Splits, trims and counts comma-separated answers with vectorized pandas string
+operations instead of looping over every response in Python
+
+When a column's options are known (from the poll form, see poll_schema.py),
+answers are matched against those options with OptionTokenizer instead, so
+options that contain commas are never split apart.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def explode_multiselect(df, columns):
+    """Split all multi-select columns into one long Series of trimmed items
+
+    The result is indexed by (column, row position) so every item keeps track
+    of which question and which respondent it came from.
+    """
+    present = [col for col in columns if col in df.columns]
+    if not present:
+        return pd.Series(dtype='object')
+
+    # One concat + one split/explode/strip for every column at once
+    answers = pd.concat({col: df[col].reset_index(drop=True).dropna() for col in present})
+    items = answers.astype(str).str.split(',').explode().str.strip()
+    return items
+
+
+def count_multiselect(df, columns):
+    """Count every multi-select column in a single pass
+
+    Returns a dict of column -> counts Series (most popular first), matching
+    what the old per-column loops produced.
+    """
+    results = {col: pd.Series(dtype='int64') for col in columns}
+
+    items = explode_multiselect(df, columns)
+    if len(items) == 0:
+        return results
+
+    for col, column_items in items.groupby(level=0, sort=False):
+        counts = column_items.reset_index(drop=True).value_counts()
+        counts.index.name = None
+        counts.name = 'count'
+        results[col] = counts
+
+    return results
+
+
+def split_multiselect(df, column, options=None):
+    """Split comma-separated values into individual items and count them
+
+    With the column's known options (PollSchema.options) answers are matched
+    with OptionTokenizer, so options that contain commas stay whole.
+    """
+    if column not in df.columns:
+        return pd.Series(dtype='int64')
+
+    if options is not None:
+        return OptionTokenizer(options).encode(df[column]).counts()
+    return count_multiselect(df, [column])[column]
+
+
+def count_singleselect(df, column):
+    """value_counts for a single-select column, with a plain string index"""
+    if column not in df.columns:
+        return pd.Series(dtype='int64')
+
+    counts = df[column].value_counts()
+    # Categorical columns also report options nobody picked
+    counts = counts[counts > 0]
+    counts.index = counts.index.astype(object)
+    return counts
+
+
+def rank_counts(options, counts):
+    """Counts Series sorted most popular first, dropping options nobody picked
+
+    options must be in first-seen order; the stable sort then breaks ties the
+    same way value_counts does.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    order = np.argsort(-counts, kind='stable')
+    order = order[counts[order] > 0]
+    return pd.Series(counts[order], index=[options[j] for j in order],
+                     name='count', dtype='int64')
+
+
+# Bucket for answer text that matches none of a column's known options; kept
+# apart from a form's own "Other" checkbox (see unlisted_label)
+OTHER = 'Other (unlisted)'
+
+
+def unlisted_label(options):
+    """OTHER, or OTHER with a number if the form already has an option of that name"""
+    label, n = OTHER, 1
+    while label in options:
+        n += 1
+        label = f"{OTHER} {n}"
+    return label
+
+
+class OptionTokenizer:
+    """
+    Matches known options in a comma-joined multi-select answer
+
+    The options are compiled into a character trie, and each answer is read
+    left to right taking the longest option that ends at a comma (or the end
+    of the answer), so "Espresso-based drinks (latte, cappuccino)" stays one
+    option. Text that matches no option is coded as its own unlisted option
+    (see unlisted_label), never merged into a form option such as "Other";
+    that column is only kept when some answer actually needed it.
+    """
+
+    def __init__(self, options):
+        self.options = list(options)
+        self.other = unlisted_label(self.options)
+        self.options.append(self.other)
+        self.other_code = len(self.options) - 1
+
+        self.trie = {}
+        for code, option in enumerate(self.options):
+            node = self.trie
+            for char in option:
+                node = node.setdefault(char, {})
+            node[None] = code
+
+    @staticmethod
+    def at_separator(text, end):
+        """True if only spaces stand between end and the next comma (or the end)"""
+        while end < len(text) and text[end].isspace():
+            end += 1
+        return end == len(text) or text[end] == ','
+
+    def match(self, text, start):
+        """Longest option starting at start that ends at a separator: (code, end)"""
+        node = self.trie
+        best = (None, start)
+        for i in range(start, len(text)):
+            node = node.get(text[i])
+            if node is None:
+                break
+            if None in node and self.at_separator(text, i + 1):
+                best = (node[None], i + 1)
+        return best
+
+    def tokenize(self, text):
+        """Option codes picked in one answer, in answer order, without repeats"""
+        codes = []
+        i, n = 0, len(text)
+        while i < n:
+            if text[i] == ',' or text[i].isspace():
+                i += 1
+                continue
+            code, end = self.match(text, i)
+            if code is None:
+                # Unknown text runs to the next comma
+                end = text.find(',', i)
+                end = n if end == -1 else end
+                code = self.other_code
+            if code not in codes:
+                codes.append(code)
+            i = end
+        return codes
+
+    def encode(self, answers):
+        """OptionMatrix for a column of answers (NaN = no answer)
+
+        Each distinct answer string is tokenized only once.
+        """
+        codes, uniques = pd.factorize(pd.Series(answers, dtype=object))
+        # One extra all-False row at the end, picked by code -1 (blank answers)
+        table = np.zeros((len(uniques) + 1, len(self.options)), dtype=bool)
+        for a, answer in enumerate(uniques):
+            table[a, self.tokenize(str(answer))] = True
+        options = self.options
+        if not table[:, self.other_code].any():
+            # The unlisted option was appended last, so it is the last column
+            table, options = table[:, :-1], options[:-1]
+        return OptionMatrix(np.packbits(table[codes], axis=1), options, len(codes))
+
+
+class OptionMatrix:
+    """
+    Bit-packed respondent x option indicator matrix for one multi-select column
+
+    Row i, bit j is set when respondent i picked options[j]. Bits are packed
+    eight options per byte (np.packbits order), so 1M respondents with 30
+    options take about 4 MB instead of hundreds of MB of object strings.
+    """
+
+    def __init__(self, bits, options, n_rows):
+        self.bits = bits
+        self.options = list(options)
+        self.index = {option: i for i, option in enumerate(self.options)}
+        self.n_rows = n_rows
+
+    @classmethod
+    def from_items(cls, rows, items, n_rows):
+        """Build the matrix from parallel arrays of row positions and item strings"""
+        codes, options = pd.factorize(np.asarray(items, dtype=object))
+        dense = np.zeros((n_rows, len(options)), dtype=bool)
+        dense[np.asarray(rows, dtype=np.intp), codes] = True
+        return cls(np.packbits(dense, axis=1), options, n_rows)
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes
+
+    def option_mask(self, option):
+        """Boolean array of respondents who picked this option"""
+        j = self.index[option]
+        return (self.bits[:, j >> 3] & (0x80 >> (j & 7))) != 0
+
+    def to_dense(self):
+        """Unpack into a (respondents x options) boolean matrix"""
+        return np.unpackbits(self.bits, axis=1, count=len(self.options)).astype(bool)
+
+    def option_counts(self, rows=None):
+        """Number of respondents per option, in vocabulary order"""
+        bits = self.bits if rows is None else self.bits[rows]
+        return np.array([
+            np.count_nonzero(bits[:, j >> 3] & (0x80 >> (j & 7)))
+            for j in range(len(self.options))
+        ], dtype=np.int64)
+
+    def counts(self, rows=None):
+        """Counts Series (most popular first), like split_multiselect"""
+        return rank_counts(self.options, self.option_counts(rows))
+
+    def percentages(self, rows=None):
+        """Share of respondents (0-100) who picked each option"""
+        counts = self.counts(rows)
+        total = self.n_rows if rows is None else int(np.count_nonzero(rows))
+        return counts / total * 100 if total else counts.astype(float)
+
+    def filter(self, rows):
+        """Matrix restricted to the respondents selected by a boolean mask"""
+        return OptionMatrix(self.bits[rows], self.options, int(np.count_nonzero(rows)))
+
+    def crosstab(self, groups):
+        """Option x group counts for a per-respondent label array (e.g. Role)"""
+        codes, labels = pd.factorize(pd.Series(groups), sort=True)
+        table = np.zeros((len(self.options), len(labels)), dtype=np.int64)
+        for g in range(len(labels)):
+            table[:, g] = self.option_counts(codes == g)
+        return pd.DataFrame(table, index=self.options, columns=list(labels))
+
+
+def encode_multiselect(df, columns, options=None):
+    """Encode every multi-select column into an OptionMatrix in one pass
+
+    options maps column -> known options; those columns are matched with
+    OptionTokenizer, the rest are split on commas.
+    """
+    n_rows = len(df)
+    matrices = {}
+
+    options = options or {}
+    for col in columns:
+        if col in options and col in df.columns:
+            matrices[col] = OptionTokenizer(options[col]).encode(df[col])
+    columns = [col for col in columns if col not in matrices]
+
+    items = explode_multiselect(df, columns)
+    if len(items):
+        for col, column_items in items.groupby(level=0, sort=False):
+            rows = column_items.index.get_level_values(1)
+            matrices[col] = OptionMatrix.from_items(rows, column_items.values, n_rows)
+
+    # Columns that exist but have no answers yet still get an (empty) matrix
+    for col in columns:
+        if col in df.columns and col not in matrices:
+            matrices[col] = OptionMatrix.from_items([], [], n_rows)
+
+    return matrices
+
+
+def matrix_counts(matrices, column):
+    """Counts for one encoded column, or an empty Series if it was not in the poll"""
+    if column not in matrices:
+        return pd.Series(dtype='int64')
+    return matrices[column].counts()
+
+
+# Whole-respondent answer patterns (every question at once) are only kept up
+# to this many responses; the bootstrap resamples whole respondents only for
+# small polls (see poll_bootstrap.resample_groups)
+JOINT_PATTERN_ROWS = 1 << 14
+
+# A question with more distinct answers than this keeps no answer patterns
+# (None); the bootstrap then draws its option counts instead
+PATTERN_LIMIT = 1 << 12
+
+
+def answer_ids(schema, df, matrices, columns=None):
+    """{question: (answers, ids)} for every select question of loaded responses
+
+    answers are the distinct answers given, each the sorted tuple of options
+    picked (() = no answer), and ids[i] says which one respondent i gave.
+    columns limits it to those questions.
+    """
+    questions = {}
+    for col in schema.columns:
+        if columns is not None and col not in columns:
+            continue
+        if col in matrices:
+            matrix = matrices[col]
+            bits = np.asarray(matrix.bits)
+            if bits.shape[1] <= 8:
+                # Each packed row as one integer key (much faster to sort than rows)
+                keys = np.zeros(len(bits), dtype=np.uint64)
+                for byte in range(bits.shape[1]):
+                    keys = (keys << np.uint64(8)) | bits[:, byte].astype(np.uint64)
+                _, first, ids = np.unique(keys, return_index=True, return_inverse=True)
+                rows = bits[first]
+            else:
+                rows, ids = np.unique(bits, axis=0, return_inverse=True)
+            options = np.array(matrix.options, dtype=object)
+            picked = np.unpackbits(rows, axis=1, count=len(options)).astype(bool)
+            answers = [tuple(sorted(options[row])) for row in picked]
+        elif col in schema.singleselect and col in df.columns:
+            values = [str(value) for value in df[col].cat.categories]
+            codes, ids = np.unique(np.asarray(df[col].cat.codes), return_inverse=True)
+            # Code -1 is no answer
+            answers = [(values[code],) if code >= 0 else () for code in codes]
+        else:
+            continue
+        questions[col] = (answers, np.asarray(ids).ravel())
+    return questions
+
+
+def count_answers(questions):
+    """{question: {answer: respondents}} from answer_ids"""
+    return {col: dict(zip(answers, np.bincount(ids, minlength=len(answers)).tolist()))
+            for col, (answers, ids) in questions.items()}
+
+
+def limit_patterns(patterns):
+    """patterns with every question over PATTERN_LIMIT distinct answers set to None"""
+    return {col: answers if answers is None or len(answers) <= PATTERN_LIMIT else None
+            for col, answers in patterns.items()}
+
+
+def count_joint_answers(questions):
+    """{(answer to every question): respondents} from answer_ids"""
+    if not questions:
+        return {}
+    answers = [answers for answers, _ in questions.values()]
+    sizes = [max(len(question_answers), 1) for question_answers in answers]
+    if np.prod(sizes, dtype=np.float64) < 2 ** 63:
+        # Every respondent's answer ids as one mixed-radix integer (much faster to
+        # sort than rows); the first question is the most significant digit, so
+        # the patterns come out in the same order as sorting the rows
+        keys = np.zeros(len(next(iter(questions.values()))[1]), dtype=np.int64)
+        for size, (_, ids) in zip(sizes, questions.values()):
+            keys = keys * size + ids
+        keys, counts = np.unique(keys, return_counts=True)
+        rows = np.empty((len(keys), len(sizes)), dtype=np.int64)
+        for q in reversed(range(len(sizes))):
+            keys, rows[:, q] = np.divmod(keys, sizes[q])
+    else:
+        rows, counts = np.unique(np.column_stack([ids for _, ids in questions.values()]),
+                                 axis=0, return_counts=True)
+    return {tuple(answers[q][i] for q, i in enumerate(row)): int(n) for row, n in zip(rows, counts)}
+
+
+def count_pair_answers(questions, pairs):
+    """{(first, second): {(first answer, second answer): respondents}} from answer_ids"""
+    return {pair: count_joint_answers({col: questions[col] for col in pair})
+            for pair in pairs if all(col in questions for col in pair)}
+
+
+def merge_patterns(stored, patterns):
+    for answer, n in patterns.items():
+        stored[answer] = stored.get(answer, 0) + n
+
+
+def format_timestamp(stamp):
+    """Timestamp as the form scripts write it (ISO 8601 with milliseconds, Z for UTC)"""
+    if pd.isna(stamp):
+        return str(stamp)
+    text = stamp.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3]
+    if stamp.tzinfo is not None:
+        offset = stamp.strftime('%z')
+        text += 'Z' if offset == '+0000' else f"{offset[:3]}:{offset[3:]}"
+    return text
+
+
+class PollResults:
+    """
+    Every aggregate the reports and charts need, computed once per poll
+
+    Holds the response count, the Timestamp range and a counts Series for each
+    single- and multi-select column, so the text report, PNG charts, Plotly
+    charts and summary CSV all read the same numbers.
+    """
+
+    def __init__(self, schema, total, date_range, counts, df=None, matrices=None,
+                 patterns=None, joint=None, pairs=None):
+        self.schema = schema
+        self.total = total
+        self.date_range = date_range
+        self.counts = counts
+        self.df = df
+        self.matrices = matrices
+        self.patterns = patterns
+        self.joint = joint
+        self.pairs = pairs
+
+    @classmethod
+    def from_responses(cls, schema, df, matrices):
+        """Count every question of a loaded poll"""
+        date_range = None
+        if 'Timestamp' in df.columns:
+            date_range = (df['Timestamp'].min(), df['Timestamp'].max())
+
+        counts = {}
+        for col in schema.columns:
+            if col in matrices:
+                counts[col] = matrices[col].counts()
+            elif col in schema.singleselect and col in df.columns:
+                counts[col] = count_singleselect(df, col)
+
+        return cls(schema, len(df), date_range, counts, df, matrices)
+
+    def answer_patterns(self):
+        """{question: {answer: respondents}} of every select question (None if unknown)
+
+        An answer is the sorted tuple of options picked, () for no answer.
+        Questions with more than PATTERN_LIMIT distinct answers map to None.
+        Loaded polls work it out from their matrices on first use; streamed
+        results get it from RunningCounts.
+        """
+        if self.patterns is None and self.matrices is not None:
+            self.load_patterns()
+        return self.patterns
+
+    def joint_patterns(self):
+        """{(answer to every question): respondents}, None above JOINT_PATTERN_ROWS responses"""
+        if self.joint is None and self.matrices is not None and self.total <= JOINT_PATTERN_ROWS:
+            self.load_patterns()
+        return self.joint
+
+    def pair_patterns(self, first, second):
+        """{(first answer, second answer): respondents} of a schema pair (None if unknown)"""
+        if self.pairs is None and self.matrices is not None:
+            columns = {col for pair in self.schema.pairs for col in pair}
+            questions = answer_ids(self.schema, self.df, self.matrices, columns)
+            self.pairs = count_pair_answers(questions, self.schema.pairs)
+        return (self.pairs or {}).get((first, second))
+
+    def load_patterns(self):
+        questions = answer_ids(self.schema, self.df, self.matrices)
+        self.patterns = limit_patterns(count_answers(questions))
+        self.pairs = count_pair_answers(questions, self.schema.pairs)
+        if self.total <= JOINT_PATTERN_ROWS:
+            self.joint = count_joint_answers(questions)
+
+    def has(self, column):
+        """True if the poll has this question"""
+        return column in self.counts
+
+    def get(self, column):
+        """Counts for a question (most popular first), empty if it is missing"""
+        return self.counts.get(column, pd.Series(dtype='int64'))
+
+
+class RunningCounts:
+    """
+    Option counters that can be fed one block of responses at a time
+
+    Keeps the total, the Timestamp range and, for every single- and
+    multi-select column, a dict of option -> count in first-seen order, so the
+    merged counts rank exactly like counting all the rows at once. The answer
+    patterns are kept as well (see PollResults.answer_patterns), so bootstrap
+    intervals come out the same as for the loaded poll. A question's patterns
+    are dropped once it has more than PATTERN_LIMIT distinct answers, so they
+    never grow with the number of responses. So are the combined answers of
+    the schema's question pairs, which are bounded by the options of the two
+    questions.
+    """
+
+    def __init__(self, schema, total=0, date_range=None, counts=None, patterns=None, joint=None,
+                 pairs=None):
+        self.schema = schema
+        self.total = total
+        self.date_range = date_range
+        self.counts = counts if counts is not None else {}
+        self.patterns = patterns if patterns is not None else {}
+        self.pairs = pairs if pairs is not None else {}
+        # None once there are more than JOINT_PATTERN_ROWS responses
+        self.joint = {} if joint is None and total == 0 else joint
+
+    def add(self, df):
+        """Count a block of parsed responses (see poll_loader.parse_responses)"""
+        if 'Timestamp' in df.columns:
+            first, last = df['Timestamp'].min(), df['Timestamp'].max()
+            if self.date_range is None:
+                self.date_range = (first, last)
+            else:
+                # min/max skip NaT, like the whole-column min/max do
+                low, high = self.date_range
+                self.date_range = (pd.Series([low, first]).min(),
+                                   pd.Series([high, last]).max())
+
+        matrices = encode_multiselect(df, self.schema.multiselect, self.schema.options)
+        for col, matrix in matrices.items():
+            self.merge(col, matrix.options, matrix.option_counts())
+        for col in self.schema.singleselect:
+            if col in df.columns:
+                # Categories are in first-seen order (see poll_loader.as_category)
+                block = df[col].value_counts(sort=False)
+                self.merge(col, block.index, block.to_numpy())
+
+        questions = answer_ids(self.schema, df, matrices)
+        for col, patterns in count_answers(questions).items():
+            if col in self.patterns and self.patterns[col] is None:
+                continue
+            merge_patterns(self.patterns.setdefault(col, {}), patterns)
+        self.patterns = limit_patterns(self.patterns)
+        for pair, patterns in count_pair_answers(questions, self.schema.pairs).items():
+            merge_patterns(self.pairs.setdefault(pair, {}), patterns)
+        if self.joint is not None:
+            if self.total + len(df) <= JOINT_PATTERN_ROWS:
+                merge_patterns(self.joint, count_joint_answers(questions))
+            else:
+                self.joint = None
+
+        self.total += len(df)
+
+    def merge(self, column, options, counts):
+        # Zero counts are kept so known options stay in form order across blocks
+        stored = self.counts.setdefault(column, {})
+        for option, n in zip(options, counts):
+            option = str(option)
+            stored[option] = stored.get(option, 0) + int(n)
+
+    def results(self):
+        """PollResults holding the merged counts (no DataFrame or matrices)"""
+        counts = {
+            col: rank_counts(list(self.counts[col]), list(self.counts[col].values()))
+            for col in self.schema.columns if col in self.counts
+        }
+        return PollResults(self.schema, self.total, self.date_range, counts,
+                           patterns=self.patterns, joint=self.joint, pairs=self.pairs)
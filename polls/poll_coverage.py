@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Joint day x start-time coverage for scheduling recommendations
+A respondent can attend a slot (day, start time) when they picked both that day
+and that start time. Respondents who gave the same days and the same start
+times are interchangeable, so coverage works on the distinct (days, times)
+answer pairs weighted by how many respondents gave each
+(PollResults.pair_patterns). Loaded, streamed and incremental results keep the
+same pairs, so they recommend the same slots, and the cost no longer grows
+with the number of responses.
+
+Every slot is a boolean mask over the answer pairs, so scoring a slot is a
+weighted sum and combining slots is an OR. best_slots() picks the k slots that
+together reach the most respondents (a rotating schedule) with lazy-greedy max
+coverage: a slot's gain can only shrink as other slots are picked, so stale
+gains in the heap are upper bounds and most slots are never rescored.
+"""
+
+import heapq
+
+import numpy as np
+
+from poll_counts import unlisted_label
+
+
+def slot_options(known, answers):
+    """Options of one question in form order, then any others picked (sorted)
+
+    The unlisted option (answers matching no form option) is left out since it
+    names no real day or time.
+    """
+    picked = {option for answer in answers for option in answer}
+    picked.discard(unlisted_label(known))
+    options = [option for option in known if option in picked]
+    return options + sorted(picked - set(options))
+
+
+def picked_masks(options, answers):
+    """options x answers boolean matrix: True where the answer includes the option"""
+    return np.array([[option in answer for answer in answers] for option in options],
+                    dtype=bool).reshape(len(options), len(answers))
+
+
+class SlotCoverage:
+    """Respondents who can attend every day x start-time slot"""
+
+    def __init__(self, patterns, day_options=(), time_options=()):
+        """patterns is PollResults.pair_patterns of the day and start-time questions
+
+        day_options / time_options are the form options of each question; they
+        only set the slot order (and so which of two tied slots comes first).
+        """
+        pairs = sorted(patterns)
+        self.weights = np.array([patterns[pair] for pair in pairs], dtype=np.int64)
+        days = slot_options(day_options, [day for day, _ in pairs])
+        times = slot_options(time_options, [time for _, time in pairs])
+        day_masks = picked_masks(days, [day for day, _ in pairs])
+        time_masks = picked_masks(times, [time for _, time in pairs])
+        self.slots = [(day, time) for day in days for time in times]
+        self.sets = (day_masks[:, None, :] & time_masks[None, :, :]).reshape(len(self.slots), len(pairs))
+
+    def scores(self):
+        """Respondents who can attend each slot, in slot order"""
+        return self.sets.astype(np.int64) @ self.weights
+
+    def ranked(self):
+        """(slot, respondents) for every slot, most attendable first"""
+        scores = self.scores()
+        order = np.argsort(-scores, kind='stable')
+        return [(self.slots[i], int(scores[i])) for i in order]
+
+    def best_slots(self, k):
+        """Greedy max coverage: up to k (slot, newly covered, total covered), in pick order"""
+        covered = np.zeros(self.sets.shape[1], dtype=bool)
+        # Max-heap of (-gain upper bound, slot index); ties go to the earlier slot
+        heap = [(-int(score), i) for i, score in enumerate(self.scores())]
+        heapq.heapify(heap)
+        picks = []
+        total = 0
+        while heap and len(picks) < k:
+            _, i = heapq.heappop(heap)
+            gain = int(self.weights[self.sets[i] & ~covered].sum())
+            if heap and gain < -heap[0][0]:
+                # Stale: another slot may now add more
+                heapq.heappush(heap, (-gain, i))
+                continue
+            if gain == 0:
+                break
+            covered |= self.sets[i]
+            total += gain
+            picks.append((self.slots[i], gain, total))
+        return picks
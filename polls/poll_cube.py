@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Precomputed segment cube for cross-tabulating poll questions
+Counts, for every option of every multi-select question, how many respondents
+also gave each answer of every select question (single-select values and
+multi-select options alike), e.g. how many picked "10:00 AM" among those whose
+Role is "Graduate Student", or "Cost" among those who would "Help organize".
+
+All of it is one integer matrix (multi-select options x select answers) built
+with a single chunked matrix product of the respondents' 0/1 indicator
+columns, plus the number of respondents behind each answer. Any cross-tab or
+segment is then a slice of that matrix, no matter how many responses there are.
+
+The cube is cached next to the CSV in
+polls/.poll_cache/<csv name>.cube.npz, keyed on the CSV's SHA-256, the poll
+schema and CUBE_VERSION.
+
+Run from the repository root:
+    python polls/poll_cube.py coffee_hour "Start Time" Role
+    python polls/poll_cube.py coffee_hour "Start Time" Role --value "Graduate Student"
+    python polls/poll_cube.py events "Main Barriers" "Participation Level" --percent
+    python polls/poll_cube.py events "Main Barriers" "Participation Level" --value "Help organize" --chart
+"""
+
+import argparse
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from poll_counts import rank_counts
+from poll_loader import cache_dir_for, file_hash, load_poll_results
+from poll_schema import MULTI_SELECT, POLLS, POLLS_DIR, SINGLE_SELECT, load_schema
+from poll_trace import span
+
+# Bump whenever the cube layout changes
+CUBE_VERSION = 3
+
+# Respondents per block of the indicator product (float32 sums stay exact below 2**24)
+CHUNK_ROWS = 1 << 16
+
+
+def cube_path_for(csv_file):
+    """Cube file for a CSV: <csv folder>/.poll_cache/<csv file name>.cube.npz"""
+    cache_dir = cache_dir_for(csv_file)
+    return cache_dir.with_name(f"{cache_dir.name}.cube.npz")
+
+
+class SegmentCube:
+    """
+    Respondent counts of every multi-select option against every select answer
+
+    counts[i, j] is the number of respondents who picked measure option i and
+    gave dimension answer j. measures and dims map each question to the slice
+    of rows or columns holding its options / answers.
+    """
+
+    def __init__(self, total, measures, dims, counts, dim_totals):
+        self.total = total
+        self.measures = measures
+        self.dims = dims
+        self.counts = counts
+        self.dim_totals = dim_totals
+        self.measure_slices = self.slices(measures)
+        self.dim_slices = self.slices(dims)
+
+    @staticmethod
+    def slices(groups):
+        positions, start = {}, 0
+        for question, labels in groups.items():
+            positions[question] = slice(start, start + len(labels))
+            start += len(labels)
+        return positions
+
+    def check(self, measure, dim):
+        if measure not in self.measures:
+            raise KeyError(f"'{measure}' is not a multi-select question "
+                           f"(expected one of: {', '.join(self.measures)})")
+        if dim not in self.dims:
+            raise KeyError(f"'{dim}' is not a select question "
+                           f"(expected one of: {', '.join(self.dims)})")
+
+    def crosstab(self, measure, dim, percent=False):
+        """Options of measure (rows) x answers of dim (columns)
+
+        With percent=True each column is the share (0-100) of that segment's
+        respondents who picked each option.
+        """
+        self.check(measure, dim)
+        table = self.counts[self.measure_slices[measure], self.dim_slices[dim]]
+        frame = pd.DataFrame(table, index=self.measures[measure], columns=self.dims[dim])
+        if percent:
+            sizes = self.dim_totals[self.dim_slices[dim]]
+            frame = frame / np.where(sizes > 0, sizes, 1) * 100
+        return frame
+
+    def segment_size(self, dim, value):
+        """Respondents who gave this answer"""
+        return int(self.dim_totals[self.dim_slices[dim]][self.dims[dim].index(value)])
+
+    def segment_counts(self, measure, dim, value):
+        """Counts of measure among respondents who gave this answer (most popular first)"""
+        self.check(measure, dim)
+        if value not in self.dims[dim]:
+            raise KeyError(f"'{value}' is not an answer to '{dim}'")
+        column = self.dim_slices[dim].start + self.dims[dim].index(value)
+        return rank_counts(self.measures[measure], self.counts[self.measure_slices[measure], column])
+
+    def save(self, path, key):
+        meta = dict(key, total=self.total, measures=self.measures, dims=self.dims)
+        tmp_path = path.with_name(f"{path.stem}.tmp{os.getpid()}.npz")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(tmp_path, counts=self.counts, dim_totals=self.dim_totals,
+                            meta=np.array(json.dumps(meta)))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, key):
+        """Cube stored at path, or None if it is missing or stale"""
+        try:
+            with np.load(path) as data:
+                meta = json.loads(str(data['meta']))
+                if any(meta.get(name) != value for name, value in key.items()):
+                    return None
+                return cls(meta['total'], meta['measures'], meta['dims'],
+                           data['counts'], data['dim_totals'])
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+def indicator_columns(results):
+    """(measures, dims, measure blocks, dim blocks) of a loaded poll
+
+    Blocks are callables returning the 0/1 indicator columns of rows start:stop,
+    so the whole respondents x answers matrix never has to exist at once.
+    """
+    schema, df, matrices = results.schema, results.df, results.matrices
+    measures, dims = {}, {}
+    measure_blocks, dim_blocks = [], []
+
+    def option_block(matrix):
+        return lambda start, stop: np.unpackbits(matrix.bits[start:stop], axis=1,
+                                                 count=len(matrix.options))
+
+    def value_block(codes, n_values):
+        return lambda start, stop: (codes[start:stop, None] == np.arange(n_values)).astype(np.uint8)
+
+    for col in schema.columns:
+        kind = schema.kind(col)
+        if kind == MULTI_SELECT and col in matrices:
+            matrix = matrices[col]
+            measures[col] = list(matrix.options)
+            measure_blocks.append(option_block(matrix))
+            dims[col] = list(matrix.options)
+            dim_blocks.append(option_block(matrix))
+        elif kind == SINGLE_SELECT and col in df.columns:
+            values = df[col].cat.categories
+            dims[col] = [str(value) for value in values]
+            # Code -1 (no answer) matches no value
+            dim_blocks.append(value_block(np.asarray(df[col].cat.codes), len(values)))
+    return measures, dims, measure_blocks, dim_blocks
+
+
+def build_cube(results):
+    """Segment cube of a poll loaded with load_poll_results"""
+    measures, dims, measure_blocks, dim_blocks = indicator_columns(results)
+    n_measures = sum(len(options) for options in measures.values())
+    n_dims = sum(len(values) for values in dims.values())
+    counts = np.zeros((n_measures, n_dims), dtype=np.int64)
+    dim_totals = np.zeros(n_dims, dtype=np.int64)
+
+    for start in range(0, results.total, CHUNK_ROWS):
+        stop = min(start + CHUNK_ROWS, results.total)
+        left = np.hstack([block(start, stop) for block in measure_blocks]).astype(np.float32)
+        right = np.hstack([block(start, stop) for block in dim_blocks]).astype(np.float32)
+        counts += (left.T @ right).astype(np.int64)
+        dim_totals += right.sum(axis=0).astype(np.int64)
+
+    return SegmentCube(results.total, measures, dims, counts.astype(np.int32),
+                       dim_totals.astype(np.int32))
+
+
+def load_cube(poll, csv_file=None):
+    """Segment cube of a poll, built from its responses only when the CSV changed"""
+    if csv_file is None:
+        csv_file = POLLS_DIR / POLLS[poll]['responses']
+    csv_file = Path(csv_file)
+    key = {
+        'version': CUBE_VERSION,
+        'schema': load_schema(poll).fingerprint(),
+        'csv_hash': file_hash(csv_file),
+    }
+    path = cube_path_for(csv_file)
+    cube = SegmentCube.load(path, key)
+    if cube is None:
+        with span(f'build cube {poll}', 'aggregate'):
+            cube = build_cube(load_poll_results(poll, csv_file))
+        try:
+            cube.save(path, key)
+        except OSError as e:
+            print(f"  ⚠ Could not write cube for {csv_file}: {e}")
+    return cube
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-tabulate a multi-select question by another question")
+    parser.add_argument('poll', choices=list(POLLS))
+    parser.add_argument('measure', help="multi-select question to count, e.g. 'Start Time'")
+    parser.add_argument('dim', help="question to split by, e.g. Role")
+    parser.add_argument('--value', help="only respondents who gave this answer to dim")
+    parser.add_argument('--percent', action='store_true',
+                        help="share of each segment instead of respondent counts")
+    parser.add_argument('--chart', action='store_true',
+                        help="with --value, also write an interactive bar chart of the segment")
+    parser.add_argument('--csv', help="response CSV (default: the poll's own responses)")
+    args = parser.parse_args()
+
+    cube = load_cube(args.poll, args.csv)
+    try:
+        if args.value is None:
+            table = cube.crosstab(args.measure, args.dim, percent=args.percent)
+            print(f"\n{args.measure} by {args.dim} ({cube.total} responses)")
+            print("-" * 60)
+            print(table.round(1).to_string() if args.percent else table.to_string())
+            return
+
+        counts = cube.segment_counts(args.measure, args.dim, args.value)
+        size = cube.segment_size(args.dim, args.value)
+    except KeyError as e:
+        parser.error(e.args[0])
+
+    print(f"\n{args.measure} among {args.dim} = {args.value} ({size} respondents)")
+    print("-" * 60)
+    for item, count in counts.items():
+        percentage = (count / size) * 100 if size else 0.0
+        bar = "█" * int(percentage / 2)
+        print(f"{item:<45} {count:>3} ({percentage:>5.1f}%) {bar}")
+
+    if args.chart:
+        import create_all_interactive_charts as charts
+        output_dir = Path(f'polls/analysis_results/segments_{args.poll}')
+        output_dir.mkdir(parents=True, exist_ok=True)
+        name = f"{args.measure} {args.dim} {args.value}".lower()
+        slug = ''.join(char if char.isalnum() else '_' for char in name).strip('_')
+        charts.create_interactive_bar(counts, f"{args.measure} ({args.value})",
+                                      output_dir / f'{slug}.html')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Permutation tests for differences between respondent groups
+Splits respondents by their answer to a single-select question (Role,
+Frequency, ...) and tests, for every option of another select question,
+whether the groups pick it at different rates:
+
+- overall: does the share who picked the option differ between the groups?
+  (chi-square statistic of the groups x picked/not-picked table)
+- per group: does this group pick the option more or less often than
+  everyone else? (how far the group's count is from its expected count)
+
+p-values come from random relabelings of the respondents, which keep the
+group sizes and every option's total and shuffle who is in which group.
+Under a relabeling, the number of an option's pickers that lands in each group
+is multivariate hypergeometric, so each option's permutation distribution is
+drawn directly (group by group, for all permutations and options at once)
+instead of shuffling and recounting the respondents; the cost does not grow
+with the number of responses. p-values are then corrected for testing every
+option (overall tests) and every option x group (per-group tests) of a
+question: Holm by default, or Benjamini-Hochberg / Bonferroni.
+
+Every (question, grouping) pair is an independent task; several pairs run in
+a process pool, each with its own random stream spawned from one seed, so the
+results for a given seed do not depend on the number of workers.
+
+Run from the repository root:
+    python polls/poll_group_tests.py coffee_hour Role
+    python polls/poll_group_tests.py coffee_hour Frequency --groups Weekly Monthly --measure "Preferred Days" Barriers
+    python polls/poll_group_tests.py events "Event Budget" --correction fdr_bh --chart
+    python polls/poll_group_tests.py 3d_merch --all -j 4 --table polls/analysis_results/group_tests_3d_merch.csv
+"""
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from poll_counts import rank_counts
+from poll_cube import indicator_columns
+from poll_loader import load_poll_results
+from poll_schema import POLLS, POLLS_DIR, SINGLE_SELECT
+from poll_trace import span
+
+PERMUTATIONS = 10000
+ALPHA = 0.05
+SEED = 0
+CORRECTIONS = ('holm', 'fdr_bh', 'bonferroni', 'none')
+
+# Chart label markers of options a group picks significantly more / less often
+HIGHER = '▲'
+LOWER = '▼'
+
+# Results loaded once per worker process (see run_tests)
+_worker_results = None
+
+
+def adjust_pvalues(pvalues, method='holm'):
+    """p-values corrected for testing all of them (any shape)
+
+    holm and bonferroni bound the family-wise error rate, fdr_bh
+    (Benjamini-Hochberg) the false discovery rate.
+    """
+    p = np.asarray(pvalues, dtype=np.float64)
+    flat = p.ravel()
+    m = len(flat)
+    if method == 'none' or m == 0:
+        return p.copy()
+    if method == 'bonferroni':
+        return np.minimum(p * m, 1.0)
+
+    adjusted = np.empty(m)
+    if method == 'holm':
+        order = np.argsort(flat, kind='stable')
+        adjusted[order] = np.maximum.accumulate(flat[order] * (m - np.arange(m)))
+    elif method == 'fdr_bh':
+        order = np.argsort(flat, kind='stable')[::-1]
+        adjusted[order] = np.minimum.accumulate(flat[order] * m / (m - np.arange(m)))
+    else:
+        raise ValueError(f"unknown correction '{method}' (expected one of: {', '.join(CORRECTIONS)})")
+    return np.minimum(adjusted, 1.0).reshape(p.shape)
+
+
+def group_codes(results, group, values=None):
+    """(group labels, code per respondent) for a single-select question; code -1 = left out
+
+    values picks (and orders) the groups to compare; by default every answer
+    someone gave, most common first. Respondents in no compared group are left out.
+    """
+    if results.schema.kind(group) != SINGLE_SELECT or group not in results.df.columns:
+        raise KeyError(f"'{group}' is not a single-select question "
+                       f"(expected one of: {', '.join(results.schema.singleselect)})")
+    column = results.df[group]
+    answers = [str(value) for value in column.cat.categories]
+    given = [value for value in results.get(group).index if value in answers]
+    if values is None:
+        values = given
+    unknown = [value for value in values if value not in given]
+    if unknown:
+        raise KeyError(f"'{unknown[0]}' is not an answer anyone gave to '{group}'")
+    if len(values) < 2:
+        raise KeyError(f"'{group}' needs at least two groups to compare")
+
+    lookup = np.full(len(answers) + 1, -1, dtype=np.int64)
+    for g, value in enumerate(values):
+        lookup[answers.index(value)] = g
+    # Code -1 (no answer) indexes the trailing -1
+    return list(values), lookup[np.asarray(column.cat.codes, dtype=np.int64)]
+
+
+def measure_indicators(results, measure):
+    """(options, respondents x options 0/1 matrix) of any select question"""
+    _, dims, _, dim_blocks = indicator_columns(results)
+    for question, block in zip(dims, dim_blocks):
+        if question == measure:
+            return dims[question], block(0, results.total)
+    raise KeyError(f"'{measure}' is not a select question (expected one of: {', '.join(dims)})")
+
+
+def permuted_counts(sizes, totals, permutations, rng):
+    """Pickers of each option in each group under random relabelings (permutations x groups x options)
+
+    Drawn group by group: group g gets a hypergeometric share of the pickers
+    not yet placed, out of the respondents not yet placed.
+    """
+    counts = np.empty((permutations, len(sizes), len(totals)), dtype=np.int64)
+    pickers = np.broadcast_to(np.asarray(totals, dtype=np.int64), (permutations, len(totals))).copy()
+    people = int(np.sum(sizes))
+    for g, size in enumerate(sizes[:-1]):
+        counts[:, g] = rng.hypergeometric(pickers, people - pickers, int(size)) if size else 0
+        pickers -= counts[:, g]
+        people -= int(size)
+    counts[:, -1] = pickers
+    return counts
+
+
+def statistics(counts, sizes, totals):
+    """(chi-square per option, count - expected per group and option) of group x option counts
+
+    counts has the groups and options as its last two axes.
+    """
+    n = sizes.sum()
+    expected = sizes[:, None] * totals[None, :] / n
+    deviation = counts - expected
+    # Chi-square of each option's groups x (picked, not picked) table
+    spread = totals * (n - totals) / n
+    chi_square = (deviation ** 2 / sizes[:, None]).sum(axis=-2) * n / np.where(spread > 0, spread, 1)
+    return chi_square, deviation
+
+
+class GroupDifferences:
+    """Permutation test results of one question across the groups of another
+
+    counts[g, j] is how many respondents of group g picked option j; p values
+    are per option (overall) and per group x option (this group vs the rest),
+    with the corrected ones in adjusted / adjusted_cells.
+    """
+
+    def __init__(self, measure, group, options, groups, sizes, counts, pvalues, cell_pvalues,
+                 permutations, correction, alpha=ALPHA):
+        self.measure = measure
+        self.group = group
+        self.options = options
+        self.groups = groups
+        self.sizes = sizes
+        self.counts = counts
+        self.pvalues = pvalues
+        self.cell_pvalues = cell_pvalues
+        self.permutations = permutations
+        self.correction = correction
+        self.alpha = alpha
+        self.adjusted = adjust_pvalues(pvalues, correction)
+        self.adjusted_cells = adjust_pvalues(cell_pvalues, correction)
+
+    @property
+    def shares(self):
+        """Percentage of each group (rows) who picked each option (columns)"""
+        return self.counts / np.where(self.sizes > 0, self.sizes, 1)[:, None] * 100
+
+    def directions(self):
+        """+1 / -1 where a group picks an option significantly more / less often than the rest, else 0"""
+        _, deviation = statistics(self.counts, self.sizes, self.counts.sum(axis=0))
+        return np.sign(deviation).astype(int) * (self.adjusted_cells < self.alpha)
+
+    def table(self):
+        """One row per option: each group's share, the share range, p values and flags"""
+        shares = self.shares
+        frame = pd.DataFrame(shares.T.round(1), index=self.options,
+                             columns=[f"{value} %" for value in self.groups])
+        frame['Range'] = (shares.max(axis=0) - shares.min(axis=0)).round(1)
+        frame['p'] = self.pvalues
+        frame['p adj'] = self.adjusted
+        frame['Differs'] = self.adjusted < self.alpha
+        directions = self.directions()
+        frame['Higher'] = [', '.join(g for g, d in zip(self.groups, directions[:, j]) if d > 0)
+                           for j in range(len(self.options))]
+        frame['Lower'] = [', '.join(g for g, d in zip(self.groups, directions[:, j]) if d < 0)
+                          for j in range(len(self.options))]
+        frame.index.name = self.measure
+        return frame
+
+    def flags(self, value):
+        """{option: marker} of the options one group picks significantly more (▲) or less (▼) often"""
+        g = self.groups.index(value)
+        return {option: HIGHER if d > 0 else LOWER
+                for option, d in zip(self.options, self.directions()[g]) if d}
+
+    def group_counts(self, value):
+        """Counts of the options among one group (most popular first)"""
+        return rank_counts(self.options, self.counts[self.groups.index(value)])
+
+
+def test_groups(results, measure, group, values=None, permutations=PERMUTATIONS, seed=SEED,
+                correction='holm', alpha=ALPHA):
+    """Permutation tests of every option of measure across the groups of group"""
+    groups, codes = group_codes(results, group, values)
+    options, indicators = measure_indicators(results, measure)
+    kept = codes >= 0
+    # Groups x options counts in one product of the group and option indicator columns
+    members = (codes[kept, None] == np.arange(len(groups))).astype(np.float32)
+    counts = np.rint(members.T @ indicators[kept].astype(np.float32)).astype(np.int64)
+    sizes = members.sum(axis=0).astype(np.int64)
+    totals = counts.sum(axis=0)
+
+    with span(f'permutation test {measure} by {group}', 'aggregate', permutations=permutations):
+        observed, observed_deviation = statistics(counts, sizes, totals)
+        permuted, permuted_deviation = statistics(
+            permuted_counts(sizes, totals, permutations, np.random.default_rng(seed)), sizes, totals)
+        # Relative tolerance so ties in floating point count as reaching the observed value
+        tolerance = 1e-9
+        reached = (permuted >= observed * (1 - tolerance)).sum(axis=0)
+        cells_reached = (np.abs(permuted_deviation) >= np.abs(observed_deviation) * (1 - tolerance)).sum(axis=0)
+
+    pvalues = (1 + reached) / (1 + permutations)
+    cell_pvalues = (1 + cells_reached) / (1 + permutations)
+    return GroupDifferences(measure, group, options, groups, sizes, counts, pvalues, cell_pvalues,
+                            permutations, correction, alpha)
+
+
+def _load_worker(poll, csv_file):
+    global _worker_results
+    _worker_results = load_poll_results(poll, csv_file)
+
+
+def _test_worker(measure, group, values, permutations, seed, correction, alpha):
+    return test_groups(_worker_results, measure, group, values, permutations, seed, correction, alpha)
+
+
+def run_tests(poll, pairs, csv_file=None, permutations=PERMUTATIONS, seed=SEED, correction='holm',
+              alpha=ALPHA, jobs=None):
+    """GroupDifferences of every (measure, group, values) pair, in order
+
+    Several pairs run in a process pool whose workers load the poll once each.
+    """
+    seeds = np.random.SeedSequence(seed).spawn(len(pairs))
+    args = [(measure, group, values, permutations, pair_seed, correction, alpha)
+            for (measure, group, values), pair_seed in zip(pairs, seeds)]
+    jobs = min(jobs or os.cpu_count(), len(pairs))
+    if jobs <= 1:
+        results = load_poll_results(poll, csv_file)
+        return [test_groups(results, *pair_args) for pair_args in args]
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_load_worker,
+                             initargs=(poll, csv_file)) as pool:
+        return list(pool.map(_test_worker, *zip(*args)))
+
+
+def print_test(test):
+    sizes = ', '.join(f"{value} {size}" for value, size in zip(test.groups, test.sizes))
+    print(f"\n{test.measure} by {test.group} ({sizes}; {test.permutations} permutations, {test.correction})")
+    print("-" * 60)
+    table = test.table()
+    shown = table.drop(columns=['Differs', 'Higher', 'Lower'])
+    shown['p'] = shown['p'].map(lambda p: f"{p:.4f}")
+    shown['p adj'] = shown['p adj'].map(lambda p: f"{p:.4f}")
+    shown[''] = ['*' if differs else '' for differs in table['Differs']]
+    print(shown.to_string())
+    for option, row in table[table['Differs']].iterrows():
+        notes = [f"higher: {row['Higher']}" if row['Higher'] else '',
+                 f"lower: {row['Lower']}" if row['Lower'] else '']
+        notes = '; '.join(note for note in notes if note)
+        print(f"  * {option}" + (f" ({notes})" if notes else ''))
+    print(f"{int(table['Differs'].sum())} of {len(table)} options differ between groups "
+          f"(adjusted p < {test.alpha})")
+
+
+def write_charts(poll, test):
+    """One bar chart per group, with the options it picks significantly more / less often marked"""
+    import create_all_interactive_charts as charts
+    output_dir = Path(f'polls/analysis_results/group_tests_{poll}')
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for value in test.groups:
+        counts = test.group_counts(value)
+        flags = test.flags(value)
+        counts.index = [f"{option} {flags[option]}" if option in flags else option
+                        for option in counts.index]
+        name = f"{test.measure} by {test.group} {value}".lower()
+        slug = ''.join(char if char.isalnum() else '_' for char in name).strip('_')
+        charts.create_interactive_bar(counts, f"{test.measure} ({value})", output_dir / f'{slug}.html')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test whether groups of respondents answer a question differently")
+    parser.add_argument('poll', choices=list(POLLS))
+    parser.add_argument('group', nargs='?', help="single-select question to split by, e.g. Role")
+    parser.add_argument('--groups', nargs='+', metavar='ANSWER',
+                        help="answers of the group question to compare (default: all)")
+    parser.add_argument('--measure', nargs='+', metavar='QUESTION',
+                        help="questions to test (default: every other select question)")
+    parser.add_argument('--all', action='store_true',
+                        help="test every select question against every single-select question")
+    parser.add_argument('--permutations', type=int, default=PERMUTATIONS)
+    parser.add_argument('--correction', choices=CORRECTIONS, default='holm')
+    parser.add_argument('--alpha', type=float, default=ALPHA)
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('-j', '--jobs', type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument('--table', help="also write every result table to this CSV file")
+    parser.add_argument('--chart', action='store_true',
+                        help="write a bar chart per group with the significant options marked")
+    parser.add_argument('--csv', help="response CSV (default: the poll's own responses)")
+    args = parser.parse_args()
+    if args.group is None and not args.all:
+        parser.error("give a group question or --all")
+
+    csv_file = Path(args.csv) if args.csv else POLLS_DIR / POLLS[args.poll]['responses']
+    results = load_poll_results(args.poll, csv_file)
+    schema = results.schema
+    selects = [col for col in schema.columns if results.has(col)]
+    group_questions = [col for col in schema.singleselect if results.has(col)] if args.all else [args.group]
+    pairs = []
+    for group in group_questions:
+        for measure in args.measure or selects:
+            if measure != group:
+                pairs.append((measure, group, args.groups))
+
+    try:
+        for measure, group, values in pairs:
+            group_codes(results, group, values)
+            if measure not in selects:
+                raise KeyError(f"'{measure}' is not a select question (expected one of: {', '.join(selects)})")
+    except KeyError as e:
+        parser.error(e.args[0])
+
+    tests = run_tests(args.poll, pairs, csv_file, args.permutations, args.seed, args.correction,
+                      args.alpha, args.jobs)
+    for test in tests:
+        print_test(test)
+        if args.chart:
+            write_charts(args.poll, test)
+
+    differing = [test for test in tests if test.table()['Differs'].any()]
+    print(f"\n✓ {len(tests)} question(s) tested, {len(differing)} with differences between groups")
+
+    if args.table:
+        frames = []
+        for test in tests:
+            frame = test.table().reset_index(names='Option')
+            frame.insert(0, 'Group Question', test.group)
+            frame.insert(0, 'Question', test.measure)
+            frames.append(frame)
+        pd.concat(frames).to_csv(args.table, index=False)
+        print(f"✓ Tables exported to '{args.table}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Incremental refresh for poll response CSVs
+Keeps per-option counters, the answer patterns the bootstrap intervals and
+coffee hour slot coverage are drawn from, the response count and a Timestamp watermark in
+polls/.poll_cache/<csv name>.counts.json. When the CSV has only grown since the
+last run, only the new rows are parsed and their counts merged into the stored
+totals, so a refresh costs O(new rows) instead of O(all rows).
+
+The stored counters are thrown away and rebuilt from the whole file when:
+- the header, schema, state version or PATTERN_LIMIT changed
+- the end of the bytes already processed changed (checked with a hash of the
+  last TAIL_BYTES bytes, so the file was truncated, rewritten or re-exported)
+- a new row is older than the watermark (rows were reordered or back-filled)
+- the last processed row had no line ending yet (it may have been half-written)
+
+Edits to older rows further up the file are not noticed; delete the
+.counts.json file to force a full recount after hand-editing responses.
+"""
+
+import hashlib
+import io
+import json
+import os
+
+import pandas as pd
+
+from poll_counts import PATTERN_LIMIT, RunningCounts
+from poll_loader import cache_dir_for, parse_responses
+from poll_schema import POLLS, POLLS_DIR, load_schema
+from poll_trace import span
+
+# Bump whenever the layout of the state file changes
+STATE_VERSION = 6
+
+# Bytes just before the processed offset that must be unchanged on the next run
+TAIL_BYTES = 4096
+
+
+def state_path_for(csv_file):
+    """State file for a CSV: <csv folder>/.poll_cache/<csv file name>.counts.json"""
+    cache_dir = cache_dir_for(csv_file)
+    return cache_dir.with_name(f"{cache_dir.name}.counts.json")
+
+
+def tail_hash(data):
+    return hashlib.sha256(data[-TAIL_BYTES:]).hexdigest()
+
+
+def empty_state(schema, header):
+    return {
+        'version': STATE_VERSION,
+        'schema': schema.fingerprint(),
+        'header': header.decode('utf-8'),
+        'offset': len(header),
+        'tail': tail_hash(header),
+        'rows': 0,
+        'date_range': None,
+        'counts': {},
+        'patterns': {},
+        'pattern_limit': PATTERN_LIMIT,
+        'joint': None,
+        'pairs': [],
+    }
+
+
+def counters_from_state(schema, state):
+    date_range = state['date_range']
+    if date_range is not None:
+        date_range = tuple(pd.Timestamp(stamp) for stamp in date_range)
+    # Answers are stored as lists (JSON has no tuples)
+    patterns = {col: {tuple(answer): n for answer, n in answers} if answers is not None else None
+                for col, answers in state['patterns'].items()}
+    joint = state['joint']
+    if joint is not None:
+        joint = {tuple(tuple(answer) for answer in key): n for key, n in joint}
+    pairs = {tuple(pair): {tuple(tuple(answer) for answer in key): n for key, n in answers}
+             for pair, answers in state['pairs']}
+    return RunningCounts(schema, state['rows'], date_range, state['counts'], patterns, joint, pairs)
+
+
+def store_counters(state, counters):
+    state['rows'] = counters.total
+    state['counts'] = counters.counts
+    state['patterns'] = {col: [[list(answer), n] for answer, n in answers.items()]
+                         if answers is not None else None
+                         for col, answers in counters.patterns.items()}
+    state['pairs'] = [[list(pair), [[[list(answer) for answer in key], n] for key, n in answers.items()]]
+                      for pair, answers in counters.pairs.items()]
+    if counters.joint is not None:
+        state['joint'] = [[[list(answer) for answer in key], n] for key, n in counters.joint.items()]
+    else:
+        state['joint'] = None
+    if counters.date_range is not None:
+        state['date_range'] = [stamp.isoformat() for stamp in counters.date_range]
+
+
+def behind_watermark(counters, df):
+    """True if the block has a row older than the newest row already counted"""
+    if counters.date_range is None or 'Timestamp' not in df.columns:
+        return False
+    watermark = counters.date_range[1]
+    return pd.notna(watermark) and df['Timestamp'].min() < watermark
+
+
+def read_state(state_path, schema, header):
+    try:
+        with open(state_path, encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if (state.get('version') != STATE_VERSION
+            or state.get('schema') != schema.fingerprint()
+            or state.get('pattern_limit') != PATTERN_LIMIT
+            or state.get('header') != header.decode('utf-8')):
+        return None
+    return state
+
+
+def write_state(state_path, state):
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = state_path.with_name(f"{state_path.name}.tmp{os.getpid()}")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_path)
+
+
+def read_processed_tail(f, offset):
+    """The last TAIL_BYTES bytes before offset"""
+    start = max(0, offset - TAIL_BYTES)
+    f.seek(start)
+    return f.read(offset - start)
+
+
+def parse_new_rows(header, new_bytes, schema):
+    """Parse appended rows; returns (df, bytes used)
+
+    A row that is still being written (e.g. an unterminated quote) is left for
+    the next run.
+    """
+    try:
+        return parse_responses(io.BytesIO(header + new_bytes), schema), len(new_bytes)
+    except pd.errors.ParserError:
+        used = new_bytes.rfind(b'\n') + 1
+        return parse_responses(io.BytesIO(header + new_bytes[:used]), schema), used
+
+
+def update_counts(csv_file, schema):
+    """Bring the stored counters up to date and return (counters, new_rows, rebuilt)"""
+    state_path = state_path_for(csv_file)
+    with open(csv_file, 'rb') as f:
+        header = f.readline()
+        state = read_state(state_path, schema, header)
+
+        if state is not None:
+            # The processed bytes must still be there, unchanged
+            size = f.seek(0, os.SEEK_END)
+            if size < state['offset']:
+                state = None
+            else:
+                tail = read_processed_tail(f, state['offset'])
+                if tail_hash(tail) != state['tail']:
+                    state = None
+                elif size > state['offset'] and not tail.endswith(b'\n'):
+                    state = None
+
+        rebuilt = state is None
+        if rebuilt:
+            state = empty_state(schema, header)
+        counters = counters_from_state(schema, state)
+
+        f.seek(state['offset'])
+        new_bytes = f.read()
+
+        new_rows, used = 0, len(new_bytes)
+        if rebuilt or new_bytes.strip():
+            df, used = parse_new_rows(header, new_bytes, schema)
+            if behind_watermark(counters, df):
+                # Rows older than the watermark: start again from the whole file
+                state = empty_state(schema, header)
+                counters = counters_from_state(schema, state)
+                f.seek(state['offset'])
+                df, used = parse_new_rows(header, f.read(), schema)
+                rebuilt = True
+            counters.add(df)
+            new_rows = len(df)
+
+        store_counters(state, counters)
+        state['offset'] += used
+        state['tail'] = tail_hash(read_processed_tail(f, state['offset']))
+
+    write_state(state_path, state)
+    return counters, new_rows, rebuilt
+
+
+def load_poll_results_incremental(poll, csv_file=None):
+    """Incremental counterpart of poll_loader.load_poll_results
+
+    The returned PollResults has counts only (no DataFrame or option matrices).
+    """
+    schema = load_schema(poll)
+    if csv_file is None:
+        csv_file = POLLS_DIR / POLLS[poll]['responses']
+
+    with span(f'update counts {poll}', 'load', csv=str(csv_file)):
+        counters, new_rows, rebuilt = update_counts(csv_file, schema)
+    if rebuilt:
+        print(f"  Rebuilt counters from all {counters.total} responses")
+    else:
+        print(f"  Merged {new_rows} new responses (total {counters.total})")
+    return counters.results()
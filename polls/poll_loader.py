@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Shared loader for poll response CSVs
+Reads the Google Sheets export once using the poll's schema (see poll_schema.py):
+Timestamp is parsed as datetime, single- and multi-select answers are loaded as
+categoricals, free text and emails are skipped unless asked for, and every
+multi-select column is encoded into a bit-packed OptionMatrix
+
+Parsed responses are cached in a columnar binary format next to the CSV
+(polls/.poll_cache/<csv name>/), keyed on the CSV's SHA-256, CACHE_VERSION
+and the poll schema.
+Later runs memory-map the cached arrays instead of parsing the CSV again.
+Delete the .poll_cache folder to force a fresh parse.
+
+For exports too large to hold in memory, stream_poll_results reads the CSV in
+fixed-size blocks and only keeps running counters.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from poll_counts import OptionMatrix, PollResults, RunningCounts, encode_multiselect
+from poll_trace import span
+from poll_schema import (EMAIL, FREE_TEXT, MULTI_SELECT, POLLS, POLLS_DIR, SINGLE_SELECT,
+                         TIMESTAMP, load_schema)
+
+# Bump whenever the cache layout or the parsing rules change
+CACHE_VERSION = 5
+CACHE_DIR_NAME = '.poll_cache'
+
+# Rows per block in streaming mode
+CHUNK_ROWS = 50_000
+
+
+def file_hash(path):
+    """SHA-256 of a file's contents, read in 1 MB blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_dir_for(csv_file):
+    """Cache folder for a CSV: <csv folder>/.poll_cache/<csv file name>/"""
+    csv_file = Path(csv_file)
+    return csv_file.parent / CACHE_DIR_NAME / csv_file.name
+
+
+def as_category(series):
+    """Categorical with categories in first-seen order (keeps value_counts tie order)"""
+    return series.astype(pd.CategoricalDtype(pd.unique(series.dropna())))
+
+
+def keep_column(schema, column, include_text):
+    """Free text and emails are only loaded when asked for"""
+    return include_text or schema.kind(column) not in (FREE_TEXT, EMAIL)
+
+
+def parse_responses(csv_file, schema, include_text=False):
+    """Read a poll CSV and convert each column according to its schema kind"""
+    df = pd.read_csv(csv_file, dtype=str,
+                     usecols=lambda col: keep_column(schema, col, include_text))
+    return convert_columns(df, schema)
+
+
+def convert_columns(df, schema):
+    """Parse Timestamp as datetime and load select answers as categoricals (in place)"""
+    for col in df.columns:
+        kind = schema.kind(col)
+        if kind == TIMESTAMP:
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+        elif kind in (SINGLE_SELECT, MULTI_SELECT):
+            df[col] = as_category(df[col])
+    return df
+
+
+def write_column(folder, filename, col, series):
+    """Store one parsed column as folder/filename and return its meta.json entry"""
+    entry = {'name': col, 'file': filename}
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        values = series.cat.codes.to_numpy().astype(np.int32)
+        entry.update(kind='category', categories=[str(c) for c in series.cat.categories])
+    elif pd.api.types.is_datetime64_any_dtype(series.dtype):
+        tz = getattr(series.dtype, 'tz', None)
+        if tz is not None:
+            series = series.dt.tz_convert('UTC').dt.tz_localize(None)
+        # NaT is stored as the minimum int64, which numpy reads back as NaT
+        unit = series.dt.unit
+        values = series.astype('datetime64[ns]').to_numpy().view(np.int64)
+        entry.update(kind='datetime', unit=unit, tz=str(tz) if tz is not None else None)
+    elif pd.api.types.is_numeric_dtype(series.dtype):
+        values = series.to_numpy()
+        entry.update(kind='values')
+    else:
+        # Free text is stored as int32 codes + a vocabulary (-1 = blank)
+        codes, uniques = pd.factorize(series)
+        values = codes.astype(np.int32)
+        entry.update(kind='strings', categories=[str(u) for u in uniques])
+    np.save(Path(folder) / filename, values)
+    return entry
+
+
+def write_cache(cache_dir, key, header, df, matrices):
+    """Store the parsed responses and option matrices as .npy columns"""
+    cache_dir = Path(cache_dir)
+    tmp_dir = cache_dir.with_name(f"{cache_dir.name}.tmp{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    columns = [write_column(tmp_dir, f"col{i}.npy", col, df[col]) for i, col in enumerate(df.columns)]
+
+    multiselect = []
+    for j, (col, matrix) in enumerate(matrices.items()):
+        filename = f"ms{j}.npy"
+        np.save(tmp_dir / filename, np.asarray(matrix.bits))
+        multiselect.append({'name': col, 'file': filename, 'options': matrix.options})
+
+    meta = dict(key, header=list(header), n_rows=len(df), columns=columns,
+                multiselect=multiselect)
+    with open(tmp_dir / 'meta.json', 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.replace(tmp_dir, cache_dir)
+
+
+def extend_cache(cache_dir, meta, df):
+    """Add parsed columns to an existing cache folder (meta.json is replaced last)"""
+    cache_dir = Path(cache_dir)
+    for col in df.columns:
+        filename = f"col{len(meta['columns'])}.npy"
+        tmp_name = f"tmp{os.getpid()}.{filename}"
+        meta['columns'].append(write_column(cache_dir, tmp_name, col, df[col]))
+        meta['columns'][-1]['file'] = filename
+        os.replace(cache_dir / tmp_name, cache_dir / filename)
+
+    tmp_meta = cache_dir / f"meta.tmp{os.getpid()}.json"
+    with open(tmp_meta, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(tmp_meta, cache_dir / 'meta.json')
+
+
+def read_cache(cache_dir, key, schema, include_text=False, csv_file=None):
+    """Memory-map a cache folder, or return None if it is missing or stale
+
+    Columns the cache does not hold yet (free text, when it was built without)
+    are parsed from csv_file on their own and added to the cache; without
+    csv_file the cache counts as stale.
+    """
+    cache_dir = Path(cache_dir)
+    try:
+        with open(cache_dir / 'meta.json', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if any(meta.get(name) != value for name, value in key.items()):
+        return None
+
+    entries = {entry['name']: entry for entry in meta['columns']}
+    columns = [col for col in meta['header'] if keep_column(schema, col, include_text)]
+    missing = [col for col in columns if col not in entries]
+    extra = pd.DataFrame()
+    if missing:
+        if csv_file is None:
+            return None
+        with span('parse new columns', 'load', columns=len(missing)):
+            extra = convert_columns(pd.read_csv(csv_file, dtype=str, usecols=missing), schema)
+        try:
+            with span('extend cache', 'write'):
+                extend_cache(cache_dir, meta, extra)
+        except OSError as e:
+            print(f"  ⚠ Could not extend cache for {csv_file}: {e}")
+
+    n_rows = meta['n_rows']
+    data = {}
+    for col in columns:
+        if col in extra.columns:
+            data[col] = extra[col].to_numpy()
+            continue
+        entry = entries[col]
+        values = np.load(cache_dir / entry['file'], mmap_mode='r')
+        if entry['kind'] == 'category':
+            data[col] = pd.Categorical.from_codes(values, categories=entry['categories'])
+        elif entry['kind'] == 'datetime':
+            stamps = pd.DatetimeIndex(np.asarray(values).view('datetime64[ns]')).as_unit(entry['unit'])
+            if entry['tz']:
+                stamps = stamps.tz_localize('UTC').tz_convert(entry['tz'])
+            data[col] = stamps
+        elif entry['kind'] == 'strings':
+            # Code -1 picks the trailing NaN, which restores blank answers
+            vocabulary = np.array(entry['categories'] + [np.nan], dtype=object)
+            data[col] = vocabulary[values]
+        else:
+            data[col] = values
+    df = pd.DataFrame(data, index=pd.RangeIndex(n_rows))
+
+    matrices = {}
+    for entry in meta['multiselect']:
+        bits = np.load(cache_dir / entry['file'], mmap_mode='r')
+        matrices[entry['name']] = OptionMatrix(bits, entry['options'], n_rows)
+
+    return df, matrices
+
+
+def load_poll(csv_file, schema, include_text=False, use_cache=True):
+    """Load a poll CSV using its schema and encode its multi-select columns
+
+    Free-text and email columns are only loaded when include_text=True.
+    Returns (df, matrices) where matrices maps column -> OptionMatrix.
+    """
+    with span('hash csv', 'load'):
+        key = {
+            'version': CACHE_VERSION,
+            'schema': schema.fingerprint(),
+            'csv_hash': file_hash(csv_file),
+        }
+    cache_dir = cache_dir_for(csv_file)
+
+    if use_cache:
+        with span('read cache', 'load'):
+            cached = read_cache(cache_dir, key, schema, include_text, csv_file)
+        if cached is not None:
+            return cached
+
+    with span('parse csv', 'load'):
+        df = parse_responses(csv_file, schema, include_text)
+    with span('encode multi-select', 'aggregate'):
+        matrices = encode_multiselect(df, schema.multiselect, schema.options)
+    if use_cache:
+        try:
+            with span('write cache', 'write'):
+                header = pd.read_csv(csv_file, nrows=0).columns
+                write_cache(cache_dir, key, header, df, matrices)
+        except OSError as e:
+            print(f"  ⚠ Could not write cache for {csv_file}: {e}")
+
+    return df, matrices
+
+
+def load_poll_results(poll, csv_file=None, **kwargs):
+    """Load a poll by name ('coffee_hour', 'events', '3d_merch') and count every question
+
+    Reads polls/<poll>_poll_responses.csv unless csv_file is given.
+    """
+    schema = load_schema(poll)
+    if csv_file is None:
+        csv_file = POLLS_DIR / POLLS[poll]['responses']
+    with span(f'load {poll}', 'load', csv=str(csv_file)):
+        df, matrices = load_poll(csv_file, schema, **kwargs)
+    with span('count questions', 'aggregate'):
+        return PollResults.from_responses(schema, df, matrices)
+
+
+def stream_poll_results(poll, csv_file=None, chunk_rows=CHUNK_ROWS):
+    """Count a poll CSV block by block without loading it all into memory
+
+    Memory use depends on chunk_rows, not on the size of the file. The counts,
+    total and date range are the same as load_poll_results, but the returned
+    PollResults has no DataFrame or option matrices and nothing is cached.
+    """
+    schema = load_schema(poll)
+    if csv_file is None:
+        csv_file = POLLS_DIR / POLLS[poll]['responses']
+
+    counters = RunningCounts(schema)
+    reader = pd.read_csv(csv_file, dtype=str, chunksize=chunk_rows,
+                         usecols=lambda col: keep_column(schema, col, False))
+    with span(f'stream {poll}', 'load', csv=str(csv_file)), reader:
+        for chunk in reader:
+            with span('count block', 'aggregate', rows=len(chunk)):
+                counters.add(convert_columns(chunk, schema))
+    return counters.results()
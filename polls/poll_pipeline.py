@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+UCR Entomology Social Committee - Combined Poll Pipeline
+Loads each poll once, counts every question once, and feeds the text report,
+matplotlib PNGs, Plotly HTML charts and summary CSV from the same results,
+then regenerates the chart embeds of poll-results.html
+
+Run from the repository root:
+    python polls/poll_pipeline.py                   # all three polls
+    python polls/poll_pipeline.py coffee_hour       # just one poll
+    python polls/poll_pipeline.py --no-png --no-html  # text report only (no plotting imports)
+    python polls/poll_pipeline.py --incremental     # only parse rows added since last run
+    python polls/poll_pipeline.py --chart-format svg
+    python polls/poll_pipeline.py --trace           # stage timings -> poll_trace.json
+"""
+
+import argparse
+import time
+
+import poll_trace
+import analyze_3d_merch_poll
+import analyze_coffee_hour_poll
+import analyze_events_poll
+from poll_incremental import load_poll_results_incremental
+from poll_loader import load_poll_results
+from poll_schema import POLLS
+from poll_trace import span
+from results_page import build_results_page
+
+# Text report / PNG / summary CSV functions for each poll
+REPORTS = {
+    'coffee_hour': analyze_coffee_hour_poll,
+    'events': analyze_events_poll,
+    '3d_merch': analyze_3d_merch_poll,
+}
+
+RECOMMENDATIONS = {
+    'coffee_hour': analyze_coffee_hour_poll.print_scheduling_recommendations,
+    '3d_merch': analyze_3d_merch_poll.print_design_recommendations,
+}
+
+# Extra restyled PNG chart function (in create_better_visualizations.py)
+IMPROVED_CHARTS = {
+    'coffee_hour': 'analyze_coffee_hour_poll',
+}
+
+# Plotly HTML chart function for each poll (in create_all_interactive_charts.py)
+CHARTS = {
+    'coffee_hour': 'create_coffee_hour_charts',
+    'events': 'create_events_charts',
+    '3d_merch': 'create_3d_merch_charts',
+}
+
+
+def run_poll(poll, png=True, html=True, incremental=False):
+    """Load one poll and produce every output from a single set of results"""
+    if incremental:
+        results = load_poll_results_incremental(poll)
+    else:
+        results = load_poll_results(poll)
+    print(f"✓ Loaded {results.total} responses")
+
+    report_poll(poll, results, png=png, html=html)
+    return results
+
+
+def report_poll(poll, results, png=True, html=True):
+    """Text report, PNG charts, summary CSV and interactive charts of loaded results"""
+    report = REPORTS[poll]
+    with span('text report', 'report', poll=poll):
+        report.print_summary(results)
+        report.print_report(results)
+    if png:
+        with span('png charts', 'render', poll=poll):
+            report.create_visualizations(results)
+        if poll in IMPROVED_CHARTS:
+            with span('improved png charts', 'render', poll=poll):
+                create_improved_charts(poll, results)
+    with span('summary csv', 'write', poll=poll):
+        report.export_summary_csv(results)
+    if poll in RECOMMENDATIONS:
+        with span('recommendations', 'report', poll=poll):
+            RECOMMENDATIONS[poll](results)
+    if html:
+        with span('interactive charts', 'render', poll=poll):
+            create_charts(poll, results)
+
+
+def create_improved_charts(poll, results):
+    """Restyled PNG charts of one poll; seaborn is only imported when they are made"""
+    import create_better_visualizations as improved
+    getattr(improved, IMPROVED_CHARTS[poll])(results)
+
+
+def create_charts(poll, results):
+    """Interactive charts of one poll; plotly is only imported when charts are made"""
+    import create_all_interactive_charts as charts
+    getattr(charts, CHARTS[poll])(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze and chart every poll in one pass")
+    parser.add_argument('polls', nargs='*', metavar='poll',
+                        help=f"polls to process: {', '.join(POLLS)} (default: all)")
+    parser.add_argument('--no-png', action='store_true', help="skip the matplotlib PNG charts")
+    parser.add_argument('--no-html', action='store_true', help="skip the Plotly HTML charts")
+    parser.add_argument('--chart-format', choices=('png', 'svg'), default='png',
+                        help="file format of the matplotlib charts (default: png)")
+    parser.add_argument('--chart-width', type=int, metavar='PIXELS',
+                        help="save raster charts this many pixels wide instead of at 300 dpi")
+    parser.add_argument('--incremental', action='store_true',
+                        help="merge only new responses into the stored counters")
+    parser.add_argument('--trace', nargs='?', const=poll_trace.DEFAULT_PATH, metavar='JSON',
+                        help=f"record stage timings and memory to a trace file "
+                             f"(default: {poll_trace.DEFAULT_PATH})")
+    args = parser.parse_args()
+    if args.trace:
+        poll_trace.enable(args.trace)
+    polls = args.polls or list(POLLS)
+    unknown = [poll for poll in polls if poll not in POLLS]
+    if unknown:
+        parser.error(f"unknown poll(s): {', '.join(unknown)}")
+    if not args.no_png:
+        from chart_renderer import set_output
+        set_output(args.chart_format, width=args.chart_width)
+
+    timings = {}
+    totals = {}
+    for poll in polls:
+        start = time.perf_counter()
+        with span(f'poll {poll}', 'poll'):
+            results = run_poll(poll, png=not args.no_png, html=not args.no_html,
+                               incremental=args.incremental)
+        totals[poll] = results.total
+        timings[poll] = time.perf_counter() - start
+
+    if not args.no_html:
+        # poll-results.html loads the charts lazily, sized from the chart manifest
+        with span('results page', 'write'):
+            build_results_page(totals)
+
+    print("\n" + "="*70)
+    print("PIPELINE COMPLETE")
+    print("="*70)
+    for poll, seconds in timings.items():
+        print(f"  {POLLS[poll]['title']:<15} {seconds:>7.2f}s")
+    print(f"  {'Total':<15} {sum(timings.values()):>7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Poll schemas built from the polls/*-headers.csv files
+Each column of a poll gets a kind (single-select, multi-select, free text,
+timestamp or email) so the loader knows how to parse and store it
+
+Select columns also get their option list, read from the checkboxes and radio
+buttons of the poll's form (poll-*.html at the site root), so multi-select
+answers can be matched against known options instead of being split on commas.
+"""
+
+import csv
+import hashlib
+import json
+from html.parser import HTMLParser
+from pathlib import Path
+
+POLLS_DIR = Path(__file__).resolve().parent
+SITE_DIR = POLLS_DIR.parent
+
+# Column kinds
+TIMESTAMP = 'timestamp'
+EMAIL = 'email'
+SINGLE_SELECT = 'single-select'
+MULTI_SELECT = 'multi-select'
+FREE_TEXT = 'free-text'
+
+# Bump when the parsing rules for a kind change (invalidates cached polls)
+SCHEMA_VERSION = 2
+
+# Per-poll header file, response CSV, column kinds, form page and the form
+# field (checkbox or radio group) that feeds each select column.
+# Columns not listed in 'kinds' are treated as free text. 'pairs' lists select
+# questions whose answers are also counted together (respondents per
+# combination of the two answers), e.g. for the coffee hour day x time slots.
+POLLS = {
+    'coffee_hour': {
+        'title': 'Coffee Hour',
+        'headers': 'coffee-hour-headers.csv',
+        'responses': 'coffee_hour_poll_responses.csv',
+        'form': 'poll-coffee-hour.html',
+        'kinds': {
+            'Timestamp': TIMESTAMP,
+            'Email': EMAIL,
+            'Role': SINGLE_SELECT,
+            'Frequency': SINGLE_SELECT,
+            'Preferred Days': MULTI_SELECT,
+            'Duration': SINGLE_SELECT,
+            'Start Time': MULTI_SELECT,
+            'Coffee Types': MULTI_SELECT,
+            'Tea Types': MULTI_SELECT,
+            'Food Options': MULTI_SELECT,
+            'Environment Preference': SINGLE_SELECT,
+            'Location Preference': SINGLE_SELECT,
+            'Lab Hosting Willingness': SINGLE_SELECT,
+            'Music Types': MULTI_SELECT,
+            'Barriers': MULTI_SELECT,
+            'Additional Suggestions': FREE_TEXT,
+        },
+        'fields': {
+            'Role': 'role',
+            'Frequency': 'frequency',
+            'Preferred Days': 'days',
+            'Duration': 'duration',
+            'Start Time': 'startTime',
+            'Coffee Types': 'coffeeTypes',
+            'Tea Types': 'teaTypes',
+            'Food Options': 'foodOptions',
+            'Environment Preference': 'environment',
+            'Location Preference': 'location',
+            'Lab Hosting Willingness': 'labHosting',
+            'Music Types': 'musicTypes',
+            'Barriers': 'barriers',
+        },
+        'pairs': [('Preferred Days', 'Start Time')],
+    },
+    'events': {
+        'title': 'Events',
+        'headers': 'events-poll-headers.csv',
+        'responses': 'events_poll_responses.csv',
+        'form': 'poll-events.html',
+        'kinds': {
+            'Timestamp': TIMESTAMP,
+            'Email': EMAIL,
+            'On-Campus Social Events': MULTI_SELECT,
+            'On-Campus Games & Entertainment': MULTI_SELECT,
+            'Seasonal Celebrations': MULTI_SELECT,
+            'Outdoor Activities': MULTI_SELECT,
+            'Day Trips': MULTI_SELECT,
+            'Entertainment Outings': MULTI_SELECT,
+            'Event Frequency': SINGLE_SELECT,
+            'Availability Times': MULTI_SELECT,
+            'Main Barriers': MULTI_SELECT,
+            'Event Budget': SINGLE_SELECT,
+            '3D Print Interest': SINGLE_SELECT,
+            'Participation Level': MULTI_SELECT,
+            'Alcohol Preference': SINGLE_SELECT,
+            'Additional Suggestions': FREE_TEXT,
+        },
+        'fields': {
+            'On-Campus Social Events': 'onCampusSocial',
+            'On-Campus Games & Entertainment': 'onCampusGames',
+            'Seasonal Celebrations': 'seasonalEvents',
+            'Outdoor Activities': 'outdoorActivities',
+            'Day Trips': 'dayTrips',
+            'Entertainment Outings': 'entertainment',
+            'Event Frequency': 'eventFrequency',
+            'Availability Times': 'availability',
+            'Main Barriers': 'barriers',
+            'Event Budget': 'eventBudget',
+            '3D Print Interest': '3dprintInterest',
+            'Participation Level': 'participation',
+            'Alcohol Preference': 'alcoholPreference',
+        },
+    },
+    '3d_merch': {
+        'title': '3D Merch',
+        'headers': '3d-merch-poll-headers.csv',
+        'responses': '3d_merch_poll_responses.csv',
+        'form': 'poll-3d-merch.html',
+        'kinds': {
+            'Timestamp': TIMESTAMP,
+            'Email': EMAIL,
+            'Purchase Interest': SINGLE_SELECT,
+            'Keychain Products': MULTI_SELECT,
+            'Decorative Products': MULTI_SELECT,
+            'Functional Products': MULTI_SELECT,
+            'Favorite Insects': MULTI_SELECT,
+            'Design Style': SINGLE_SELECT,
+            'Printing Method': SINGLE_SELECT,
+            'Color Preference': SINGLE_SELECT,
+            'Size Preference': SINGLE_SELECT,
+            'Price Small Items': SINGLE_SELECT,
+            'Price Large Items': SINGLE_SELECT,
+            'Additional Suggestions': FREE_TEXT,
+        },
+        'fields': {
+            'Purchase Interest': 'purchaseInterest',
+            'Keychain Products': 'keychainProducts',
+            'Decorative Products': 'decorativeProducts',
+            'Functional Products': 'functionalProducts',
+            'Favorite Insects': 'favoriteInsects',
+            'Design Style': 'designStyle',
+            'Printing Method': 'printingMethod',
+            'Color Preference': 'colorPreference',
+            'Size Preference': 'sizePreference',
+            'Price Small Items': 'priceSmall',
+            'Price Large Items': 'priceLarge',
+        },
+    },
+}
+
+
+class PollSchema:
+    """Ordered columns of one poll and the kind of each column"""
+
+    def __init__(self, name, columns, kinds, options=None, pairs=None):
+        self.name = name
+        self.columns = list(columns)
+        self.kinds = {col: kinds.get(col, FREE_TEXT) for col in self.columns}
+        # Question pairs counted together; both must be select columns
+        self.pairs = [tuple(pair) for pair in (pairs or [])
+                      if all(self.kinds.get(col) in (SINGLE_SELECT, MULTI_SELECT) for col in pair)]
+        # Known options of select columns, in form order
+        self.options = {col: list(values) for col, values in (options or {}).items()
+                        if col in self.kinds}
+
+    def columns_of(self, *kinds):
+        """Columns of the given kind(s), in header order"""
+        return [col for col in self.columns if self.kinds[col] in kinds]
+
+    @property
+    def multiselect(self):
+        return self.columns_of(MULTI_SELECT)
+
+    @property
+    def singleselect(self):
+        return self.columns_of(SINGLE_SELECT)
+
+    @property
+    def text(self):
+        return self.columns_of(FREE_TEXT, EMAIL)
+
+    def kind(self, column):
+        """Kind of a column; columns missing from the headers count as free text"""
+        return self.kinds.get(column, FREE_TEXT)
+
+    def fingerprint(self):
+        """Short hash of the schema, used to key cached polls"""
+        payload = json.dumps([SCHEMA_VERSION, self.name, self.columns, self.kinds,
+                              self.options, self.pairs])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def read_headers(headers_file):
+    """Read the single header row of a polls/*-headers.csv file"""
+    with open(headers_file, newline='', encoding='utf-8') as f:
+        return next(csv.reader(f))
+
+
+class FormOptionParser(HTMLParser):
+    """Collects the values of every checkbox and radio button, grouped by field name"""
+
+    def __init__(self):
+        super().__init__()
+        self.fields = {}
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag != 'input' or attrs.get('type') not in ('checkbox', 'radio'):
+            return
+        name, value = attrs.get('name'), attrs.get('value')
+        if name and value is not None:
+            values = self.fields.setdefault(name, [])
+            if value not in values:
+                values.append(value)
+
+
+def read_form_options(form_file):
+    """Option values of each checkbox/radio field of a poll form"""
+    parser = FormOptionParser()
+    with open(form_file, encoding='utf-8') as f:
+        parser.feed(f.read())
+    parser.close()
+    return parser.fields
+
+
+def load_schema(poll):
+    """Build the schema for 'coffee_hour', 'events' or '3d_merch'
+
+    Select options come from the poll's form page; if the page is not there
+    (e.g. only the polls folder was copied) the options are left out and
+    multi-select answers are split on commas instead.
+    """
+    if poll not in POLLS:
+        raise ValueError(f"Unknown poll '{poll}' (expected one of: {', '.join(POLLS)})")
+
+    config = POLLS[poll]
+    columns = read_headers(POLLS_DIR / config['headers'])
+
+    options = {}
+    form_file = SITE_DIR / config['form']
+    if form_file.exists():
+        fields = read_form_options(form_file)
+        options = {col: fields[field] for col, field in config['fields'].items()
+                   if field in fields}
+    return PollSchema(poll, columns, config['kinds'], options, config.get('pairs'))
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Synthetic poll responses for load testing
+Generates any number of responses for a poll with NumPy, following the poll's
+real column order (polls/*-headers.csv) and the option vocabularies of its
+form (see poll_schema.py). No real response is ever copied:
+
+- single-select answers are drawn from the form's radio values
+- multi-select answers pick a number of options (the cardinality) and then that
+  many distinct options, weighted by popularity, listed in form order
+- free-text and email columns are mostly blank, otherwise filled from a small
+  pool of made-up answers
+- timestamps increase from a start date with random gaps
+
+By default the distributions are random but seeded. fit_model() replaces them
+with ones fitted from an existing response CSV: the share of each option, the
+number of options picked per respondent, how often each question is left blank
+and the date range.
+
+Every column is generated as integer codes into a list of distinct cell
+strings, so the CSV writer only escapes each distinct answer once and writing
+stays at millions of rows per minute.
+
+Run from the repository root:
+    python polls/poll_synthetic.py events 1000000 -o events_1m.csv
+    python polls/poll_synthetic.py coffee_hour 50000 --fit polls/coffee_hour_poll_responses.csv
+"""
+
+import argparse
+import math
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from poll_counts import OptionTokenizer
+from poll_schema import (EMAIL, FREE_TEXT, MULTI_SELECT, POLLS, POLLS_DIR, SINGLE_SELECT,
+                         TIMESTAMP, load_schema)
+
+# Share of respondents who skip a question in the default model
+BLANK_SINGLE = 0.05
+BLANK_MULTI = 0.10
+FILLED_TEXT = 0.15
+
+# Default multi-select cardinality: 1 + Binomial(options - 1, PICK_RATE)
+PICK_RATE = 0.25
+
+# Default timestamps: from START_DATE, one response every MEAN_GAP seconds on average
+START_DATE = '2025-10-01'
+MEAN_GAP = 60.0
+
+# Made-up free-text answers and email addresses
+TEXT_POOL = [
+    'More events please!',
+    'Would love a mix of on- and off-campus activities.',
+    'Please keep costs low for students.',
+    'Afternoons work best for me.',
+    'Thanks for organizing this, great idea.',
+    'Vegetarian options would be appreciated.',
+    'Could we rotate the location between buildings?',
+    'Happy to help set up.',
+]
+EMAIL_POOL = [f'respondent{i}@example.com' for i in range(100)]
+
+# Rows written per block
+WRITE_CHUNK_ROWS = 200_000
+
+
+def default_model(poll, seed=0):
+    """Seeded, randomly shaped answer distributions for every column of a poll
+
+    Returns a dict column -> spec. Select specs hold the form's options and a
+    probability (or weight) for each; multi-select specs also hold the
+    probability of picking 0, 1, 2, ... options.
+    """
+    schema = load_schema(poll)
+    rng = np.random.default_rng(seed)
+    model = {}
+    for col in schema.columns:
+        kind = schema.kind(col)
+        options = schema.options.get(col)
+        if kind == SINGLE_SELECT and options:
+            share = rng.dirichlet(np.full(len(options), 2.0)) * (1 - BLANK_SINGLE)
+            model[col] = {'kind': kind, 'options': options,
+                          'p': [BLANK_SINGLE] + list(share)}
+        elif kind == MULTI_SELECT and options:
+            answered = np.array([math.comb(len(options) - 1, k) * PICK_RATE**k
+                                 * (1 - PICK_RATE)**(len(options) - 1 - k)
+                                 for k in range(len(options))])
+            model[col] = {'kind': kind, 'options': options,
+                          'weights': list(rng.dirichlet(np.full(len(options), 2.0))),
+                          'cardinality': [BLANK_MULTI] + list(answered * (1 - BLANK_MULTI))}
+        elif kind == TIMESTAMP:
+            model[col] = {'kind': kind, 'start': START_DATE, 'mean_gap': MEAN_GAP}
+        elif kind == EMAIL:
+            model[col] = {'kind': kind, 'filled': 0.0}
+        else:
+            # Free text, and select columns whose form was not found
+            model[col] = {'kind': FREE_TEXT, 'filled': FILLED_TEXT}
+    return model
+
+
+def fit_model(poll, csv_file, seed=0):
+    """Answer distributions fitted from an existing response CSV
+
+    Only aggregate shares are kept; answers outside the form's options count
+    as blank, and free text is still drawn from TEXT_POOL.
+    """
+    schema = load_schema(poll)
+    model = default_model(poll, seed)
+    df = pd.read_csv(csv_file, dtype=str)
+
+    for col, spec in model.items():
+        if col not in df.columns:
+            continue
+        answers = df[col]
+        kind = spec['kind']
+        if kind == SINGLE_SELECT:
+            counts = answers.value_counts().reindex(spec['options'], fill_value=0).to_numpy()
+            spec['p'] = [len(answers) - counts.sum()] + list(counts)
+        elif kind == MULTI_SELECT:
+            matrix = OptionTokenizer(schema.options[col]).encode(answers)
+            dense = matrix.to_dense()
+            known = [j for j, option in enumerate(matrix.options) if option in spec['options']]
+            by_option = dict(zip(matrix.options, dense.sum(axis=0)))
+            picked = dense[:, known].sum(axis=1)
+            spec['weights'] = [by_option.get(option, 0) + 0.5 for option in spec['options']]
+            spec['cardinality'] = list(np.bincount(picked, minlength=len(spec['options']) + 1))
+        elif kind == TIMESTAMP:
+            stamps = pd.to_datetime(answers, errors='coerce').dropna()
+            if len(stamps) > 1:
+                spec['start'] = stamps.min().tz_localize(None).isoformat()
+                spec['mean_gap'] = (stamps.max() - stamps.min()).total_seconds() / (len(stamps) - 1)
+        else:
+            spec['filled'] = float(answers.notna().mean()) if len(answers) else 0.0
+    return model
+
+
+def normalized(values):
+    values = np.asarray(values, dtype=float)
+    return values / values.sum()
+
+
+def generate_select(spec, rows, rng):
+    """Codes into ['', option 1, option 2, ...]"""
+    return rng.choice(len(spec['p']), size=rows, p=normalized(spec['p'])), [''] + spec['options']
+
+
+def generate_multiselect(spec, rows, rng):
+    """Codes into the distinct 'a, b, c' answers that were generated
+
+    Picks k ~ cardinality distinct options per row without replacement,
+    weighted by popularity, using exponential race keys (the smallest k of
+    Exp(1) / weight win).
+    """
+    options = spec['options']
+    picks = rng.choice(len(spec['cardinality']), size=rows, p=normalized(spec['cardinality']))
+    keys = rng.exponential(size=(rows, len(options))) / normalized(spec['weights'])
+    rank = keys.argsort(axis=1).argsort(axis=1)
+    chosen = rank < picks[:, None]
+
+    # One integer per row (bit j = option j), then one string per distinct combination
+    bits = chosen @ (1 << np.arange(len(options), dtype=np.int64))
+    combinations, codes = np.unique(bits, return_inverse=True)
+    answers = [', '.join(option for j, option in enumerate(options) if combo >> j & 1)
+               for combo in combinations.tolist()]
+    return codes, answers
+
+
+def generate_pool(spec, rows, rng, pool):
+    filled = rng.random(rows) < spec['filled']
+    codes = np.where(filled, rng.integers(1, len(pool) + 1, rows), 0)
+    return codes, [''] + pool
+
+
+def generate_timestamps(spec, rows, rng):
+    """ISO timestamps like Google Sheets exports them, always increasing"""
+    gaps = rng.exponential(spec['mean_gap'] * 1000, rows).astype(np.int64)
+    stamps = np.datetime64(spec['start'], 'ms') + np.cumsum(gaps).astype('timedelta64[ms]')
+    return np.char.add(np.datetime_as_string(stamps, unit='ms'), 'Z').astype(object)
+
+
+def generate_columns(model, rows, seed=0):
+    """column -> (codes, cell strings) or an object array of cells (timestamps)"""
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for col, spec in model.items():
+        kind = spec['kind']
+        if kind == SINGLE_SELECT:
+            columns[col] = generate_select(spec, rows, rng)
+        elif kind == MULTI_SELECT:
+            columns[col] = generate_multiselect(spec, rows, rng)
+        elif kind == TIMESTAMP:
+            columns[col] = generate_timestamps(spec, rows, rng)
+        elif kind == EMAIL:
+            columns[col] = generate_pool(spec, rows, rng, EMAIL_POOL)
+        else:
+            columns[col] = generate_pool(spec, rows, rng, TEXT_POOL)
+    return columns
+
+
+def csv_cell(value):
+    """A value quoted the way csv.writer quotes it (only when needed)"""
+    if any(char in value for char in ',"\r\n'):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+def cell_array(column, start, stop):
+    if isinstance(column, tuple):
+        codes, values = column
+        return np.array([csv_cell(value) for value in values], dtype=object)[codes[start:stop]]
+    return column[start:stop]
+
+
+def write_columns(columns, output_file, rows):
+    """Write generated columns as CSV, escaping each distinct answer once"""
+    with open(output_file, 'w', encoding='utf-8', newline='') as f:
+        f.write(','.join(csv_cell(col) for col in columns) + '\n')
+        for start in range(0, rows, WRITE_CHUNK_ROWS):
+            stop = min(start + WRITE_CHUNK_ROWS, rows)
+            cells = [cell_array(column, start, stop) for column in columns.values()]
+            f.write('\n'.join(map(','.join, zip(*cells))))
+            f.write('\n')
+
+
+def synthetic_responses(poll, rows, seed=0, model=None):
+    """DataFrame of synthetic responses, like pd.read_csv(..., dtype=str) of a real export"""
+    model = model or default_model(poll, seed)
+    data = {}
+    for col, column in generate_columns(model, rows, seed).items():
+        if isinstance(column, tuple):
+            codes, values = column
+            column = np.array([value or None for value in values], dtype=object)[codes]
+        data[col] = column
+    return pd.DataFrame(data)
+
+
+def write_synthetic_csv(poll, rows, output_file, seed=0, model=None):
+    """Generate `rows` responses and write them to output_file; returns the path"""
+    model = model or default_model(poll, seed)
+    output_file = Path(output_file)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    write_columns(generate_columns(model, rows, seed), output_file, rows)
+    return output_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic responses for a poll")
+    parser.add_argument('poll', choices=list(POLLS))
+    parser.add_argument('rows', type=int)
+    parser.add_argument('-o', '--output', help="CSV to write (default: <poll>_synthetic_<rows>.csv)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--fit', metavar='CSV', nargs='?', const='',
+                        help="fit the answer distributions to a response CSV "
+                             "(default: the poll's own responses)")
+    args = parser.parse_args()
+
+    model = None
+    if args.fit is not None:
+        fit_file = args.fit or POLLS_DIR / POLLS[args.poll]['responses']
+        model = fit_model(args.poll, fit_file, args.seed)
+        print(f"✓ Fitted answer distributions to '{fit_file}'")
+
+    output = args.output or f'{args.poll}_synthetic_{args.rows}.csv'
+    start = time.perf_counter()
+    path = write_synthetic_csv(args.poll, args.rows, output, args.seed, model)
+    seconds = time.perf_counter() - start
+    print(f"✓ Wrote {args.rows:,} responses to '{path}' in {seconds:.1f}s "
+          f"({args.rows / seconds * 60 / 1e6:.1f}M rows/minute, {path.stat().st_size / 1e6:.0f} MB)")
+
+
+if __name__ == "__main__":
+    main()
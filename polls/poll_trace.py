@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Stage tracing for the polls scripts
+Records a timed span for each stage (download, load, aggregate, render, write)
+with the peak memory allocated inside it, then writes a trace-event JSON file
+(open it in https://ui.perfetto.dev or chrome://tracing) and prints a summary
+table with one line per stage.
+
+Tracing is off unless enabled with --trace (poll_pipeline.py, poll_build.py)
+or the POLL_TRACE environment variable, which holds the output path:
+
+    POLL_TRACE=trace.json python polls/analyze_events_poll.py polls/events_poll_responses.csv
+    python polls/poll_pipeline.py --trace
+
+When off, span() returns a shared no-op context manager, so instrumented code
+costs one global lookup and call per stage. Peak memory comes from
+tracemalloc (Python and NumPy allocations), which slows the traced run down;
+set POLL_TRACE_MEMORY=0 to record times only.
+"""
+
+import atexit
+import contextlib
+import json
+import os
+import resource
+import threading
+import time
+import tracemalloc
+
+ENV_VAR = 'POLL_TRACE'
+MEMORY_ENV_VAR = 'POLL_TRACE_MEMORY'
+# Process that enabled tracing; only it writes the file (worker processes hand
+# their events back, see collect())
+OWNER_ENV_VAR = 'POLL_TRACE_OWNER'
+DEFAULT_PATH = 'poll_trace.json'
+
+_NO_SPAN = contextlib.nullcontext()
+_tracer = None
+
+
+class Tracer:
+    """Collected trace events and the stack of open spans (for nested peak memory)"""
+
+    def __init__(self, path, memory=True):
+        self.path = path
+        self.memory = memory
+        self.events = []
+        self.stack = []
+        self.lock = threading.Lock()
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextlib.contextmanager
+    def span(self, name, cat, args):
+        # Peak so far of the enclosing span, kept while this span resets the peak
+        frame = [0]
+        if self.memory:
+            start_memory = tracemalloc.get_traced_memory()[0]
+            if self.stack:
+                self.stack[-1][0] = max(self.stack[-1][0], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self.stack.append(frame)
+        start = time.monotonic_ns()
+        try:
+            yield
+        finally:
+            end = time.monotonic_ns()
+            self.stack.pop()
+            args = dict(args)
+            if self.memory:
+                current, peak = tracemalloc.get_traced_memory()
+                peak = max(peak, frame[0])
+                args['peak_mb'] = round(peak / 1e6, 2)
+                args['growth_mb'] = round((peak - start_memory) / 1e6, 2)
+                if self.stack:
+                    self.stack[-1][0] = max(self.stack[-1][0], peak)
+            # ru_maxrss is in kilobytes on Linux
+            args['max_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3, 1)
+            event = {'name': name, 'cat': cat, 'ph': 'X', 'ts': start / 1e3,
+                     'dur': (end - start) / 1e3, 'pid': os.getpid(),
+                     'tid': threading.get_ident(), 'args': args}
+            with self.lock:
+                self.events.append(event)
+                if self.memory:
+                    self.events.append({'name': 'traced memory', 'ph': 'C', 'ts': end / 1e3,
+                                        'pid': os.getpid(), 'args': {'MB': round(current / 1e6, 2)}})
+
+
+def enable(path=None, memory=None):
+    """Start tracing this process (and the worker processes it starts)
+
+    path defaults to $POLL_TRACE or poll_trace.json; memory to $POLL_TRACE_MEMORY != '0'.
+    """
+    global _tracer
+    if _tracer is not None:
+        return
+    path = path or os.environ.get(ENV_VAR) or DEFAULT_PATH
+    if memory is None:
+        memory = os.environ.get(MEMORY_ENV_VAR, '1') != '0'
+    os.environ[ENV_VAR] = str(path)
+    os.environ[MEMORY_ENV_VAR] = '1' if memory else '0'
+    os.environ.setdefault(OWNER_ENV_VAR, str(os.getpid()))
+    _tracer = Tracer(path, memory)
+    atexit.register(finish)
+
+
+def enabled():
+    return _tracer is not None
+
+
+def span(name, cat='stage', **args):
+    """Context manager timing one stage; a no-op unless tracing is enabled"""
+    if _tracer is None:
+        return _NO_SPAN
+    return _tracer.span(name, cat, args)
+
+
+def collect():
+    """Take the events recorded so far (used to hand a worker's events to the parent)"""
+    if _tracer is None:
+        return []
+    with _tracer.lock:
+        events, _tracer.events = _tracer.events, []
+    return events
+
+
+def add_events(events):
+    """Merge events recorded by another process"""
+    if _tracer is not None and events:
+        with _tracer.lock:
+            _tracer.events.extend(events)
+
+
+def summary(events):
+    """(name, category, calls, total seconds, peak MB, growth MB) per span name, slowest first
+
+    Peak is the most memory in use during the stage; growth is how far above
+    the memory in use when the stage started that peak went.
+    """
+    stages = {}
+    for event in events:
+        if event['ph'] != 'X':
+            continue
+        entry = stages.setdefault(event['name'], [event['cat'], 0, 0.0, None, None])
+        entry[1] += 1
+        entry[2] += event['dur'] / 1e6
+        if 'peak_mb' in event['args']:
+            entry[3] = max(entry[3] or 0, event['args']['peak_mb'])
+            entry[4] = max(entry[4] or 0, event['args']['growth_mb'])
+    rows = [(name, *entry) for name, entry in stages.items()]
+    return sorted(rows, key=lambda row: -row[3])
+
+
+def print_summary(events):
+    print("\n" + "="*70)
+    print("TRACE SUMMARY")
+    print("="*70)
+    print(f"  {'Stage':<28} {'Kind':<10} {'Calls':>6} {'Total':>9} {'Peak MB':>8} {'+MB':>7}")
+    for name, cat, calls, seconds, peak, growth in summary(events):
+        peak = f"{peak:.1f}" if peak is not None else '-'
+        growth = f"{growth:.1f}" if growth is not None else '-'
+        print(f"  {name[:28]:<28} {cat:<10} {calls:>6} {seconds:>8.3f}s {peak:>8} {growth:>7}")
+
+
+def finish():
+    """Write the trace file and print the summary (only in the process that enabled tracing)"""
+    if _tracer is None or os.environ.get(OWNER_ENV_VAR) != str(os.getpid()):
+        return
+    events = collect()
+    if not events:
+        return
+    with open(_tracer.path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+    print_summary(events)
+    print(f"\n✓ Trace written to '{_tracer.path}' (open it in https://ui.perfetto.dev)")
+
+
+# Scripts started with POLL_TRACE set (including worker processes) trace from import
+if os.environ.get(ENV_VAR):
+    enable()
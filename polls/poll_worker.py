@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Warm poll worker
+A long-lived process that keeps pandas, matplotlib, seaborn and plotly imported
+and every poll's results in memory, and runs jobs sent by poll_client.py over a
+Unix socket (polls/.poll_cache/worker.sock). Everything a job prints is streamed
+back to the client as it happens.
+
+A poll is reloaded when its response CSV changes. Code changes are not picked
+up; run `python polls/poll_client.py stop` after editing the scripts. The worker
+also exits by itself after IDLE_TIMEOUT seconds without jobs.
+
+Normally started by poll_client.py; to run it in the foreground:
+    python polls/poll_worker.py
+"""
+
+import contextlib
+import json
+import os
+import socketserver
+import time
+import traceback
+
+import poll_pipeline
+# Imported only to warm up the worker: jobs then never pay for loading the plotting libraries
+import chart_renderer  # noqa: F401
+import create_all_interactive_charts  # noqa: F401
+from poll_client import IDLE_TIMEOUT, SOCKET_PATH, connect
+from poll_loader import load_poll_results
+from poll_schema import POLLS, POLLS_DIR
+from results_page import build_results_page
+
+
+class ClientWriter:
+    """File-like object that forwards everything printed to the client"""
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+
+    def write(self, text):
+        if text:
+            self.wfile.write(json.dumps({'out': text}).encode('utf-8') + b'\n')
+        return len(text)
+
+    def flush(self):
+        self.wfile.flush()
+
+
+class LoadedPolls:
+    """Results of each poll, reloaded only when its response CSV changes"""
+
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, poll):
+        stat = (POLLS_DIR / POLLS[poll]['responses']).stat()
+        signature = (stat.st_size, stat.st_mtime_ns)
+        entry = self.entries.get(poll)
+        if entry is None or entry[0] != signature:
+            entry = (signature, load_poll_results(poll))
+            self.entries[poll] = entry
+        return entry[1]
+
+
+def analyze_job(poll, results, options):
+    poll_pipeline.report_poll(poll, results, png=options.get('png', True), html=False)
+
+
+def charts_job(poll, results, options):
+    poll_pipeline.create_charts(poll, results)
+    build_results_page({poll: results.total})
+
+
+def summary_job(poll, results, options):
+    poll_pipeline.REPORTS[poll].export_summary_csv(results)
+
+
+JOBS = {
+    'analyze': analyze_job,
+    'charts': charts_job,
+    'summary': summary_job,
+}
+
+
+class JobHandler(socketserver.StreamRequestHandler):
+    """One connection = one job: a JSON request line in, JSON output lines back"""
+
+    def handle(self):
+        request = json.loads(self.rfile.readline())
+        start = time.perf_counter()
+        writer = ClientWriter(self.wfile)
+        try:
+            with contextlib.redirect_stdout(writer), contextlib.redirect_stderr(writer):
+                ok = self.server.run_job(request)
+            writer.flush()
+            self.wfile.write(json.dumps({'done': True, 'ok': ok,
+                                         'seconds': time.perf_counter() - start}).encode('utf-8') + b'\n')
+        except BrokenPipeError:
+            # The client went away; the job itself has finished
+            pass
+
+
+class PollWorker(socketserver.UnixStreamServer):
+    """Runs one job at a time (jobs redirect the process-wide stdout)"""
+
+    timeout = IDLE_TIMEOUT
+
+    def __init__(self):
+        super().__init__(str(SOCKET_PATH), JobHandler)
+        self.polls = LoadedPolls()
+        self.started = time.time()
+        self.jobs_run = 0
+        self.stopping = False
+
+    def handle_timeout(self):
+        print(f"No jobs for {IDLE_TIMEOUT}s, stopping")
+        self.stopping = True
+
+    def run_job(self, request):
+        job = request['job']
+        if job == 'status':
+            loaded = ', '.join(f"{poll} ({entry[1].total})" for poll, entry in self.polls.entries.items())
+            print(f"Poll worker {os.getpid()}: up {time.time() - self.started:.0f}s, "
+                  f"{self.jobs_run} jobs run, loaded: {loaded or 'nothing'}")
+            return True
+        if job == 'stop':
+            print("Poll worker stopping")
+            self.stopping = True
+            return True
+        if job not in JOBS:
+            print(f"Unknown job '{job}' (expected one of: {', '.join(JOBS)}, status, stop)")
+            return False
+
+        polls = request['polls'] or list(POLLS)
+        unknown = [poll for poll in polls if poll not in POLLS]
+        if unknown:
+            print(f"Unknown poll(s): {', '.join(unknown)}")
+            return False
+
+        # Output paths are relative to where the client was run
+        os.chdir(request['cwd'])
+        self.jobs_run += 1
+        ok = True
+        for poll in polls:
+            try:
+                JOBS[job](poll, self.polls.get(poll), request['options'])
+            except Exception:
+                traceback.print_exc()
+                ok = False
+        return ok
+
+
+def serve():
+    """Load every poll, then run jobs until stopped or idle for IDLE_TIMEOUT seconds"""
+    SOCKET_PATH.parent.mkdir(parents=True, exist_ok=True)
+    if SOCKET_PATH.exists():
+        running = connect()
+        if running is not None:
+            running.close()
+            print(f"A poll worker is already listening on {SOCKET_PATH}")
+            return
+        # Left over from a worker that did not shut down cleanly
+        SOCKET_PATH.unlink()
+
+    server = PollWorker()
+    try:
+        for poll in POLLS:
+            try:
+                server.polls.get(poll)
+            except FileNotFoundError:
+                pass
+        print(f"Poll worker {os.getpid()} listening on {SOCKET_PATH}", flush=True)
+        while not server.stopping:
+            server.handle_request()
+    finally:
+        server.server_close()
+        SOCKET_PATH.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Regenerate the chart embeds of poll-results.html
+Every chart block on the page is rewritten as a lazy placeholder: a
+.chart-container sized to the chart's real height that js/lazy-charts.js fills
+with the chart iframe only when it scrolls near the viewport. Charts that have
+a static SVG next to their Plotly page get the SVG inlined instead, so they show
+without any JavaScript and the Plotly version only loads when asked for. Heights
+and titles come from polls/analysis_results/chart_manifest.json (written by
+create_all_interactive_charts.py), and the "Based on N responses" line of each
+poll is updated when response totals are given.
+
+Run from the repository root after creating the charts:
+    python polls/results_page.py
+"""
+
+import html
+import json
+import re
+
+from poll_schema import POLLS_DIR
+
+RESULTS_PAGE = POLLS_DIR.parent / 'poll-results.html'
+CHARTS_ROOT = 'polls/analysis_results'
+MANIFEST_PATH = POLLS_DIR / 'analysis_results' / 'chart_manifest.json'
+
+# Height used when a chart is neither in the manifest nor on disk (the old iframe height)
+DEFAULT_HEIGHT = 650
+
+# The figure layout (with its height) is at the end of each chart page
+LAYOUT_HEIGHT = re.compile(rb'"height":\s*(\d+)')
+
+# Tab on poll-results.html that holds each poll's charts
+POLL_TABS = {
+    'coffee_hour': 'coffee-hour',
+    'events': 'events',
+    '3d_merch': 'merch',
+}
+
+# A chart block: the original iframe, a lazy placeholder or an inlined SVG chart
+CHART_BLOCK = re.compile(
+    r'(?P<indent>[ \t]*)<div class="chart-container[^"]*"(?: data-src="(?P<data_src>[^"]+)")?[^>]*>\s*'
+    r'(?:(?:<noscript>)?<iframe src="(?P<src>[^"]+)"[^>]*></iframe>(?:</noscript>)?|<svg\b.*?</svg>)\s*'
+    r'</div>',
+    re.S
+)
+
+
+def read_manifest(manifest_path=MANIFEST_PATH):
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def height_from_page(chart_path):
+    """Layout height of a chart built before the manifest existed"""
+    try:
+        with open(chart_path, 'rb') as f:
+            f.seek(max(0, f.seek(0, 2) - 20_000))
+            heights = LAYOUT_HEIGHT.findall(f.read())
+    except OSError:
+        return None
+    return int(heights[-1]) if heights else None
+
+
+def static_chart(src, manifest):
+    """Inline SVG saved next to a chart page, if it was built together with the page"""
+    svg_src = src[:-len('.html')] + '.svg'
+    entry = manifest.get(src[len(CHARTS_ROOT) + 1:], {})
+    svg_entry = manifest.get(svg_src[len(CHARTS_ROOT) + 1:])
+    if svg_entry is None or svg_entry['hash'] != entry.get('hash', svg_entry['hash']):
+        return None
+    try:
+        return (POLLS_DIR.parent / svg_src).read_text(encoding='utf-8')
+    except OSError:
+        return None
+
+
+def lazy_chart_block(indent, src, manifest):
+    """Placeholder div for one chart: the static SVG, or a <noscript> iframe fallback"""
+    entry = manifest.get(src[len(CHARTS_ROOT) + 1:], {})
+    height = (entry.get('height') or height_from_page(POLLS_DIR.parent / src)
+              or DEFAULT_HEIGHT)
+    title = ''
+    if entry.get('title'):
+        title = f' data-title="{html.escape(entry["title"], quote=True)}"'
+
+    svg = static_chart(src, manifest)
+    if svg is not None:
+        return (
+            f'{indent}<div class="chart-container lazy-chart static-chart" data-src="{src}"{title} '
+            f'style="--chart-height: {height}px;">\n'
+            f'{indent}    {svg}\n'
+            f'{indent}</div>'
+        )
+    return (
+        f'{indent}<div class="chart-container lazy-chart" data-src="{src}"{title} '
+        f'style="--chart-height: {height}px;">\n'
+        f'{indent}    <noscript><iframe src="{src}"></iframe></noscript>\n'
+        f'{indent}</div>'
+    )
+
+
+def update_totals(page, totals):
+    """Update the 'Based on N responses' line in each poll's tab"""
+    for poll, total in totals.items():
+        tab = re.escape(POLL_TABS[poll])
+        page = re.sub(rf'(<div id="{tab}" class="tab-content.*?Based on )\d+( responses)',
+                      rf'\g<1>{total}\g<2>', page, count=1, flags=re.S)
+    return page
+
+
+def build_results_page(totals=None, page_path=RESULTS_PAGE, manifest_path=MANIFEST_PATH):
+    """Rewrite the chart blocks (and optionally response totals) of the results page
+
+    totals maps poll name -> number of responses. Returns the number of charts.
+    """
+    manifest = read_manifest(manifest_path)
+    page = page_path.read_text(encoding='utf-8')
+
+    page, n_charts = CHART_BLOCK.subn(
+        lambda m: lazy_chart_block(m['indent'], m['src'] or m['data_src'], manifest), page)
+    if totals:
+        page = update_totals(page, totals)
+
+    page_path.write_text(page, encoding='utf-8')
+    n_static = page.count('class="chart-container lazy-chart static-chart"')
+    print(f"✓ {page_path.name}: {n_charts} charts ({n_static} static SVG, "
+          f"{n_charts - n_static} load on scroll)")
+    return n_charts
+
+
+if __name__ == "__main__":
+    build_results_page()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Startup time of the text-only report runs
+Runs each report-only entry point (the ones cron jobs use to mail a text summary)
+several times in a fresh interpreter and reports the median wall time, the time
+spent importing modules, and whether any plotting library got imported.
+
+Each run is compared with the numbers stored by the last --save in
+polls/startup_times.json. That file is not in git: the times only mean
+something on the machine that measured them.
+
+Run from the repository root:
+    python polls/startup_time.py              # measure and compare
+    python polls/startup_time.py --save       # measure and store as the new reference
+    python polls/startup_time.py -n 10        # more runs per entry point
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+from poll_schema import POLLS, POLLS_DIR
+
+RESULTS_PATH = POLLS_DIR / 'startup_times.json'
+
+# Libraries a text-only run must never import
+PLOTTING_MODULES = ('matplotlib', 'seaborn', 'plotly')
+
+# Slower than the stored median by more than this fraction is reported
+TOLERANCE = 0.20
+
+# Runs the entry point like `python <script> <args>`, then reports how long the
+# imports took and which plotting libraries were loaded (stdout is discarded)
+CHILD = """
+import json, runpy, sys, time
+script, args, plotting = sys.argv[1], sys.argv[2:], {plotting!r}
+sys.argv = [script] + args
+sys.path.insert(0, {polls_dir!r})
+start = time.perf_counter()
+try:
+    runpy.run_path(script, run_name='__main__')
+finally:
+    loaded = sorted(name for name in plotting if name in sys.modules)
+    sys.stderr.write('\\n' + json.dumps({{'loaded': loaded}}) + '\\n')
+"""
+
+
+def entry_points():
+    """Name -> command line (script and arguments) of every text-only run"""
+    points = {'pipeline': ['poll_pipeline.py', '--no-png', '--no-html']}
+    for poll, config in POLLS.items():
+        points[poll] = [f'analyze_{poll}_poll.py', str(POLLS_DIR / config['responses']),
+                        '--report-only']
+    return points
+
+
+def import_seconds(stderr):
+    """Total time spent in top-level imports, from `python -X importtime` output"""
+    total = 0
+    for line in stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if line.startswith('import time:') and not line.endswith('imported package'):
+            _, cumulative, name = line[len('import time:'):].split('|')
+            if not name.startswith(' '*2):
+                total += int(cumulative)
+    return total / 1e6
+
+
+def measure(command, runs):
+    """Median wall and import seconds of a command, and the plotting modules it loaded"""
+    script = str(POLLS_DIR / command[0])
+    child = CHILD.format(plotting=PLOTTING_MODULES, polls_dir=str(POLLS_DIR))
+    walls, imports, loaded = [], [], set()
+    for _ in range(runs):
+        start = time.perf_counter()
+        done = subprocess.run([sys.executable, '-X', 'importtime', '-c', child, script, *command[1:]],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        walls.append(time.perf_counter() - start)
+        if done.returncode != 0:
+            raise SystemExit(f"{' '.join(command)} failed:\n{done.stderr[-2000:]}")
+        imports.append(import_seconds(done.stderr))
+        loaded.update(json.loads(done.stderr.rstrip().splitlines()[-1])['loaded'])
+    return {'seconds': round(statistics.median(walls), 3),
+            'import_seconds': round(statistics.median(imports), 3),
+            'plotting_modules': sorted(loaded)}
+
+
+def read_results():
+    try:
+        with open(RESULTS_PATH, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the startup time of the text-only report runs")
+    parser.add_argument('-n', '--runs', type=int, default=5, help="runs per entry point (default: 5)")
+    parser.add_argument('--save', action='store_true', help=f"store the results in {RESULTS_PATH.name}")
+    args = parser.parse_args()
+
+    previous = read_results().get('entry_points', {})
+    measured = {}
+    problems = []
+
+    print(f"{'Entry point':<14} {'Median':>8} {'Imports':>8} {'Before':>8}  Plotting imports")
+    for name, command in entry_points().items():
+        result = measure(command, args.runs)
+        measured[name] = result
+        before = previous.get(name, {}).get('seconds')
+        print(f"{name:<14} {result['seconds']:>7.2f}s {result['import_seconds']:>7.2f}s "
+              f"{f'{before:.2f}s' if before else '-':>8}  {', '.join(result['plotting_modules']) or 'none'}")
+        if result['plotting_modules']:
+            problems.append(f"{name} imported {', '.join(result['plotting_modules'])}")
+        if before and result['seconds'] > before * (1 + TOLERANCE):
+            problems.append(f"{name} is {result['seconds'] / before - 1:.0%} slower than the stored time")
+
+    if args.save:
+        with open(RESULTS_PATH, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'runs': args.runs,
+                       'entry_points': measured}, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\n✓ Saved {RESULTS_PATH.name}")
+
+    for problem in problems:
+        print(f"  ✗ {problem}")
+    if problems:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()